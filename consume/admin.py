@@ -1,3 +1,15 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ConsumedShipment, ShipmentLeg
+
+
+class ShipmentLegInline(admin.TabularInline):
+    model = ShipmentLeg
+    extra = 0
+
+
+@admin.register(ConsumedShipment)
+class ConsumedShipmentAdmin(admin.ModelAdmin):
+    list_display = ('shipment_id', 'offer_id', 'total_emissions', 'emissions_unit', 'total_distance', 'recorded_at')
+    search_fields = ('shipment_id', 'offer_id', 'route_key')
+    inlines = [ShipmentLegInline]
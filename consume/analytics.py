@@ -0,0 +1,258 @@
+import logging
+import threading
+
+import numpy as np
+from decouple import config
+from django.core.cache import cache
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from .models import ConsumedShipment, ShipmentLeg
+from .preview import open_artifact
+from .routes import build_route_map_from_stream, looks_like_route_document
+
+PERCENTILES = (50, 90, 95, 99)
+# Seconds a consumed artifact's route map stays cached for the map endpoint
+ROUTE_SOURCE_TTL = config('ROUTE_SOURCE_TTL', default=3600, cast=int)
+
+logger = logging.getLogger(__name__)
+
+_frame_lock = threading.Lock()
+_frame = {'version': None, 'data': None}
+
+
+def _number(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def route_cache_key(kind, route_key, zoom=None):
+    return f"consume:route:{kind}:{route_key}:{'' if zoom is None else zoom}"
+
+
+def cached_route_map(route_key):
+    """
+    Route map of a stored artifact, parsed once and cached for
+    ROUTE_SOURCE_TTL seconds. {} when the artifact holds no mappable legs,
+    None when its stored copy has expired.
+    """
+    key = route_cache_key('map', route_key)
+    route_map = cache.get(key)
+    if route_map is None:
+        with open_artifact(route_key) as artifact:
+            if artifact is None:
+                return None
+            route_map = {}
+            if looks_like_route_document(artifact['content']):
+                route_map = build_route_map_from_stream(artifact['content']) or {}
+        cache.set(key, route_map, ROUTE_SOURCE_TTL)
+    return route_map
+
+
+def record_route_map(route_key, route_map, offer_id='', agreement_url=None, artifact_url=None):
+    """
+    Persist the shipment metrics and per-leg distance/emissions of a route
+    map (as built by routes.build_route_map). Each artifact body is stored
+    once; recording the same route_key again is a no-op.
+    """
+    if not route_map:
+        return None
+    metrics = route_map.get('metrics') or {}
+    standard = metrics.get('standard') or ''
+    if isinstance(standard, (list, tuple)):
+        standard = ', '.join(str(item) for item in standard)
+    calculated_at = metrics.get('calculated_at')
+    try:
+        calculated_at = parse_datetime(calculated_at) if calculated_at else None
+    except ValueError:
+        calculated_at = None
+
+    try:
+        with transaction.atomic():
+            shipment, created = ConsumedShipment.objects.get_or_create(
+                route_key=route_key,
+                defaults={
+                    'agreement_url': agreement_url,
+                    'artifact_url': artifact_url,
+                    'offer_id': offer_id or '',
+                    'shipment_id': metrics.get('shipment_id') or '',
+                    'parcel_id': metrics.get('parcel_id') or '',
+                    'total_emissions': _number(metrics.get('total_emissions')),
+                    'emissions_unit': metrics.get('emissions_unit') or '',
+                    'standard': str(standard),
+                    'calculated_at': calculated_at,
+                    'total_distance': _number(metrics.get('total_distance')),
+                }
+            )
+            if not created:
+                return shipment
+
+            legs = []
+            for segment, detail in zip(route_map.get('segments') or [], route_map.get('leg_details') or []):
+                origin = segment.get('from') or ''
+                destination = segment.get('to') or ''
+                legs.append(ShipmentLeg(
+                    shipment=shipment,
+                    sequence=_number(detail.get('sequence')),
+                    origin=origin,
+                    destination=destination,
+                    corridor=f"{origin} → {destination}",
+                    distance=_number(segment.get('distance')),
+                    emissions=_number(segment.get('emissions')),
+                ))
+            ShipmentLeg.objects.bulk_create(legs, batch_size=1000)
+    except IntegrityError:
+        # Another request recorded the same artifact concurrently
+        return ConsumedShipment.objects.filter(route_key=route_key).first()
+
+    logger.info("Recorded shipment %s with %s legs", shipment.pk, len(legs))
+    return shipment
+
+
+def record_consumption(offer_id, agreement_url, artifacts):
+    """
+    Record the shipments among the artifacts of a finished consumption,
+    given as (artifact_url, store key) pairs. Bodies already recorded, under
+    any agreement, are skipped before they are parsed; the parsed route map
+    is cached for the map endpoint. A failing write never fails the
+    consumption.
+    """
+    for artifact_url, key in artifacts:
+        try:
+            if ConsumedShipment.objects.filter(route_key=key).exists():
+                continue
+            route_map = cached_route_map(key)
+            record_route_map(
+                key,
+                route_map,
+                offer_id=offer_id,
+                agreement_url=agreement_url,
+                artifact_url=artifact_url,
+            )
+        except DatabaseError:
+            logger.exception("Could not record shipment for artifact %s", artifact_url)
+
+
+def _load_frame():
+    """
+    Column arrays of every stored leg, rebuilt only when legs were added
+    since the last call.
+    """
+    version = (ShipmentLeg.objects.count(), ShipmentLeg.objects.aggregate(m=Max('id'))['m'])
+    with _frame_lock:
+        if _frame['version'] == version:
+            return _frame['data']
+
+    rows = list(ShipmentLeg.objects.order_by().values_list(
+        'shipment_id', 'corridor', 'distance', 'emissions'
+    ))
+    if rows:
+        shipment_ids, corridors, distances, emissions = zip(*rows)
+    else:
+        shipment_ids, corridors, distances, emissions = (), (), (), ()
+
+    corridor_names, corridor_idx = np.unique(np.array(corridors, dtype=object).astype(str), return_inverse=True)
+    shipment_keys, shipment_idx = np.unique(np.array(shipment_ids, dtype=np.int64), return_inverse=True)
+    data = {
+        'shipment_keys': shipment_keys,
+        'shipment_idx': shipment_idx,
+        'corridor_names': corridor_names,
+        'corridor_idx': corridor_idx,
+        'distance': np.array([np.nan if d is None else d for d in distances], dtype=float),
+        'emissions': np.array([np.nan if e is None else e for e in emissions], dtype=float),
+    }
+    with _frame_lock:
+        _frame.update(version=version, data=data)
+    return data
+
+
+def _percentiles(values):
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return {f"p{p}": None for p in PERCENTILES}
+    return {
+        f"p{p}": round(float(v), 4)
+        for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))
+    }
+
+
+def _grouped(index, size, distance, emissions):
+    """
+    Per-group leg count, summed distance/emissions and CO2e per km using
+    only legs where both distance and emissions are known.
+    """
+    known = ~np.isnan(distance) & ~np.isnan(emissions)
+    legs = np.bincount(index, minlength=size)
+    total_emissions = np.bincount(index, weights=np.nan_to_num(emissions), minlength=size)
+    total_distance = np.bincount(index, weights=np.nan_to_num(distance), minlength=size)
+    known_emissions = np.bincount(index[known], weights=emissions[known], minlength=size)
+    known_distance = np.bincount(index[known], weights=distance[known], minlength=size)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        intensity = np.where(known_distance > 0, known_emissions / known_distance, np.nan)
+    return legs, total_emissions, total_distance, intensity
+
+
+def _ranking(names, legs, total_emissions, total_distance, intensity, rank_by, limit):
+    key = intensity if rank_by == 'intensity' else total_emissions
+    # NaN intensities sort last
+    order = np.argsort(np.where(np.isnan(key), -np.inf, key))[::-1][:limit]
+    return [
+        {
+            'name': str(names[i]),
+            'legs': int(legs[i]),
+            'total_emissions': round(float(total_emissions[i]), 4),
+            'total_distance': round(float(total_distance[i]), 3),
+            'co2e_per_km': None if np.isnan(intensity[i]) else round(float(intensity[i]), 6),
+        }
+        for i in order
+    ]
+
+
+def emissions_summary(rank_by='intensity', limit=20):
+    """
+    Aggregate every stored leg: totals, percentiles of CO2e per leg and per
+    km, and the top ``limit`` corridors and shipments ranked by CO2e per km
+    ('intensity') or total CO2e ('total').
+    """
+    data = _load_frame()
+    distance = data['distance']
+    emissions = data['emissions']
+
+    known = ~np.isnan(distance) & ~np.isnan(emissions) & (distance > 0)
+    per_km = np.full(distance.shape, np.nan)
+    per_km[known] = emissions[known] / distance[known]
+
+    corridor = _grouped(data['corridor_idx'], len(data['corridor_names']), distance, emissions)
+    shipment = _grouped(data['shipment_idx'], len(data['shipment_keys']), distance, emissions)
+
+    shipment_rank = _ranking(data['shipment_keys'], *shipment, rank_by, limit)
+    if shipment_rank:
+        labels = dict(
+            ConsumedShipment.objects
+            .filter(pk__in=[int(row['name']) for row in shipment_rank])
+            .values_list('pk', 'shipment_id')
+        )
+        for row in shipment_rank:
+            pk = int(row['name'])
+            row['id'] = pk
+            row['name'] = labels.get(pk) or f"#{pk}"
+
+    total_distance = float(np.nansum(distance))
+    total_emissions = float(np.nansum(emissions))
+    known_distance = float(distance[known].sum())
+    return {
+        'shipments': int(len(data['shipment_keys'])),
+        'legs': int(distance.size),
+        'corridors': int(len(data['corridor_names'])),
+        'total_emissions': round(total_emissions, 4),
+        'total_distance': round(total_distance, 3),
+        'co2e_per_km': round(float(emissions[known].sum()) / known_distance, 6) if known_distance else None,
+        'per_leg_emissions': _percentiles(emissions),
+        'per_km_emissions': _percentiles(per_km),
+        'rank_by': rank_by,
+        'top_corridors': _ranking(data['corridor_names'], *corridor, rank_by, limit),
+        'top_shipments': shipment_rank,
+    }
@@ -0,0 +1,248 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from decouple import config
+
+ARTIFACT_STORE_DIR = Path(config(
+    'ARTIFACT_STORE_DIR',
+    default=str(Path(__file__).resolve().parent.parent / 'var' / 'artifacts')
+))
+# Total size of stored artifact bodies before the least recently used are evicted
+ARTIFACT_STORE_MAX_BYTES = config('ARTIFACT_STORE_MAX_BYTES', default=512 * 1024 * 1024, cast=int)
+# Seconds a stored download is reused without asking the connector (0 always revalidates)
+ARTIFACT_STORE_FRESH = config('ARTIFACT_STORE_FRESH', default=0, cast=int)
+CHUNK_SIZE = 64 * 1024
+RESULT_TOKEN_RE = re.compile(r'^[\w-]{16,64}$')
+
+logger = logging.getLogger(__name__)
+
+
+def _write_json(path, data):
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+        json.dump(data, handle, default=str)
+    os.replace(tmp_name, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.warning("Ignoring unreadable artifact index %s: %s", path, exc)
+        return None
+
+
+class ArtifactStore:
+    """
+    Content-addressed on-disk store for downloaded artifacts.
+
+    Bodies live under ``objects/`` named by their SHA-256, with a small
+    ``.json`` sidecar for content type and encoding. ``urls/`` maps an
+    artifact URL (hashed) to the body it last returned plus its validators
+    (ETag/Last-Modified) so a repeat download can be skipped or made
+    conditional. The file mtime of a body is its last access time; the
+    least recently used bodies are removed once the store outgrows
+    ``max_bytes``. ``results/`` holds short-lived JSON documents (finished
+    consumptions) handed from one request to the next. Every write is an atomic rename, so several workers can
+    share one directory.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._evict_lock = threading.Lock()
+
+    def _object_path(self, key):
+        return self.root / 'objects' / key[:2] / key
+
+    def _url_path(self, url):
+        return self.root / 'urls' / (hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def put_chunks(self, chunks, content_type='', encoding=None):
+        """
+        Stream ``chunks`` to disk while hashing them. Identical content is
+        stored once. Returns the SHA-256 key.
+        """
+        tmp_dir = self.root / 'tmp'
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    digest.update(chunk)
+                    handle.write(chunk)
+                    size += len(chunk)
+            key = digest.hexdigest()
+            path = self._object_path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path.exists():
+                os.unlink(tmp_name)
+                os.utime(path)
+            else:
+                os.replace(tmp_name, path)
+            _write_json(path.with_suffix('.json'), {
+                'content_type': content_type or '',
+                'encoding': encoding or 'utf-8',
+                'size': size,
+            })
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+        self.evict(keep=key)
+        return key
+
+    def put(self, content, content_type='', encoding=None):
+        return self.put_chunks([bytes(content)], content_type, encoding)
+
+    def metadata(self, key):
+        path = self._object_path(key)
+        if not path.exists():
+            return None
+        return _read_json(path.with_suffix('.json')) or {}
+
+    def open(self, key):
+        """
+        Memory-map a stored body read-only (marking it recently used).
+        Returns None when the key is not stored. Empty bodies come back as
+        ``b''`` since a zero-length file cannot be mapped.
+        """
+        path = self._object_path(key)
+        try:
+            with open(path, 'rb') as handle:
+                os.utime(path)
+                if os.fstat(handle.fileno()).st_size == 0:
+                    return b''
+                return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+    def remember_url(self, url, key, etag=None, last_modified=None):
+        path = self._url_path(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_json(path, {
+            'url': url,
+            'key': key,
+            'etag': etag,
+            'last_modified': last_modified,
+            'stored_at': time.time(),
+        })
+
+    def lookup_url(self, url):
+        """
+        Index entry for an artifact URL whose body is still stored, or None.
+        """
+        entry = _read_json(self._url_path(url))
+        if not entry or not self._object_path(entry.get('key', '')).exists():
+            return None
+        return entry
+
+    def touch_url(self, url):
+        entry = _read_json(self._url_path(url))
+        if entry:
+            entry['stored_at'] = time.time()
+            _write_json(self._url_path(url), entry)
+
+    def _result_path(self, token):
+        return self.root / 'results' / f'{token}.json'
+
+    def put_result(self, token, data, max_age):
+        """
+        Store a JSON document under ``token`` for any worker sharing the
+        store. Documents older than ``max_age`` seconds are removed.
+        """
+        path = self._result_path(token)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_json(path, data)
+        self.prune_results(max_age)
+
+    def get_result(self, token, max_age):
+        """The document stored under ``token`` within ``max_age`` seconds, or None."""
+        if not RESULT_TOKEN_RE.match(token or ''):
+            return None
+        path = self._result_path(token)
+        try:
+            if time.time() - path.stat().st_mtime > max_age:
+                return None
+        except FileNotFoundError:
+            return None
+        return _read_json(path)
+
+    def prune_results(self, max_age):
+        cutoff = time.time() - max_age
+        try:
+            items = list(os.scandir(self.root / 'results'))
+        except FileNotFoundError:
+            return
+        for item in items:
+            try:
+                if item.name.endswith('.json') and item.stat().st_mtime < cutoff:
+                    os.unlink(item.path)
+            except FileNotFoundError:
+                pass
+
+    def evict(self, keep=None):
+        """
+        Delete least recently used bodies until the store fits max_bytes.
+        """
+        objects = self.root / 'objects'
+        if self.max_bytes <= 0 or not objects.exists():
+            return 0
+        with self._evict_lock:
+            entries = []
+            total = 0
+            for bucket in os.scandir(objects):
+                if not bucket.is_dir():
+                    continue
+                for item in os.scandir(bucket.path):
+                    if item.name.endswith('.json') or not item.is_file():
+                        continue
+                    stat = item.stat()
+                    total += stat.st_size
+                    entries.append((stat.st_mtime, stat.st_size, item.path, item.name))
+            if total <= self.max_bytes:
+                return 0
+
+            removed = 0
+            for _, size, path, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if name == keep:
+                    continue
+                for target in (path, path + '.json'):
+                    try:
+                        os.unlink(target)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+                removed += 1
+            logger.info("Evicted %s artifacts from %s", removed, objects)
+            return removed
+
+
+_store = None
+_store_guard = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_guard:
+        if _store is None:
+            _store = ArtifactStore(ARTIFACT_STORE_DIR, ARTIFACT_STORE_MAX_BYTES)
+        return _store
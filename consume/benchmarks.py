@@ -0,0 +1,325 @@
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template import Engine, engines
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+
+from . import jsonlib
+from .offers import OfferRecord
+from .routes import build_route_map
+
+
+def _synthetic_resources(count, connectors=5, catalogs=4):
+    """
+    Yield (connector_id, catalog_title, catalog_description, resource) tuples
+    shaped like the connector's ``_embedded.resources`` entries.
+    """
+    for idx in range(count):
+        conn = idx % connectors
+        cat = idx % catalogs
+        # Build fresh strings per offer, as JSON decoding does for each response
+        yield (
+            ''.join(['https://connector-', str(conn), '.example.org/']),
+            ''.join(['Catalog ', str(conn), '-', str(cat)]),
+            ''.join(['Shared description of catalog ', str(conn), '-', str(cat), ' ' * 40]),
+            {
+                'title': f'Offer {idx}',
+                'description': f'Description of offer {idx}',
+                'keywords': [''.join(['kw', str(idx % 7)]), ''.join(['energy', '-data'])],
+                'publisher': ''.join(['https://publisher-', str(conn), '.example.org']),
+                '_links': {
+                    'self': {
+                        'href': f'https://connector-{conn}.example.org/api/offers/{idx:08d}-0000-0000-0000-000000000000'
+                    }
+                },
+            },
+        )
+
+
+def _legacy_offer_dict(connector_id, title, desc, off):
+    self_href = off.get('_links', {}).get('self', {}).get('href', '')
+    return {
+        'connector_id': connector_id,
+        'catalog_title': title,
+        'catalog_description': desc,
+        'offer_title': off.get('title'),
+        'offer_description': off.get('description'),
+        'offer_keywords': off.get('keywords', []),
+        'offer_publisher': off.get('publisher'),
+        'offer_url': self_href,
+        'offer_id': self_href.rstrip('/').split('/')[-1],
+    }
+
+
+def _measure(build, count, connectors, catalogs):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        # Only the offers survive; decoded catalog payloads are dropped as in the view
+        offers = [
+            build(c, t, d, off)
+            for c, t, d, off in _synthetic_resources(count, connectors, catalogs)
+        ]
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    del offers
+    return retained
+
+
+def offer_footprint(count=10000, connectors=5, catalogs=4):
+    """
+    Compare the retained per-offer memory of the legacy offer dicts with
+    OfferRecord. Returns a dict of byte counts.
+    """
+    legacy_bytes = _measure(_legacy_offer_dict, count, connectors, catalogs)
+    record_bytes = _measure(OfferRecord.from_resource, count, connectors, catalogs)
+
+    return {
+        'offers': count,
+        'legacy_total_bytes': legacy_bytes,
+        'record_total_bytes': record_bytes,
+        'legacy_per_offer': legacy_bytes / count if count else 0,
+        'record_per_offer': record_bytes / count if count else 0,
+    }
+
+
+SHIPMENT_PLACES = (
+    'Kokkola', 'Seinäjoki', 'Pori', 'Naantali Hub',
+    'Kapellskär Port', 'Nykvarn', 'Unmapped Depot',
+)
+
+
+def synthetic_shipment(legs, seed=1):
+    """
+    Build a unified transport-chain document with ``legs`` transport legs
+    spread over three chains, plus a matching emissions breakdown.
+    """
+    rnd = random.Random(seed)
+    transport_legs = []
+    breakdown = []
+    for idx in range(legs):
+        start, end = rnd.choice(SHIPMENT_PLACES), rnd.choice(SHIPMENT_PLACES)
+        transport_legs.append({
+            'sequence': idx + 1,
+            'legName': f'Leg {idx}: {start} to {end}',
+            'distance': rnd.randint(10, 300),
+        })
+        breakdown.append({
+            'activity': f'Transport leg {idx}: {start} to {end}',
+            'co2e': round(rnd.random() * 100, 3),
+        })
+    breakdown.append({'activity': 'Warehouse storage', 'co2e': 3.2})
+
+    chains = {
+        f'chain-{k}': {'transportChainElement': {'transportLegs': transport_legs[k::3]}}
+        for k in range(3)
+    }
+    return {
+        'unified': {
+            'transportChains': chains,
+            'shipment': {
+                'shipmentFootprint': {
+                    'shipmentId': f'SHIP-{seed}',
+                    'scope': {'parcelId': f'PARCEL-{seed}'},
+                    'totalEmissions': {'co2e': round(sum(b['co2e'] for b in breakdown), 3), 'unit': 'kg'},
+                    'standardsUsed': 'GLEC v3',
+                    'calculationTimestamp': '2025-11-10T11:45:10.065+0000',
+                    'breakdown': breakdown,
+                }
+            }
+        }
+    }
+
+
+def route_map_timing(sizes=(10, 100, 1000, 5000), repeat=5):
+    """
+    Time build_route_map on synthetic shipments of growing size. Returns a
+    list of dicts with the mean wall time in milliseconds per size.
+    """
+    results = []
+    for size in sizes:
+        consumption = {'response_preview': {'body': json.dumps(synthetic_shipment(size))}}
+        build_route_map(consumption)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            route_map = build_route_map(consumption)
+        elapsed = (time.perf_counter() - started) / repeat
+        results.append({
+            'legs': size,
+            'mapped_legs': len((route_map or {}).get('segments') or []),
+            'ms': elapsed * 1000,
+        })
+    return results
+
+
+def _synthetic_description(resources=200):
+    """IDS description (JSON-LD) of a catalog with ``resources`` offers."""
+    return {
+        '@context': {'ids': 'https://w3id.org/idsa/core/', 'idsc': 'https://w3id.org/idsa/code/'},
+        '@type': 'ids:ResourceCatalog',
+        '@id': 'https://connector.example.org/api/catalogs/0000',
+        'ids:offeredResource': [
+            {
+                '@type': 'ids:Resource',
+                '@id': f'https://connector.example.org/api/offers/{idx:08d}',
+                'ids:title': [{'@value': f'Offer {idx}', '@type': 'http://www.w3.org/2001/XMLSchema#string'}],
+                'ids:description': [{'@value': f'Description of offer {idx} ' * 4}],
+                'ids:keyword': [{'@value': f'kw{k}'} for k in range(5)],
+                'ids:contractOffer': [{
+                    '@type': 'ids:ContractOffer',
+                    '@id': f'https://connector.example.org/api/contracts/{idx:08d}',
+                    'ids:permission': [{
+                        '@type': 'ids:Permission',
+                        'ids:action': [{'@id': 'https://w3id.org/idsa/code/USE'}],
+                        'ids:target': f'https://connector.example.org/api/artifacts/{idx:08d}',
+                    }],
+                }],
+                'ids:representation': [{
+                    '@type': 'ids:Representation',
+                    'ids:instance': [{
+                        '@type': 'ids:Artifact',
+                        '@id': f'https://connector.example.org/api/artifacts/{idx:08d}',
+                        'ids:byteSize': 1024 + idx,
+                    }],
+                }],
+            }
+            for idx in range(resources)
+        ],
+    }
+
+
+def _synthetic_broker_graph(connectors=500):
+    return {
+        '@graph': [
+            {
+                '@id': f'https://broker.example.org/connectors/{idx}',
+                '@type': 'ids:BaseConnector',
+                'title': f'Connector {idx}',
+                'maintainer': f'https://participant-{idx % 20}.example.org',
+                'accessURL': f'https://connector-{idx}.example.org/api/ids/data',
+                'resourceCatalog': [f'https://connector-{idx}.example.org/api/catalogs/{c}' for c in range(3)],
+            }
+            for idx in range(connectors)
+        ]
+    }
+
+
+def json_codec_timing(repeat=20):
+    """
+    Decode (from bytes, as received) and encode representative payloads
+    with the stdlib json module and, when installed, orjson. Returns one
+    dict per payload with mean milliseconds per operation and backend.
+    """
+    payloads = {
+        'ids-description': _synthetic_description(),
+        'broker-graph': _synthetic_broker_graph(),
+        'shipment': synthetic_shipment(2000),
+    }
+    codecs = {
+        'stdlib': (
+            lambda raw: json.loads(raw.decode('utf-8')),
+            lambda value: json.dumps(value).encode('utf-8'),
+        ),
+    }
+    if jsonlib.orjson is not None:
+        codecs['orjson'] = (jsonlib.orjson.loads, jsonlib.orjson.dumps)
+
+    def mean_ms(func, arg):
+        func(arg)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func(arg)
+        return (time.perf_counter() - started) / repeat * 1000
+
+    results = []
+    for name, value in payloads.items():
+        raw = json.dumps(value).encode('utf-8')
+        row = {'payload': name, 'bytes': len(raw)}
+        for codec, (decode, encode) in codecs.items():
+            row[f'{codec}_decode_ms'] = mean_ms(decode, raw)
+            row[f'{codec}_encode_ms'] = mean_ms(encode, value)
+        results.append(row)
+    return results
+
+
+def _synthetic_listing(count):
+    offers = []
+    for idx, (conn, title, desc, resource) in enumerate(_synthetic_resources(count)):
+        resource['modificationDate'] = f'2024-01-01T00:00:{idx % 60:02d}.000+0000'
+        offers.append(OfferRecord.from_resource(conn, title, desc, resource))
+    return offers
+
+
+def template_render_timing(count=2000, repeat=5):
+    """
+    Render the offer listing for ``count`` synthetic offers without fragment
+    caching, with a cold fragment cache, fully warm, and right after a
+    listing refresh (new grid, cached cards). Also times loading the listing
+    template with and without the cached loader. Returns one dict per
+    scenario with the mean wall time in milliseconds.
+    """
+    offers = _synthetic_listing(count)
+    request = RequestFactory().get('/consume/')
+    listing = {'offers': offers, 'fetched_at': None, 'stale': False, 'source': 'live', 'error': None}
+    version = iter(range(1, 1_000_000))
+
+    def render(listing_version):
+        return render_to_string('consume/connector_offers.html', {
+            'offers': offers,
+            'listing': listing,
+            'listing_version': listing_version,
+        }, request=request)
+
+    def mean_ms(func, setup=None):
+        func()
+        total = 0.0
+        for _ in range(repeat):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            func()
+            total += time.perf_counter() - started
+        return total / repeat * 1000
+
+    fragment_cache = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'consume-template-benchmark',
+        # Room for every card plus the grid
+        'OPTIONS': {'MAX_ENTRIES': count * 2 + 10},
+    }
+    results = []
+    with override_settings(CACHES=dict(settings.CACHES, template_fragments={
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    })):
+        results.append({'scenario': 'no-fragment-cache', 'ms': mean_ms(lambda: render(0))})
+    with override_settings(CACHES=dict(settings.CACHES, template_fragments=fragment_cache)):
+        fragments = caches['template_fragments']
+        results.append({'scenario': 'fragments-cold', 'ms': mean_ms(lambda: render(0), fragments.clear)})
+        results.append({'scenario': 'fragments-warm', 'ms': mean_ms(lambda: render(0))})
+        results.append({'scenario': 'fragments-refreshed', 'ms': mean_ms(lambda: render(next(version)))})
+        fragments.clear()
+
+    loaders = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    configured = engines['django'].engine
+    for scenario, engine_loaders in (
+        ('load-uncached', loaders),
+        ('load-cached', [('django.template.loaders.cached.Loader', loaders)]),
+    ):
+        engine = Engine(dirs=configured.dirs, loaders=engine_loaders, libraries=configured.libraries)
+        results.append({
+            'scenario': scenario,
+            'ms': mean_ms(lambda: engine.get_template('consume/connector_offers.html')),
+        })
+    return results
@@ -0,0 +1,278 @@
+"""
+End-to-end benchmark suite run against the local stub dataspace.
+
+Scenarios exercise the real views and pipeline (offer listing, offer page
+with and without consumption, runner()) over HTTP to the stubs, plus route
+mapping on synthetic shipments. Each scenario reports p50/p95 latency,
+throughput and peak traced memory; results can be stored as a baseline
+and later runs compared against it.
+"""
+import gc
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.core.cache import cache, caches
+from django.test import RequestFactory
+
+from . import artifacts, broker, catalog, connector, extras, snapshot, views
+from .benchmarks import synthetic_shipment
+from .routes import build_route_map_from_stream
+from .stubs import StubConfig, start_stub_dataspace
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent.parent / 'var' / 'benchmark_baseline.json'
+ROUTE_MAP_SIZES = (100, 1000, 5000)
+# p50/p95 slower than the baseline by more than this fraction is a regression
+DEFAULT_TOLERANCE = 0.10
+
+
+def percentile(samples, fraction):
+    """Linearly interpolated percentile of a non-empty list of numbers."""
+    ordered = sorted(samples)
+    pos = (len(ordered) - 1) * fraction
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def measure(name, func, iterations=20, warmup=2, setup=None):
+    """
+    Run ``func`` ``iterations`` times and summarize the wall times. ``setup``
+    runs untimed before every call (e.g. to drop a cache). Peak memory comes
+    from one extra traced call, so tracing does not skew the timings.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        func()
+
+    samples = []
+    for _ in range(iterations):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    busy = sum(samples)
+    return {
+        'name': name,
+        'iterations': iterations,
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p95_ms': percentile(samples, 0.95) * 1000,
+        'mean_ms': busy / iterations * 1000,
+        'throughput_rps': iterations / busy if busy else 0.0,
+        'peak_kib': peak / 1024,
+    }
+
+
+@contextmanager
+def stub_environment(stub_config):
+    """
+    Start a stub dataspace and point the consume modules at it, with the
+    snapshot and artifact store moved to a scratch directory. Everything
+    is restored on exit.
+    """
+    server = start_stub_dataspace(stub_config)
+    env = server.env()
+    connector_base = env['CONNECTOR_BASE'] + '/'
+    patches = [
+        (broker, 'CONNECTOR_BASE', env['CONNECTOR_BASE']),
+        (broker, 'BROKERS', [env['BROKER']]),
+        (connector, 'CONNECTOR_BASE', connector_base),
+        (connector, 'BASE_URL', connector_base),
+        (views, 'BASE_URL', connector_base),
+        (extras, 'PROVIDER_UI_BASES', [env['PROVIDER_UI_BASE']]),
+    ]
+    with tempfile.TemporaryDirectory(prefix='consume-bench-') as scratch:
+        patches += [
+            (snapshot, 'SNAPSHOT_PATH', Path(scratch) / 'offer_snapshot.json'),
+            (artifacts, '_store', artifacts.ArtifactStore(
+                Path(scratch) / 'artifacts', artifacts.ARTIFACT_STORE_MAX_BYTES
+            )),
+        ]
+        saved = [(module, name, getattr(module, name)) for module, name, _ in patches]
+        saved_listing = dict(catalog._listing)
+        for module, name, value in patches:
+            setattr(module, name, value)
+        reset_caches()
+        # Upstream chatter would dominate the output of a benchmark run
+        quiet = logging.getLogger('consume')
+        level = quiet.level
+        quiet.setLevel(logging.WARNING)
+        try:
+            yield server
+        finally:
+            quiet.setLevel(level)
+            for module, name, value in saved:
+                setattr(module, name, value)
+            reset_caches()
+            catalog._listing.update(saved_listing)
+            server.stop()
+
+
+def reset_caches():
+    """Drop every in-process and shared cache a scenario could hit."""
+    broker._broker_cache.clear()
+    extras._extras_cache.clear()
+    catalog._listing.update({
+        'offers': None,
+        'fetched_at': None,
+        'loaded_at': None,
+        'source': None,
+        'error': None,
+        'failed_at': None,
+        'snapshot_mtime': None,
+    })
+    cache.clear()
+    caches['template_fragments'].clear()
+
+
+def _cold_listing():
+    reset_caches()
+    # Keep the cold path on the live crawl rather than the scratch snapshot
+    snapshot.SNAPSHOT_PATH.unlink(missing_ok=True)
+
+
+def _expect_ok(response):
+    if response.status_code != 200:
+        raise RuntimeError(f"Benchmark request failed with status {response.status_code}")
+    if b'<title>Error</title>' in response.content:
+        raise RuntimeError("Benchmark request rendered the error page")
+    return response
+
+
+STUB_SCENARIOS = ('listing-cold', 'listing-warm', 'offer-view', 'offer-consume', 'runner')
+
+
+def _stub_scenarios(stub_config, iterations, wanted):
+    """Time the views and runner() against a fresh stub dataspace."""
+    factory = RequestFactory()
+    results = []
+    with stub_environment(stub_config) as server:
+        offer_id = server.sample_offer_id()
+        offer_url = f"{connector.BASE_URL}api/offers/{offer_id}"
+        # Fail fast (with the pipeline's error) instead of timing error pages
+        connector.runner(offer_url)
+
+        def listing():
+            _expect_ok(views.dataspace_connectors(factory.get('/consume/')))
+
+        def offer_page():
+            _expect_ok(views.selected_offer(factory.get(f'/consume/selected_offer/{offer_id}/'), offer_id))
+
+        def offer_consume():
+            request = factory.get(f'/consume/selected_offer/{offer_id}/', {'consume': '1'})
+            _expect_ok(views.selected_offer(request, offer_id))
+
+        scenarios = {
+            'listing-cold': (listing, _cold_listing),
+            'listing-warm': (listing, None),
+            'offer-view': (offer_page, extras._extras_cache.clear),
+            'offer-consume': (offer_consume, extras._extras_cache.clear),
+            'runner': (lambda: connector.runner(offer_url), None),
+        }
+        for name in STUB_SCENARIOS:
+            func, setup = scenarios[name]
+            if wanted(name):
+                results.append(measure(name, func, iterations=iterations, setup=setup))
+    return results
+
+
+def run_suite(stub_config=None, iterations=20, route_sizes=ROUTE_MAP_SIZES, only=None):
+    """
+    Run the scenarios against a fresh stub dataspace and return a result
+    document (environment, parameters and one entry per scenario).
+    ``only`` restricts the run to scenarios whose name starts with one of
+    the given prefixes.
+    """
+    stub_config = stub_config or StubConfig()
+    results = []
+
+    def wanted(name):
+        return not only or any(name.startswith(prefix) for prefix in only)
+
+    if any(wanted(name) for name in STUB_SCENARIOS):
+        results.extend(_stub_scenarios(stub_config, iterations, wanted))
+
+    for size in route_sizes:
+        name = f'route-map-{size}'
+        if not wanted(name):
+            continue
+        document = json.dumps(synthetic_shipment(size)).encode('utf-8')
+        results.append(measure(name, lambda: build_route_map_from_stream(document), iterations=iterations))
+
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'parameters': {
+            'connectors': stub_config.connectors,
+            'catalogs': stub_config.catalogs,
+            'offers': stub_config.offers,
+            'latency': stub_config.latency,
+            'artifact_kind': stub_config.artifact_kind,
+            'artifact_legs': stub_config.artifact_legs,
+            'iterations': iterations,
+        },
+        'scenarios': results,
+    }
+
+
+def load_baseline(path=None):
+    path = Path(path or DEFAULT_BASELINE)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def save_baseline(result, path=None):
+    path = Path(path or DEFAULT_BASELINE)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(result, indent=2), encoding='utf-8')
+    return path
+
+
+def compare(result, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare each scenario's p50/p95 with the baseline. Returns a list of
+    dicts with the ratios (current / baseline) and a ``regression`` flag
+    when either exceeds 1 + tolerance. Scenarios missing from the baseline
+    are reported with ratios of None.
+    """
+    previous = {row['name']: row for row in (baseline or {}).get('scenarios', [])}
+    rows = []
+    for row in result['scenarios']:
+        before = previous.get(row['name'])
+        if not before:
+            rows.append({'name': row['name'], 'p50_ratio': None, 'p95_ratio': None, 'regression': False})
+            continue
+        p50_ratio = row['p50_ms'] / before['p50_ms'] if before['p50_ms'] else None
+        p95_ratio = row['p95_ms'] / before['p95_ms'] if before['p95_ms'] else None
+        rows.append({
+            'name': row['name'],
+            'p50_ratio': p50_ratio,
+            'p95_ratio': p95_ratio,
+            'regression': any(r is not None and r > 1 + tolerance for r in (p50_ratio, p95_ratio)),
+        })
+    return rows
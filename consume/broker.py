@@ -1,31 +1,191 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
+
 import requests
 import urllib3
-from decouple import config
+from decouple import config, Csv
+
+from core.deadline import propagate, upstream_timeout
+from core.tracing import client_span, inject
+
+from .cache import SharedCache
+from .jsonlib import response_json
+from .payloads import payload
 urllib3.disable_warnings()       # only for dev!
 
 CONNECTOR_BASE = config('CONNECTOR_BASE')
-BROKER = config('BROKER')
+BROKER = config('BROKER', default='')
+# Comma-separated broker recipients queried in parallel; defaults to BROKER
+BROKERS = [
+    b.strip()
+    for b in (config('BROKERS', default='', cast=Csv()) or [BROKER])
+    if b.strip()
+]
 AUTHORIZATION = config('AUTHORIZATION')
+# Seconds a successful broker response is reused before querying again
+BROKER_CACHE_TTL = config('BROKER_CACHE_TTL', default=60, cast=int)
+# Connectors per SPARQL page (0 sends one unpaged query) and, once the first
+# page came back full, pages fetched at once
+BROKER_PAGE_SIZE = config('BROKER_PAGE_SIZE', default=500, cast=int)
+BROKER_PAGE_PARALLEL = config('BROKER_PAGE_PARALLEL', default=4, cast=int)
+BROKER_MAX_PAGES = config('BROKER_MAX_PAGES', default=200, cast=int)
+# Filters applied to the listing's broker query
+DEFAULT_FILTERS = {
+    'maintainer': config('BROKER_FILTER_MAINTAINER', default='').strip() or None,
+    'title_contains': config('BROKER_FILTER_TITLE', default='').strip() or None,
+    'require_catalog': config('BROKER_REQUIRE_CATALOG', default=False, cast=bool),
+}
 
-def get_all_connectors():
-    """
-    Fetch all connectors from the broker.
+_broker_cache = SharedCache('broker', BROKER_CACHE_TTL)
 
-    Returns:
-        dict: JSON-LD graph of connectors
-    """
-    url = f"{CONNECTOR_BASE}/api/ids/query"
-    headers = {
-        'Authorization': AUTHORIZATION,
-        'Content-Type': 'application/octet-stream',
-    }
+logger = logging.getLogger(__name__)
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+# Connector attributes that may legitimately carry several values
+_MULTI_VALUED = ('sameAs', 'resourceCatalog', 'accessURL')
 
-    sparql = """\
+SPARQL_PREFIXES = """\
 PREFIX ids:   <https://w3id.org/idsa/core/>
 PREFIX idsc:  <https://w3id.org/idsa/code/>
 PREFIX owl:   <http://www.w3.org/2002/07/owl#>
 PREFIX jsonld:<http://www.w3.org/ns/json-ld>
+"""
+
+
+def canonical_url(url):
+    """
+    Normalize a connector/endpoint URL so that spellings of the same
+    location compare equal: lower-case scheme and host, default port and
+    trailing slashes dropped.
+    """
+    if not url:
+        return url
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    netloc = host
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parts.port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+    return urlunsplit((scheme, netloc, parts.path.rstrip('/'), parts.query, ''))
+
+
+def graph_nodes(raw):
+    """
+    Normalize a broker response into a list of connector dicts.
+    """
+    if isinstance(raw, dict) and '@graph' in raw:
+        return raw['@graph'] or []
+    if isinstance(raw, dict):
+        return [raw] if raw.get('@id') else []
+    if isinstance(raw, list):
+        return raw
+    return []
+
+
+def _as_list(value):
+    if not value:
+        return []
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def merge_graphs(responses):
+    """
+    Merge JSON-LD connector graphs from several brokers or result pages.
+    Connectors that resolve to the same canonical @id are combined into one
+    node whose multi-valued attributes (sameAs endpoints, catalogs, access
+    URLs) are the union of every response.
+    """
+    merged = {}
+    context = None
+    for raw in responses:
+        if context is None and isinstance(raw, dict):
+            context = raw.get('@context')
+        for node in graph_nodes(raw):
+            key = canonical_url(node.get('@id')) or id(node)
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = dict(node)
+                continue
+            for attr in _MULTI_VALUED:
+                values = _as_list(existing.get(attr))
+                for value in _as_list(node.get(attr)):
+                    if value not in values:
+                        values.append(value)
+                if values:
+                    existing[attr] = values
+            for attr, value in node.items():
+                existing.setdefault(attr, value)
+
+    graph = {'@graph': list(merged.values())}
+    if context is not None:
+        graph['@context'] = context
+    return graph
+
+
+def _sparql_string(value):
+    escaped = (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('"', '\\"')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+    return f'"{escaped}"'
+
+
+def build_connector_query(limit=None, offset=None, maintainer=None,
+                          title_contains=None, require_catalog=False):
+    """
+    Build the SPARQL CONSTRUCT query for connectors.
+
+    Filters are evaluated by the broker: ``maintainer`` matches the
+    maintainer IRI exactly, ``title_contains`` is a case-insensitive
+    substring match on the title and ``require_catalog`` drops connectors
+    without a resource catalog. ``limit``/``offset`` page through the
+    solutions in a stable order.
+    """
+    catalog_clause = """\
+  ?connector ids:resourceCatalog  ?brokerCatalog.
+  ?brokerCatalog owl:sameAs       ?connectorCatalog."""
+    if not require_catalog:
+        catalog_clause = "  OPTIONAL {\n  " + catalog_clause.replace("\n", "\n  ") + "\n  }"
+
+    filters = []
+    if maintainer:
+        filters.append(f"  FILTER(STR(?maintainer) = {_sparql_string(maintainer)})")
+    if title_contains:
+        filters.append(
+            f"  FILTER(CONTAINS(LCASE(STR(?title)), LCASE({_sparql_string(title_contains)})))"
+        )
+
+    pattern = """\
+  ?connector ids:title              ?title.
+  ?connector ids:description        ?description.
+  ?connector ids:hasDefaultEndpoint ?endpoint.
+  ?endpoint  ids:accessURL          ?accessURL.
+  ?connector ids:maintainer         ?maintainer.
+""" + catalog_clause + """
+  OPTIONAL { ?connector owl:sameAs  ?same. }
+""" + "".join(f + "\n" for f in filters)
+
+    page = ""
+    if limit:
+        # Page over connectors rather than solutions, so a page holds at most
+        # ``limit`` connectors whatever their number of endpoints or catalogs
+        page = (
+            "  {\n  SELECT DISTINCT ?connector WHERE {\n" + pattern + "  }\n"
+            f"  ORDER BY ?connector\n  LIMIT {int(limit)}\n"
+            + (f"  OFFSET {int(offset)}\n" if offset else "")
+            + "  }\n"
+        )
 
+    return SPARQL_PREFIXES + """
 CONSTRUCT {
   ?connector ids:title           ?title.
   ?connector ids:description     ?description.
@@ -35,36 +195,157 @@ CONSTRUCT {
   ?connector ids:resourceCatalog ?connectorCatalog.
 }
 WHERE {
-  ?connector ids:title              ?title.
-  ?connector ids:description        ?description.
-  ?connector ids:hasDefaultEndpoint ?endpoint.
-  ?endpoint  ids:accessURL          ?accessURL.
-  ?connector ids:maintainer         ?maintainer.
-  OPTIONAL {
-    ?connector ids:resourceCatalog  ?brokerCatalog.
-    ?brokerCatalog owl:sameAs       ?connectorCatalog.
-  }
-  OPTIONAL { ?connector owl:sameAs  ?same. }
-}
-"""
+""" + page + pattern + "}\n"
+
+
+def get_all_connectors(refresh=False, filters=None):
+    """
+    Fetch all connectors from every configured broker in parallel and merge
+    the graphs. Successful responses are cached for BROKER_CACHE_TTL
+    seconds; pass refresh=True to bypass the cache. ``filters`` overrides
+    the configured DEFAULT_FILTERS (see build_connector_query).
+
+    Brokers that fail are logged and skipped; an error dict is only returned
+    when every broker failed or none is configured.
+
+    Returns:
+        dict: JSON-LD graph of connectors
+    """
+    if not BROKERS:
+        logger.error("No broker configured; set BROKER or BROKERS")
+        return {'error': 'No broker configured. Set BROKER or BROKERS.'}
+
+    filters = dict(DEFAULT_FILTERS if filters is None else filters)
+    cache_key = (tuple(BROKERS), tuple(sorted(filters.items())))
+    if not refresh:
+        cached = _broker_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    def query(broker):
+        return _query_connectors(broker, filters)
+
+    if len(BROKERS) == 1:
+        results = [query(BROKERS[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=len(BROKERS)) as pool:
+            results = list(pool.map(propagate(query), BROKERS))
+
+    successes = []
+    for broker, result in zip(BROKERS, results):
+        if is_error(result):
+            logger.warning("Skipping broker %s: %s", broker, result['error'])
+        else:
+            successes.append(result)
+    if not successes:
+        return results[0]
+
+    merged = results[0] if len(BROKERS) == 1 else merge_graphs(successes)
+    _broker_cache.set(cache_key, merged)
+    return merged
+
+
+def is_error(result):
+    """True for the error dicts returned instead of a connector graph."""
+    return isinstance(result, dict) and bool(result.get('error'))
+
+
+def _query_connectors(broker, filters):
+    """
+    Query one broker. With BROKER_PAGE_SIZE set, the CONSTRUCT query is sent
+    in LIMIT/OFFSET pages until a page comes back with fewer than
+    BROKER_PAGE_SIZE connectors. The first page is sent alone, so a small
+    broker answers a single query; only after a full page are the next ones
+    fetched BROKER_PAGE_PARALLEL at a time. Each page is decoded on its own
+    and merged into the graph.
+    """
+    if BROKER_PAGE_SIZE <= 0:
+        return _post_query(broker, build_connector_query(**filters))
+
+    def fetch(offset):
+        return _post_query(
+            broker,
+            build_connector_query(limit=BROKER_PAGE_SIZE, offset=offset, **filters)
+        )
+
+    pages = []
+    offset = 0
+    with ThreadPoolExecutor(max_workers=max(1, BROKER_PAGE_PARALLEL)) as pool:
+        while True:
+            width = 1 if not pages else min(max(1, BROKER_PAGE_PARALLEL), BROKER_MAX_PAGES - len(pages))
+            if width <= 0:
+                logger.warning("Broker %s paging stopped at BROKER_MAX_PAGES=%s", broker, BROKER_MAX_PAGES)
+                break
+            offsets = [offset + i * BROKER_PAGE_SIZE for i in range(width)]
+            offset = offsets[-1] + BROKER_PAGE_SIZE
+            if width == 1:
+                batch = [fetch(offsets[0])]
+            else:
+                batch = list(pool.map(propagate(fetch), offsets))
+            last_page = False
+            for result in batch:
+                if is_error(result):
+                    return result
+                count = len(graph_nodes(result))
+                if count:
+                    pages.append(result)
+                if count < BROKER_PAGE_SIZE:
+                    last_page = True
+                    break
+            if last_page:
+                break
+
+    if len(pages) == 1:
+        return pages[0]
+    return merge_graphs(pages)
+
+
+def probe(recipient):
+    """
+    Send the smallest connector query (LIMIT 1) to one broker, e.g. for a
+    health check. Returns ok, status_code and latency_ms.
+    """
+    started = time.perf_counter()
+    result = _post_query(recipient, build_connector_query(limit=1))
+    return {
+        'recipient': recipient,
+        'ok': not is_error(result),
+        'status_code': result.get('status_code') if isinstance(result, dict) else None,
+        'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def _post_query(broker, sparql):
+    url = f"{CONNECTOR_BASE}/api/ids/query"
+    headers = {
+        'Authorization': AUTHORIZATION,
+        'Content-Type': 'application/octet-stream',
+    }
 
     try:
         # Log request details (redact Authorization for safety)
         redacted_headers = headers.copy()
         if 'Authorization' in redacted_headers:
             redacted_headers['Authorization'] = '<REDACTED>'
-        print('Posting to broker', url)
-        print('Params:', {'recipient': BROKER})
-        print('Headers:', redacted_headers)
-
-        resp = requests.post(
+        logger.debug(
+            "Posting to broker %s params=%s headers=%s query=%s",
             url,
-            headers=headers,
-            params={'recipient': BROKER},
-            data=sparql.encode('utf-8'),
-            verify=False
+            {'recipient': broker},
+            redacted_headers,
+            payload(sparql)
         )
 
+        with client_span('broker.query', url, 'POST', **{'ids.recipient': broker}) as traced:
+            resp = requests.post(
+                url,
+                headers=inject(headers),
+                params={'recipient': broker},
+                data=sparql.encode('utf-8'),
+                verify=False,
+                timeout=upstream_timeout()
+            )
+            traced.set('http.status_code', resp.status_code)
+
         # If the server returns a non-2xx, capture body for debugging
         try:
             resp.raise_for_status()
@@ -78,24 +359,27 @@ WHERE {
             # For 417 NOT_FOUND responses with empty broker index we treat it as "no connectors yet"
             if resp.status_code == 417:
                 try:
-                    payload = resp.json()
+                    error_payload = response_json(resp)
                 except ValueError:
-                    payload = {}
+                    error_payload = {}
 
                 reason = (
-                    payload.get('details', {})
-                           .get('reason', {})
-                           .get('@id')
+                    error_payload.get('details', {})
+                                 .get('reason', {})
+                                 .get('@id')
                 )
-                message = payload.get('message', '')
+                message = error_payload.get('message', '')
                 if reason == 'https://w3id.org/idsa/code/NOT_FOUND':
-                    print("Broker index reported empty. Returning no connectors.")
+                    logger.info("Broker index reported empty. Returning no connectors.")
                     return {'@graph': []}
 
-                print(f"Broker returned 417 response we could not map: {payload}")
+                logger.warning("Broker returned 417 response we could not map: %s", payload(error_payload))
             else:
-                print(f"Broker returned error status {resp.status_code}")
-                print("Response body:", body_text)
+                logger.warning(
+                    "Broker returned error status %s body=%s",
+                    resp.status_code,
+                    payload(body_text)
+                )
 
             return {
                 'error': 'Broker returned error',
@@ -104,14 +388,14 @@ WHERE {
             }
 
         # Success path
-        print("Response status code:", resp.status_code)
-        print("Full response:", resp.text)
+        logger.info("Broker response status=%s bytes=%s", resp.status_code, len(resp.content))
+        logger.debug("Broker response body=%s", payload(resp))
         try:
-            return resp.json()
+            return response_json(resp)
         except ValueError:
             # Not JSON — return raw text for inspection
             return {'@graph': [], 'raw': resp.text}
 
     except requests.exceptions.RequestException as e:
-        print("Error fetching connectors:", e)
+        logger.warning("Error fetching connectors: %s", e)
         return {"error": f"Failed to fetch connectors from the broker: {e}"}
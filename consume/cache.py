@@ -0,0 +1,42 @@
+import hashlib
+
+from django.core.cache import cache
+
+
+class SharedCache:
+    """
+    Namespaced view of Django's default cache with a per-namespace expiry.
+
+    Used for upstream lookups (broker graph, offer extras) that are
+    expensive to repeat on every request. With a shared cache backend
+    (DJANGO_CACHE_BACKEND) a refresh by one worker, or by
+    ``manage.py refresh_caches``, is visible to every worker.
+    """
+
+    def __init__(self, namespace, ttl):
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def _generation(self):
+        # clear() moves to a new generation; older entries simply expire
+        return cache.get(f'consume:{self.namespace}:generation', 0)
+
+    def _key(self, key):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return f'consume:{self.namespace}:{self._generation()}:{digest}'
+
+    def get(self, key, default=None):
+        return cache.get(self._key(key), default)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        cache.set(self._key(key), value, ttl)
+
+    def delete(self, key):
+        cache.delete(self._key(key))
+
+    def clear(self):
+        generation_key = f'consume:{self.namespace}:generation'
+        cache.set(generation_key, self._generation() + 1, None)
@@ -0,0 +1,312 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+import requests
+from decouple import config
+
+from core.deadline import upstream_timeout
+from core.tracing import client_span, inject
+
+from . import snapshot
+from .broker import canonical_url, get_all_connectors, graph_nodes, is_error
+from .jsonlib import response_json
+from .offers import OfferRecord
+
+AUTHORIZATION = config('AUTHORIZATION')
+PAGE_SIZE     = 30
+AUTH_HEADERS  = {'Authorization': AUTHORIZATION}
+
+# Seconds a crawled listing is served before the next request re-crawls
+OFFER_LISTING_TTL = config('OFFER_LISTING_TTL', default=300, cast=int)
+# Seconds to keep serving the stale listing after a failed crawl before retrying
+OFFER_LISTING_RETRY = config('OFFER_LISTING_RETRY', default=30, cast=int)
+
+logger = logging.getLogger(__name__)
+
+_listing_lock = threading.Lock()
+_listing = {
+    'offers': None,
+    'fetched_at': None,
+    'loaded_at': None,
+    'source': None,
+    'error': None,
+    'failed_at': None,
+    'snapshot_mtime': None,
+}
+_background_refresh = None
+
+
+def fetch_all_pages(base_url, embedded_key):
+    """
+    Fetches every page of an IDS‐style paged endpoint,
+    accumulating all entries under `_embedded[embedded_key]`.
+    """
+    items = []
+    page = 0
+
+    while True:
+        url = f"{base_url.rstrip('/')}?page={page}&size={PAGE_SIZE}"
+        with client_span('catalog.page', url, **{'hal.embedded': embedded_key}) as traced:
+            resp = requests.get(
+                url,
+                headers=inject(AUTH_HEADERS),
+                verify=False,
+                timeout=upstream_timeout()
+            )
+            traced.set('http.status_code', resp.status_code)
+        resp.raise_for_status()
+        payload = response_json(resp)
+
+        batch = payload.get('_embedded', {}).get(embedded_key, [])
+        items.extend(batch)
+
+        pg = payload.get('page', {})
+        # stop when we've reached the last page
+        if pg.get('number', 0) >= pg.get('totalPages', 1) - 1:
+            break
+
+        page += 1
+
+    return items
+
+
+def crawl_offers(refresh=False):
+    """
+    Crawl every offer from every connector:
+    - Normalize broker response into a list of connectors
+    - For each connector, iterate all catalogs
+    - For each catalog, iterate all offers
+
+    Returns (offers, error) where offers is a list of OfferRecord and error
+    is set when the broker or a connector could not be reached. refresh=True
+    bypasses the cached broker response.
+    """
+    logger.info("Fetching all connectors...")
+    raw = get_all_connectors(refresh=refresh)
+    if is_error(raw):
+        return [], raw['error']
+
+    try:
+        return _crawl_connectors(raw), None
+    except (requests.exceptions.RequestException, ValueError) as exc:
+        logger.warning("Catalog crawl failed: %s", exc)
+        return [], f"Failed to fetch connector catalogs: {exc}"
+
+
+def _connector_endpoints(connectors):
+    """
+    Yield (connector_id, endpoint) pairs with every endpoint canonicalized
+    and listed once, so a catalog reachable through several connectors or
+    sameAs aliases is only crawled once per refresh.
+    """
+    seen = set()
+    for conn in connectors:
+        connector_id = conn.get('@id')
+
+        # Gather all sameAs endpoints (or fallback)
+        endpoints = conn.get('sameAs') or []
+        if isinstance(endpoints, str):
+            endpoints = [endpoints]
+        if not endpoints and connector_id:
+            endpoints = [connector_id]
+
+        for ep in endpoints:
+            ep = canonical_url(ep)
+            if ep.endswith('/api/catalogs'):
+                ep = ep[:-len('/api/catalogs')]
+            if not ep or ep in seen:
+                continue
+            seen.add(ep)
+            yield connector_id, ep
+
+
+def _crawl_connectors(raw):
+    offers = []
+    seen_catalogs = set()
+
+    for connector_id, ep in _connector_endpoints(graph_nodes(raw)):
+        catalogs_url = f"{ep}/api/catalogs"
+        catalogs = fetch_all_pages(catalogs_url, 'catalogs')
+
+        for cat in catalogs:
+            title = cat.get('title')
+            desc  = cat.get('description')
+
+            # Build and possibly rewrite the offers URL
+            offers_href = (
+                cat.get('_links', {})
+                   .get('offers', {})
+                   .get('href', '')
+                   .split('{')[0]
+            )
+            if '/connector/' not in offers_href and '/api/catalogs/' in offers_href:
+                offers_href = offers_href.replace(
+                    '/api/catalogs/',
+                    '/connector/api/catalogs/'
+                )
+
+            catalog_key = canonical_url(offers_href)
+            if catalog_key in seen_catalogs:
+                continue
+            seen_catalogs.add(catalog_key)
+
+            resources = fetch_all_pages(offers_href, 'resources')
+            for off in resources:
+                offers.append(OfferRecord.from_resource(connector_id, title, desc, off))
+
+    return offers
+
+
+def refresh_listing(refresh=False):
+    """
+    Crawl the dataspace and, on success, replace the in-process listing and
+    persist it as the last known good snapshot. Returns True on success.
+    """
+    offers, error = crawl_offers(refresh=refresh)
+    with _listing_lock:
+        if error:
+            _listing['error'] = error
+            _listing['failed_at'] = time.monotonic()
+            return False
+        _listing.update({
+            'offers': offers,
+            'fetched_at': datetime.now(timezone.utc),
+            'loaded_at': time.monotonic(),
+            'source': 'live',
+            'error': None,
+        })
+    snapshot.save_offers(offers)
+    with _listing_lock:
+        # Our own snapshot is not news to this worker
+        _listing['snapshot_mtime'] = snapshot.modified_at()
+    return True
+
+
+def _safe_refresh():
+    try:
+        refresh_listing()
+    except Exception:
+        logger.exception("Background offer listing refresh failed")
+        with _listing_lock:
+            _listing['error'] = 'Background refresh failed'
+            _listing['failed_at'] = time.monotonic()
+
+
+def _refresh_running():
+    return _background_refresh is not None and _background_refresh.is_alive()
+
+
+def _refresh_in_background():
+    global _background_refresh
+    with _listing_lock:
+        if _refresh_running():
+            return
+        _background_refresh = threading.Thread(
+            target=_safe_refresh,
+            name='offer-listing-refresh',
+            daemon=True
+        )
+        _background_refresh.start()
+
+
+def _within(timestamp, seconds):
+    return timestamp is not None and time.monotonic() - timestamp < seconds
+
+
+def _load_snapshot(replace=False):
+    mtime = snapshot.modified_at()
+    offers, created_at = snapshot.load_offers()
+    if offers is None:
+        return False
+    with _listing_lock:
+        if _listing['offers'] is not None and not replace:
+            return True
+        current = _listing['fetched_at']
+        if replace and current and created_at and created_at <= current:
+            _listing['snapshot_mtime'] = mtime
+            return True
+        age = (datetime.now(timezone.utc) - created_at).total_seconds() if created_at else None
+        # A snapshot another worker has just written counts as fresh data
+        fresh = age is not None and age < OFFER_LISTING_TTL
+        _listing.update({
+            'offers': offers,
+            'fetched_at': created_at,
+            'loaded_at': time.monotonic() - age if fresh else None,
+            'source': 'snapshot',
+            'snapshot_mtime': mtime,
+        })
+        if fresh:
+            _listing['error'] = None
+    logger.info("Loaded offer listing from snapshot (%s offers)", len(offers))
+    return True
+
+
+def reload_snapshot():
+    """
+    Replace the in-process listing with the snapshot on disk if the snapshot
+    is newer, e.g. after another worker completed a scheduled refresh.
+    """
+    return _load_snapshot(replace=True)
+
+
+def _snapshot_changed():
+    # One stat() per request; the file is only parsed when it was replaced
+    mtime = snapshot.modified_at()
+    return mtime is not None and mtime != _listing['snapshot_mtime']
+
+
+def _listing_view(stale):
+    with _listing_lock:
+        view = dict(_listing)
+    view.pop('loaded_at', None)
+    view.pop('failed_at', None)
+    view.pop('snapshot_mtime', None)
+    view['stale'] = stale
+    return view
+
+
+def listing_status():
+    """Whether this worker holds a listing, where it came from and its size."""
+    with _listing_lock:
+        offers = _listing['offers']
+        return {
+            'loaded': offers is not None,
+            'source': _listing['source'],
+            'offers': len(offers) if offers is not None else 0,
+        }
+
+
+def get_listing():
+    """
+    Return the offer listing as a dict with ``offers`` (list of OfferRecord,
+    or None when nothing is available), ``fetched_at``, ``source``
+    ('live' or 'snapshot'), ``stale`` and the last refresh ``error``.
+
+    A cold worker serves the persisted snapshot immediately and re-crawls in
+    the background. A snapshot written since by another worker or by
+    ``manage.py refresh_caches`` replaces the listing before it is checked
+    for expiry. An expired listing is re-crawled inline; if that fails the
+    previous listing (or the snapshot) is served marked as stale.
+    """
+    if _listing['offers'] is not None and _snapshot_changed():
+        reload_snapshot()
+
+    if _listing['offers'] is None and _load_snapshot():
+        if not _within(_listing['loaded_at'], OFFER_LISTING_TTL):
+            _refresh_in_background()
+            return _listing_view(stale=True)
+
+    if _listing['offers'] is not None:
+        if _within(_listing['loaded_at'], OFFER_LISTING_TTL):
+            return _listing_view(stale=False)
+        if _refresh_running() or _within(_listing['failed_at'], OFFER_LISTING_RETRY):
+            return _listing_view(stale=True)
+
+    if refresh_listing():
+        return _listing_view(stale=False)
+
+    if _listing['offers'] is None:
+        _load_snapshot()
+    return _listing_view(stale=True)
@@ -0,0 +1,54 @@
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """
+    Strong ETag over ``parts``. TEMPLATE_FRAGMENT_VERSION is mixed in so a
+    deploy that changes the pages invalidates what browsers hold.
+    """
+    digest = hashlib.sha256()
+    for part in (getattr(settings, 'TEMPLATE_FRAGMENT_VERSION', 1),) + parts:
+        digest.update(part if isinstance(part, bytes) else repr(part).encode('utf-8'))
+        digest.update(b'\0')
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def viewer(request):
+    """The parts of the signed-in profile that the page header shows."""
+    profile = getattr(request, 'auth_profile', None)
+    if not isinstance(profile, dict):
+        return None
+    return tuple(profile.get(key) for key in ('id', 'name', 'email', 'username'))
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    A 304 response when the request's If-None-Match / If-Modified-Since
+    still match, else None. Call before doing the work the validators
+    stand for.
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is None:
+        return None
+    return with_validators(response, etag, last_modified)
+
+
+def with_validators(response, etag, last_modified=None):
+    """
+    Add the ETag and Last-Modified headers. Pages are per user, so shared
+    caches must not store them and browsers revalidate on every use.
+    """
+    response.headers['ETag'] = etag
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Cookie',))
+    return response
@@ -1,10 +1,23 @@
 import json
 import re
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 
 import requests
 from decouple import config
 
+from core.deadline import check as check_deadline, propagate, upstream_timeout
+from core.tracing import client_span, inject, span
+
+from .analytics import record_consumption
+from .artifacts import ARTIFACT_STORE_FRESH, CHUNK_SIZE, get_store
+from .jsonlib import dumps, response_json
+from .preview import build_preview, open_artifact
+from .payloads import payload
+from .tabular import cached_tabular_preview
+
 # Read environment variables
 CONNECTOR_BASE = config('CONNECTOR_BASE', default='').strip()
 # Ensure CONNECTOR_BASE ends with exactly one slash
@@ -23,6 +36,13 @@ AUTH_HEADER = {
     'Authorization': config('AUTHORIZATION', default='').strip()
 }
 
+# Artifacts consumed per offer at most (one contract covers all of them)
+CONSUME_MAX_ARTIFACTS = config('CONSUME_MAX_ARTIFACTS', default=20, cast=int)
+# Entries per page when listing an agreement's artifacts
+CONSUME_PAGE_SIZE = config('CONSUME_PAGE_SIZE', default=50, cast=int)
+# Artifacts downloaded at once
+CONSUME_DOWNLOAD_PARALLEL = config('CONSUME_DOWNLOAD_PARALLEL', default=4, cast=int)
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,98 +52,128 @@ def get_selected_offer(offer_id):
     """
     url = f'{CONNECTOR_BASE}api/offers/{offer_id}'
     logger.info("Fetching offer %s at %s", offer_id, url)
-    response = requests.get(url, headers=AUTH_HEADER, verify=False)
+    with client_span('connector.offer', url) as traced:
+        response = requests.get(url, headers=inject(AUTH_HEADER), verify=False, timeout=upstream_timeout())
+        traced.set('http.status_code', response.status_code)
     logger.debug("Offer response status=%s headers=%s", response.status_code, response.headers)
     response.raise_for_status()
-    offer = response.json()
-    logger.debug("Offer payload: %s", json.dumps(offer, indent=2))
+    offer = response_json(response)
+    logger.debug("Offer payload: %s", payload(offer))
     return offer
 def get_policy(offer_id):
     url = f'{CONNECTOR_BASE}api/offers/{offer_id}/policy'
-    response = requests.get(url, headers=AUTH_HEADER, verify=False)
+    with client_span('connector.policy', url) as traced:
+        response = requests.get(url, headers=inject(AUTH_HEADER), verify=False, timeout=upstream_timeout())
+        traced.set('http.status_code', response.status_code)
     if response.status_code == 200:
         try:
-            return response.json()
+            return response_json(response)
         except ValueError:
             return response.text
     return None
 
 
-def get_selected_offers_catalog_url(offer):
-    """
-    Given an offer JSON (with _links.catalogs.href), fetch the first catalog URL properly.
-    This will rewrite broker URLs to the connector endpoint.
-    """
-    from urllib.parse import urlparse
-
-    catalog_templated = offer["_links"]["catalogs"]["href"]
-    # Strip off the templating {?page,size}
-    templated_stripped = re.sub(r"\{.*\}", "", catalog_templated).strip()
+def _under_connector(href):
+    """Rebuild an href returned by the connector (or broker) under CONNECTOR_BASE."""
+    return CONNECTOR_BASE + urlparse(href).path.lstrip('/')
 
-    # Parse the path portion of the broker URL and rebuild under CONNECTOR_BASE
-    parsed = urlparse(templated_stripped)
-    path = parsed.path  # e.g. '/api/offers/{id}/catalogs'
-    base_catalog = CONNECTOR_BASE + path.lstrip('/')
 
-    # Ensure trailing slash
-    if not base_catalog.endswith("/"):
-        base_catalog = base_catalog + "/"
+def _listing_url(templated_href):
+    # Strip off the templating {?page,size}, rebase and ensure a trailing slash
+    url = _under_connector(re.sub(r"\{.*\}", "", templated_href).strip())
+    return url if url.endswith('/') else url + '/'
 
-    # Add pagination parameters to get JSON
-    catalog_url = f"{base_catalog}?page=0&size=10"
 
+def _get_page(url, span_name, label):
     headers = {
         'Accept': 'application/json',
         'Authorization': AUTH_HEADER['Authorization']
     }
-    logger.info("Fetching catalog listing from %s", catalog_url)
-    response = requests.get(catalog_url, headers=headers, verify=False)
+    logger.info("Fetching %s listing from %s", label, url)
+    with client_span(span_name, url) as traced:
+        response = requests.get(url, headers=inject(headers), verify=False, timeout=upstream_timeout())
+        traced.set('http.status_code', response.status_code)
     logger.debug(
-        "Catalog list response status=%s headers=%s",
+        "%s response status=%s headers=%s",
+        label.capitalize(),
         response.status_code,
         response.headers
     )
     if response.status_code != 200:
         logger.error(
-            "Catalog request failed url=%s status=%s body=%s",
-            catalog_url,
+            "%s request failed url=%s status=%s body=%s",
+            label.capitalize(),
+            url,
             response.status_code,
-            response.text
+            payload(response)
         )
-        raise ValueError(f"Failed to fetch catalog URL: {catalog_url}, Status Code: {response.status_code}")
+        raise ValueError(f"Failed to fetch {label} URL: {url}, Status Code: {response.status_code}")
 
     try:
-        data = response.json()
-    except json.JSONDecodeError as e:
+        return response_json(response)
+    except json.JSONDecodeError:
         logger.exception(
-            "Invalid JSON decoding catalog response url=%s body=%s",
-            catalog_url,
-            response.text
+            "Invalid JSON decoding %s response url=%s body=%s",
+            label,
+            url,
+            payload(response)
         )
-        raise ValueError(f"Invalid JSON response from {catalog_url}")
+        raise ValueError(f"Invalid JSON response from {url}")
 
+
+def _iter_pages(listing_url, embedded_key, span_name, label, size):
+    """
+    Yield the entries under ``_embedded[embedded_key]`` of every page of a
+    paged connector listing. Pages are fetched only as far as consumed.
+    """
+    page = 0
+    while True:
+        data = _get_page(f"{listing_url}?page={page}&size={size}", span_name, label)
+        items = (data.get('_embedded') or {}).get(embedded_key) or []
+        yield from items
+        info = data.get('page') or {}
+        # stop when we've reached the last page
+        if not items or info.get('number', page) >= info.get('totalPages', 1) - 1:
+            return
+        page += 1
+
+
+def get_selected_offers_catalog_url(offer):
+    """
+    Given an offer JSON (with _links.catalogs.href), return the URL of the
+    first catalog listing it, rewritten under CONNECTOR_BASE.
+    """
+    catalogs = _iter_pages(
+        _listing_url(offer["_links"]["catalogs"]["href"]),
+        'catalogs', 'connector.offer_catalogs', 'catalog', 10
+    )
     try:
-        first_catalog = data["_embedded"]["catalogs"][0]
+        first_catalog = next(catalogs)
         catalog_self_href = first_catalog["_links"]["self"]["href"]
-    except (KeyError, IndexError) as e:
-        logger.error(
-            "Catalog response missing expected structure. payload=%s error=%s",
-            json.dumps(data, indent=2),
-            e
-        )
+    except (StopIteration, KeyError, TypeError) as e:
+        logger.error("Catalog listing of offer has no usable catalog entry: %r", e)
         raise ValueError("Could not find any catalog entries in the response.")
+    finally:
+        catalogs.close()
+
+    return _under_connector(catalog_self_href)
 
-    # Rewrite the returned href under CONNECTOR_BASE as well
-    parsed_self = urlparse(catalog_self_href)
-    path_self = parsed_self.path  # e.g. '/api/catalogs/{catalogId}'
-    rewritten_self = CONNECTOR_BASE + path_self.lstrip('/')
 
-    return rewritten_self
+def _offered_resource(description, offer):
+    # A catalog's description lists all of its offers; pick the selected one
+    resources = description['ids:offeredResource']
+    offer_id = offer.get('_links', {}).get('self', {}).get('href', '').rstrip('/').split('/')[-1]
+    for resource in resources:
+        if offer_id and str(resource.get('@id', '')).rstrip('/').split('/')[-1] == offer_id:
+            return resource
+    return resources[0]
 
 
 def description_request(offer, catalog_url):
     """
-    Perform an IDS description request for the given catalog_url.
+    Perform an IDS description request for the given catalog_url. Returns
+    the offer's permitted action and the artifact ids of every instance of
+    every representation (at most CONSUME_MAX_ARTIFACTS).
     """
     logger.info("Issuing description request for catalog %s", catalog_url)
     url = f'{CONNECTOR_BASE}api/ids/description'
@@ -133,38 +183,55 @@ def description_request(offer, catalog_url):
         'elementId': catalog_url
     }
 
-    response = requests.post(url, headers=headers, params=params, verify=False)
+    with client_span('connector.description', url, 'POST', **{'ids.element': catalog_url}) as traced:
+        response = requests.post(
+            url, headers=inject(headers), params=params, verify=False, timeout=upstream_timeout()
+        )
+        traced.set('http.status_code', response.status_code)
     logger.debug(
         "Description response status=%s headers=%s body=%s",
         response.status_code,
         response.headers,
-        response.text
+        payload(response)
     )
     response.raise_for_status()
-    response_json = response.json()
-    logger.debug("Description JSON: %s", json.dumps(response_json, indent=2))
+    description = response_json(response)
+    logger.debug("Description JSON: %s", payload(description))
 
     try:
-        offered_resource = response_json['ids:offeredResource'][0]
+        offered_resource = _offered_resource(description, offer)
         contract_offer = offered_resource['ids:contractOffer'][0]
         permission = contract_offer['ids:permission'][0]
         action = permission['ids:action'][0]['@id']
-        representation = offered_resource['ids:representation'][0]
-        artifact = representation['ids:instance'][0]['@id']
-    except (KeyError, IndexError, TypeError) as exc:
+        artifacts = []
+        for representation in offered_resource['ids:representation']:
+            for instance in representation.get('ids:instance') or []:
+                if instance['@id'] not in artifacts:
+                    artifacts.append(instance['@id'])
+    except (KeyError, IndexError, TypeError, AttributeError) as exc:
         logger.error(
             "Description payload missing expected IDS fields: %s error=%s",
-            json.dumps(response_json, indent=2),
+            payload(description),
             exc
         )
         raise ValueError("Description response missing IDS contract metadata") from exc
-
-    return action, artifact
+    if not artifacts:
+        raise ValueError("Description response lists no artifact for the offer")
+
+    if len(artifacts) > CONSUME_MAX_ARTIFACTS:
+        logger.warning(
+            "Offer lists %s artifacts; consuming the first %s (CONSUME_MAX_ARTIFACTS)",
+            len(artifacts),
+            CONSUME_MAX_ARTIFACTS
+        )
+        artifacts = artifacts[:CONSUME_MAX_ARTIFACTS]
+    return action, artifacts
 
 
-def contract_request(action, artifact, offer_id):
+def contract_request(action, artifacts, offer_id):
     """
-    Perform an IDS contract request given an action, artifact, and offer_id.
+    Perform one IDS contract request covering all ``artifacts`` of the
+    offer with the given action. Returns the agreement's artifacts URL.
     """
     url = f'{CONNECTOR_BASE}api/ids/contract'
     headers = {
@@ -174,10 +241,10 @@ def contract_request(action, artifact, offer_id):
     params = {
         'recipient': f'{CONNECTOR_BASE}api/ids/data',
         'resourceIds': f"{CONNECTOR_BASE}api/offers/{offer_id}",
-        'artifactIds': artifact,
+        'artifactIds': list(artifacts),
         'download': 'false'
     }
-    payload = [
+    permissions = [
         {
             "@type": "ids:Permission",
             "ids:action": [
@@ -187,31 +254,35 @@ def contract_request(action, artifact, offer_id):
             ],
             "ids:target": artifact
         }
+        for artifact in artifacts
     ]
 
     logger.info(
-        "Submitting contract request offer=%s artifact=%s action=%s",
+        "Submitting contract request offer=%s artifacts=%s action=%s",
         offer_id,
-        artifact,
+        len(artifacts),
         action
     )
-    response = requests.post(
-        url,
-        headers=headers,
-        params=params,
-        data=json.dumps(payload),
-        verify=False
-    )
+    with client_span('connector.contract', url, 'POST', **{'ids.artifacts': len(artifacts)}) as traced:
+        response = requests.post(
+            url,
+            headers=inject(headers),
+            params=params,
+            data=dumps(permissions),
+            verify=False,
+            timeout=upstream_timeout()
+        )
+        traced.set('http.status_code', response.status_code)
     logger.debug(
         "Contract response status=%s headers=%s body=%s",
         response.status_code,
         response.headers,
-        response.text
+        payload(response)
     )
     response.raise_for_status()
-    response_json = response.json()
-    logger.debug("Contract response JSON: %s", json.dumps(response_json, indent=2))
-    agreement_url_1 = response_json["_links"]["artifacts"]["href"]
+    contract = response_json(response)
+    logger.debug("Contract response JSON: %s", payload(contract))
+    agreement_url_1 = contract["_links"]["artifacts"]["href"]
     agreement_url = agreement_url_1.split('{')[0]
 
     # Ensure full prefix
@@ -223,166 +294,291 @@ def contract_request(action, artifact, offer_id):
     return agreement_url
 
 
-def get_agreement(agreement_url):
+def get_agreement_artifacts(agreement_url, limit=None):
     """
-    Retrieve the artifact URL from an agreement.
-    This adds pagination parameters and rewrites any broker paths under CONNECTOR_BASE.
+    Data URLs (rewritten under CONNECTOR_BASE) of the artifacts covered by
+    an agreement, across all pages of its artifact listing, at most
+    ``limit`` (default CONSUME_MAX_ARTIFACTS).
     """
-    from urllib.parse import urlparse
-
-    # Strip off any templated parts (e.g., {?page,size}), then parse path
-    parsed_input = urlparse(agreement_url)
-    path_input = parsed_input.path  # e.g. '/api/agreements/{id}/artifacts'
-    base_artifacts = CONNECTOR_BASE + path_input.lstrip('/')
+    limit = limit or CONSUME_MAX_ARTIFACTS
+    artifacts = _iter_pages(
+        _listing_url(agreement_url),
+        'artifacts', 'connector.agreement_artifacts', 'artifacts', CONSUME_PAGE_SIZE
+    )
+    data_urls = []
+    try:
+        for artifact in artifacts:
+            data_urls.append(_under_connector(artifact["_links"]["data"]["href"]))
+            if len(data_urls) >= limit:
+                break
+    except (KeyError, TypeError) as e:
+        logger.error("Artifact entry missing its data link: %r", e)
+        raise ValueError("Could not find any artifact entries in the response.")
+    finally:
+        artifacts.close()
 
-    # Ensure trailing slash
-    if not base_artifacts.endswith("/"):
-        base_artifacts = base_artifacts + "/"
+    if not data_urls:
+        raise ValueError("Could not find any artifact entries in the response.")
+    return data_urls
 
-    # Add pagination to get JSON
-    artifacts_url = f"{base_artifacts}?page=0&size=10"
 
-    headers = {
-        'Accept': 'application/json',
-        'Authorization': AUTH_HEADER['Authorization']
-    }
-    logger.info("Fetching artifacts from %s", artifacts_url)
-    response = requests.get(artifacts_url, headers=headers, verify=False)
+def get_data(artifact_url, headers=None, stream=False):
+    """
+    Fetch the actual data at the artifact URL.
+    """
+    request_headers = AUTH_HEADER.copy()
+    request_headers.update(headers or {})
+
+    with client_span('connector.artifact_data', artifact_url, conditional=bool(headers)) as traced:
+        response = requests.get(
+            artifact_url,
+            headers=inject(request_headers),
+            verify=False,
+            stream=stream,
+            timeout=upstream_timeout()
+        )
+        traced.set('http.status_code', response.status_code)
+    logger.info("Fetching artifact payload from %s", artifact_url)
     logger.debug(
-        "Artifacts response status=%s headers=%s",
+        "Artifact data response status=%s headers=%s",
         response.status_code,
         response.headers
     )
-    if response.status_code != 200:
-        logger.error(
-            "Artifacts request failed url=%s status=%s body=%s",
-            artifacts_url,
-            response.status_code,
-            response.text
-        )
-        raise ValueError(f"Failed to fetch artifacts URL: {artifacts_url}, Status Code: {response.status_code}")
+    return response
 
-    try:
-        data = response.json()
-    except json.JSONDecodeError as e:
-        logger.exception(
-            "Invalid JSON decoding artifacts response url=%s body=%s",
-            artifacts_url,
-            response.text
-        )
-        raise ValueError(f"Invalid JSON response from {artifacts_url}")
 
-    try:
-        first_artifact = data["_embedded"]["artifacts"][0]
-        artifact_href = first_artifact["_links"]["data"]["href"]
-    except (KeyError, IndexError) as e:
-        logger.error(
-            "Artifacts response missing expected structure payload=%s error=%s",
-            json.dumps(data, indent=2),
-            e
-        )
-        raise ValueError("Could not find any artifact entries in the response.")
+def _within_budget(chunks):
+    # A slow download must not outlive the request budget
+    for chunk in chunks:
+        check_deadline()
+        yield chunk
 
-    # Rewrite the returned href under CONNECTOR_BASE if needed
-    parsed_art = urlparse(artifact_href)
-    path_art = parsed_art.path  # e.g. '/api/artifacts/{artifactId}/data'
-    rewritten_art = CONNECTOR_BASE + path_art.lstrip('/')
 
-    return rewritten_art
+def fetch_artifact(artifact_url):
+    """
+    Download an artifact into the local artifact store, reusing the stored
+    copy when the connector confirms it is unchanged (ETag/Last-Modified)
+    or when it was fetched less than ARTIFACT_STORE_FRESH seconds ago.
 
+    Returns a dict with the store key, status_code, headers, content_type,
+    encoding and source ('stored', 'revalidated' or 'downloaded').
+    """
+    store = get_store()
+    entry = store.lookup_url(artifact_url)
+
+    def from_entry(source, status_code=200, headers=None):
+        meta = store.metadata(entry['key']) or {}
+        return {
+            'key': entry['key'],
+            'status_code': status_code,
+            'headers': headers or {},
+            'content_type': meta.get('content_type', ''),
+            'encoding': meta.get('encoding'),
+            'source': source,
+        }
 
-def get_data(artifact_url):
+    if entry and ARTIFACT_STORE_FRESH and time.time() - entry['stored_at'] < ARTIFACT_STORE_FRESH:
+        logger.info("Reusing stored artifact %s for %s", entry['key'], artifact_url)
+        return from_entry('stored')
+
+    conditional = {}
+    if entry and entry.get('etag'):
+        conditional['If-None-Match'] = entry['etag']
+    if entry and entry.get('last_modified'):
+        conditional['If-Modified-Since'] = entry['last_modified']
+
+    response = get_data(artifact_url, headers=conditional, stream=True)
+    try:
+        response_headers = dict(response.headers.items())
+        if response.status_code == 304 and entry:
+            logger.info("Artifact %s unchanged, using stored copy %s", artifact_url, entry['key'])
+            store.touch_url(artifact_url)
+            return from_entry('revalidated', headers=response_headers)
+
+        content_type = response.headers.get('Content-Type', '')
+        encoding = response.encoding
+        key = store.put_chunks(_within_budget(response.iter_content(CHUNK_SIZE)), content_type, encoding)
+        if response.ok:
+            store.remember_url(
+                artifact_url,
+                key,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+    finally:
+        response.close()
+
+    return {
+        'key': key,
+        'status_code': response.status_code,
+        'headers': response_headers,
+        'content_type': content_type,
+        'encoding': encoding,
+        'source': 'downloaded',
+    }
+
+
+def fetch_artifacts(artifact_urls):
     """
-    Fetch the actual data at the artifact URL.
+    fetch_artifact() for every URL, CONSUME_DOWNLOAD_PARALLEL at a time.
+    Results are in the order of ``artifact_urls``.
     """
-    headers = AUTH_HEADER.copy()
-
-    response = requests.get(artifact_url, headers=headers, verify=False)
-    logger.info("Fetching artifact payload from %s", artifact_url)
-    logger.debug(
-        "Artifact data response status=%s headers=%s body_preview=%s",
-        response.status_code,
-        response.headers,
-        response.text[:500]
-    )
-    return response
+    if len(artifact_urls) == 1:
+        return [fetch_artifact(artifact_urls[0])]
+    workers = max(1, min(CONSUME_DOWNLOAD_PARALLEL, len(artifact_urls)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(propagate(fetch_artifact), artifact_urls))
 
 
-def runner(offer_url):
+def runner(offer_url, on_step=None):
     """
     Given a full offer_url, run the end-to-end sequence to get the artifact URL.
+    ``on_step`` is called with each step dict as soon as the step completes.
     """
     offer_id = offer_url.split('/')[-1]
     logger.info("Starting consumption pipeline for offer %s", offer_id)
     steps = []
+    try:
+        with span('consume.runner', offer_id=offer_id):
+            return _run_pipeline(offer_id, steps, on_step)
+    except requests.exceptions.Timeout as exc:
+        # Report how far the pipeline got so the page can show a partial result
+        completed = ', '.join(step['label'] for step in steps) or 'none'
+        logger.warning("Consumption of offer %s timed out after: %s", offer_id, completed)
+        raise type(exc)(f"{exc}. Completed steps: {completed}.") from exc
+
+
+def _complete_step(steps, on_step, started, label, description):
+    """Record a finished step with the time since ``started``; returns the current time."""
+    now = time.perf_counter()
+    step = {
+        'label': label,
+        'description': description,
+        'status': 'completed',
+        'duration_ms': round((now - started) * 1000, 1),
+    }
+    steps.append(step)
+    if on_step:
+        on_step(step)
+    return now
+
+
+def _count(items, noun):
+    return f"{len(items)} {noun}{'' if len(items) == 1 else 's'}"
 
+
+def _run_pipeline(offer_id, steps, on_step=None):
+    started = time.perf_counter()
     # Fetch the offer details
     offer = get_selected_offer(offer_id)
-    logger.debug("Offer object: %s", json.dumps(offer, indent=2))
-    steps.append({
-        'label': 'Offer discovery',
-        'description': f"Retrieved offer metadata from {CONNECTOR_BASE}api/offers/{offer_id}",
-        'status': 'completed'
-    })
+    logger.debug("Offer object: %s", payload(offer))
+    started = _complete_step(
+        steps, on_step, started, 'Offer discovery',
+        f"Retrieved offer metadata from {CONNECTOR_BASE}api/offers/{offer_id}"
+    )
 
     # Get the catalog URL associated with the offer
     catalog_url = get_selected_offers_catalog_url(offer)
     logger.info("Resolved catalog URL %s", catalog_url)
-    steps.append({
-        'label': 'Catalog lookup',
-        'description': f"Resolved catalog for offer: {catalog_url}",
-        'status': 'completed'
-    })
+    started = _complete_step(
+        steps, on_step, started, 'Catalog lookup',
+        f"Resolved catalog for offer: {catalog_url}"
+    )
 
     # Perform the description request
-    action, artifact = description_request(offer, catalog_url)
-    logger.info("Description request yielded action=%s artifact=%s", action, artifact)
-    steps.append({
-        'label': 'Description request',
-        'description': f"IDS description returned action {action} and artifact {artifact}",
-        'status': 'completed'
-    })
-
-    # Perform the contract request
-    agreement_url = contract_request(action, artifact, offer_id)
+    action, artifact_ids = description_request(offer, catalog_url)
+    logger.info("Description request yielded action=%s artifacts=%s", action, artifact_ids)
+    started = _complete_step(
+        steps, on_step, started, 'Description request',
+        f"IDS description returned action {action} and {_count(artifact_ids, 'artifact')}: "
+        + ', '.join(artifact_ids)
+    )
+
+    # One contract request covers every artifact
+    agreement_url = contract_request(action, artifact_ids, offer_id)
     logger.info("Received agreement URL %s", agreement_url)
-    steps.append({
-        'label': 'Contract negotiation',
-        'description': f"Established contract and received agreement URL {agreement_url}",
-        'status': 'completed'
-    })
-
-    # Get the artifact URL
-    artifact_url = get_agreement(agreement_url)
-    logger.info("Resolved artifact URL %s", artifact_url)
-    steps.append({
-        'label': 'Artifact agreement',
-        'description': f"Resolved artifact endpoint {artifact_url}",
-        'status': 'completed'
-    })
-
-    # Optionally fetch the data (if needed)
-    response = get_data(artifact_url)
-    steps.append({
-        'label': 'Artifact retrieval',
-        'description': f"Fetched artifact data (status {response.status_code})",
-        'status': 'completed'
-    })
-
-    curl_cmd = f'curl -k -H "Authorization: {AUTH_HEADER.get("Authorization", "")}" "{artifact_url}"'
-
-    response_headers = {
-        k: v for k, v in response.headers.items()
+    started = _complete_step(
+        steps, on_step, started, 'Contract negotiation',
+        f"Established contract and received agreement URL {agreement_url}"
+    )
+
+    # Get the data URLs of all artifacts under the agreement
+    artifact_urls = get_agreement_artifacts(agreement_url)
+    logger.info("Resolved artifact URLs %s", artifact_urls)
+    started = _complete_step(
+        steps, on_step, started, 'Artifact agreement',
+        f"Resolved {_count(artifact_urls, 'artifact endpoint')}: " + ', '.join(artifact_urls)
+    )
+
+    # Fetch the data into the artifact store (skipped when the stored copy is current)
+    fetched = fetch_artifacts(artifact_urls)
+    downloaded = [a for a in fetched if a['source'] == 'downloaded']
+    if len(fetched) == 1 and downloaded:
+        retrieval = f"Fetched artifact data (status {downloaded[0]['status_code']})"
+    elif len(fetched) == 1:
+        retrieval = "Artifact unchanged since the last download; reused the stored copy"
+    else:
+        retrieval = (
+            f"Fetched {len(fetched)} artifacts: {len(downloaded)} downloaded, "
+            f"{len(fetched) - len(downloaded)} unchanged and reused from the store"
+        )
+    _complete_step(steps, on_step, started, 'Artifact retrieval', retrieval)
+
+    # Shipments count once per artifact body, map opened or not
+    record_consumption(
+        offer_id,
+        agreement_url,
+        [(url, item['key']) for url, item in zip(artifact_urls, fetched)]
+    )
+
+    # Every artifact gets its own preview; the top-level fields mirror the
+    # first one for callers that only handle a single artifact
+    artifacts = [
+        _artifact_entry(url, item)
+        for url, item in zip(artifact_urls, fetched)
+    ]
+    first = artifacts[0]
+    return {
+        'artifact_url': first['artifact_url'],
+        'artifacts': artifacts,
+        'steps': steps,
+        'curl_command': first['curl_command'],
+        'response_preview': first['preview'],
     }
-    preview = response.text
+
+
+def _artifact_entry(artifact_url, artifact):
+    """
+    Summary, curl command and bounded preview of one fetched artifact; the
+    rest of the body is paged from the stored copy.
+    """
+    with open_artifact(artifact['key']) as stored:
+        preview = build_preview(
+            stored['content'] if stored else b'',
+            artifact['content_type'],
+            artifact['encoding'],
+            key=artifact['key']
+        )
+        table = cached_tabular_preview(
+            artifact['key'],
+            stored['content'],
+            artifact['content_type'],
+            artifact['encoding'] or 'utf-8'
+        ) if stored else None
 
     return {
         'artifact_url': artifact_url,
-        'steps': steps,
-        'curl_command': curl_cmd,
-        'response_preview': {
-            'status_code': response.status_code,
-            'headers': response_headers,
-            'body': preview
-        }
+        'key': artifact['key'],
+        'status_code': artifact['status_code'],
+        'content_type': artifact['content_type'],
+        'source': artifact['source'],
+        'curl_command': (
+            f'curl -k -H "Authorization: {AUTH_HEADER.get("Authorization", "")}" "{artifact_url}"'
+        ),
+        'preview': {
+            'status_code': artifact['status_code'],
+            'headers': artifact['headers'],
+            'table': table,
+            **preview
+        },
     }
@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def template_fragments(request):
+    """Expiry of ``{% cache %}`` fragments, rendered with using="template_fragments"."""
+    return {'fragment_ttl': getattr(settings, 'TEMPLATE_FRAGMENT_TTL', 3600)}
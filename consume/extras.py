@@ -0,0 +1,189 @@
+import logging
+
+import requests
+from decouple import config
+
+from core.deadline import upstream_timeout
+from core.tracing import client_span, inject
+
+from .cache import SharedCache
+from .jsonlib import response_json
+
+BASE_URL = config('BASE_URL')
+# Extras only change when the provider republishes, so they are cached per offer
+OFFER_EXTRAS_TTL = config('OFFER_EXTRAS_TTL', default=3600, cast=int)
+
+logger = logging.getLogger(__name__)
+
+_extras_cache = SharedCache('extras', OFFER_EXTRAS_TTL)
+
+
+def _derive_provider_ui_bases():
+    """
+    Build a prioritized list of Provider UI base URLs. If PROVIDER_UI_BASE is
+    explicitly configured, prefer it. Otherwise try BASE_URL (which usually
+    includes /connector) and the host root as a fallback.
+    """
+    configured = config('PROVIDER_UI_BASE', default='').strip()
+    bases = []
+
+    if configured:
+        bases.append(configured.rstrip('/'))
+    else:
+        trimmed = BASE_URL.rstrip('/') if BASE_URL else ''
+        if trimmed:
+            bases.append(trimmed.rstrip('/'))
+            suffix = '/connector'
+            if trimmed.endswith(suffix):
+                host_only = trimmed[:-len(suffix)]
+                if host_only:
+                    bases.append(host_only.rstrip('/'))
+
+    # Remove empties while preserving order
+    seen = set()
+    ordered = []
+    for base in bases:
+        if base and base not in seen:
+            ordered.append(base)
+            seen.add(base)
+    return ordered
+
+
+PROVIDER_UI_BASES = _derive_provider_ui_bases()
+
+PROVIDER_UI_AUTH = config('PROVIDER_UI_AUTHORIZATION', default='').strip()
+PROVIDER_UI_HEADERS = {}
+if PROVIDER_UI_AUTH:
+    PROVIDER_UI_HEADERS['Authorization'] = PROVIDER_UI_AUTH
+
+
+def _request_offer_extras(base_url, offer_id):
+    paths = [
+        f"{base_url.rstrip('/')}/api/offers/{offer_id}/extras/",
+        f"{base_url.rstrip('/')}/provide/api/offers/{offer_id}/extras/"
+    ]
+    errors = []
+
+    for extras_url in paths:
+        result = _perform_extras_request(extras_url, offer_id, base_url)
+        if result:
+            if result['status'] == 'error':
+                errors.append(result)
+                continue
+            return result
+
+    return errors[-1] if errors else {
+        'status': 'error',
+        'error': 'Provider extras request failed',
+    }
+
+
+def _perform_extras_request(extras_url, offer_id, base_url):
+    headers = PROVIDER_UI_HEADERS.copy()
+
+    try:
+        with client_span('provider_ui.extras', extras_url) as traced:
+            resp = requests.get(extras_url, headers=inject(headers), verify=False, timeout=upstream_timeout(10))
+            traced.set('http.status_code', resp.status_code)
+    except requests.RequestException as exc:
+        logger.warning("Offer extras request failed for %s (%s): %s", offer_id, extras_url, exc)
+        return {
+            'status': 'error',
+            'error': str(exc),
+            'url': extras_url,
+            'base_url': base_url
+        }
+
+    if resp.status_code == 404:
+        return {
+            'status': 'not_found',
+            'data_model': None,
+            'purpose_of_use': None,
+            'url': extras_url,
+            'base_url': base_url
+        }
+
+    if resp.status_code != 200:
+        logger.warning(
+            "Offer extras unexpected status for %s (%s): %s %s",
+            offer_id,
+            extras_url,
+            resp.status_code,
+            resp.text[:200]
+        )
+        return {
+            'status': 'error',
+            'error': f"Unexpected status {resp.status_code}",
+            'url': extras_url,
+            'base_url': base_url
+        }
+
+    body = (resp.text or '').strip()
+    if not body:
+        return {
+            'status': 'not_found',
+            'data_model': None,
+            'purpose_of_use': None,
+            'url': extras_url,
+            'base_url': base_url
+        }
+
+    try:
+        payload = response_json(resp)
+    except ValueError as exc:
+        logger.warning(
+            "Offer extras invalid JSON for %s (%s): %s body=%s",
+            offer_id,
+            extras_url,
+            exc,
+            body[:150]
+        )
+        return {
+            'status': 'error',
+            'error': 'Invalid JSON payload',
+            'url': extras_url,
+            'base_url': base_url
+        }
+
+    return {
+        'status': 'ok',
+        'data_model': payload.get('data_model'),
+        'purpose_of_use': payload.get('purpose_of_use'),
+        'raw': payload,
+        'url': extras_url,
+        'base_url': base_url
+    }
+
+
+def fetch_offer_extras(offer_id, refresh=False):
+    """
+    Call the Provider UI extras API for a given offer ID to pull data model
+    and purpose of use fields when available. Try each derived base URL until
+    we either succeed or exhaust options.
+
+    Successful lookups (including 404 "no extras") are cached per offer ID;
+    pass refresh=True to bypass the cache and re-fetch.
+    """
+    if not PROVIDER_UI_BASES:
+        return {
+            'status': 'disabled',
+            'reason': 'PROVIDER_UI_BASE not configured'
+        }
+
+    if not refresh:
+        cached = _extras_cache.get(offer_id)
+        if cached is not None:
+            return cached
+
+    last_error = None
+    for base in PROVIDER_UI_BASES:
+        result = _request_offer_extras(base, offer_id)
+        if result['status'] in ('ok', 'not_found'):
+            _extras_cache.set(offer_id, result)
+            return result
+        last_error = result
+
+    return last_error or {
+        'status': 'error',
+        'error': 'Provider extras request failed'
+    }
@@ -0,0 +1,198 @@
+import logging
+import os
+import threading
+import time
+
+import requests
+from decouple import config, Csv
+from django.conf import settings
+from django.core.cache import cache
+
+from core.deadline import DeadlineExceeded, request_budget, upstream_timeout
+
+from . import broker, catalog, connector, extras
+
+# Seconds between background probe rounds; 0 (default) disables the prober
+HEALTH_PROBE_INTERVAL = config('HEALTH_PROBE_INTERVAL', default=0, cast=int)
+# Time budget of one probe
+HEALTH_PROBE_TIMEOUT = config('HEALTH_PROBE_TIMEOUT', default=3, cast=float)
+# Probe results older than this are not trusted by /health/ready (default 3 rounds)
+HEALTH_STALE_AFTER = config('HEALTH_STALE_AFTER', default=0, cast=int) or 3 * max(HEALTH_PROBE_INTERVAL, 1)
+# Upstreams that must be reachable for the worker to report ready
+HEALTH_REQUIRED = [
+    name.strip()
+    for name in config('HEALTH_REQUIRED', default='connector,broker,auth', cast=Csv())
+    if name.strip()
+]
+
+CACHE_KEY = 'consume:health:probes'
+# Below this status an answer proves the upstream is reachable (401/404 included)
+_REACHABLE_BELOW = 500
+
+logger = logging.getLogger(__name__)
+
+_results = {}
+_results_lock = threading.Lock()
+_prober_started = False
+_prober_guard = threading.Lock()
+_started_at = time.time()
+
+
+def _http_probe(method, url, **kwargs):
+    started = time.perf_counter()
+    response = requests.request(method, url, verify=False, timeout=upstream_timeout(), **kwargs)
+    latency = (time.perf_counter() - started) * 1000
+    return {
+        'ok': response.status_code < _REACHABLE_BELOW,
+        'status_code': response.status_code,
+        'latency_ms': round(latency, 1),
+        'url': url,
+    }
+
+
+def probe_connector():
+    if not connector.CONNECTOR_BASE:
+        return None
+    return _http_probe(
+        'GET',
+        f'{connector.CONNECTOR_BASE}api/catalogs?page=0&size=1',
+        headers=connector.AUTH_HEADER,
+    )
+
+
+def probe_broker():
+    recipients = [b for b in broker.BROKERS if b]
+    if not recipients:
+        return None
+    checks = [broker.probe(recipient) for recipient in recipients]
+    # The listing tolerates failing brokers as long as one answers
+    return {
+        'ok': any(check['ok'] for check in checks),
+        'latency_ms': min(check['latency_ms'] for check in checks),
+        'brokers': checks,
+    }
+
+
+def probe_provider_ui():
+    if not extras.PROVIDER_UI_BASES:
+        return None
+    return _http_probe('GET', f"{extras.PROVIDER_UI_BASES[0]}/", headers=extras.PROVIDER_UI_HEADERS)
+
+
+def probe_auth():
+    base_url = getattr(settings, 'AUTH_SERVICE_BASE_URL', '').strip()
+    if not base_url:
+        return None
+    endpoint = getattr(settings, 'AUTH_SERVICE_PROFILE_ENDPOINT', '/api/auth/me/')
+    # Without a session cookie a healthy auth service answers 401
+    return _http_probe('GET', f"{base_url.rstrip('/')}/{endpoint.lstrip('/')}")
+
+
+PROBES = {
+    'connector': probe_connector,
+    'broker': probe_broker,
+    'provider_ui': probe_provider_ui,
+    'auth': probe_auth,
+}
+
+
+def run_probes():
+    """
+    Probe every configured upstream once, each within HEALTH_PROBE_TIMEOUT,
+    and publish the results to this process and the shared cache.
+    """
+    results = {}
+    for name, probe in PROBES.items():
+        started = time.perf_counter()
+        try:
+            with request_budget(HEALTH_PROBE_TIMEOUT):
+                result = probe()
+        except (requests.exceptions.RequestException, DeadlineExceeded) as exc:
+            result = {
+                'ok': False,
+                'error': str(exc),
+                'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+            }
+        if result is None:
+            result = {'ok': None, 'skipped': 'not configured'}
+        result['checked_at'] = time.time()
+        results[name] = result
+
+    with _results_lock:
+        _results.clear()
+        _results.update(results)
+    cache.set(CACHE_KEY, results, HEALTH_STALE_AFTER)
+    return results
+
+
+def cached_results():
+    """Last probe results of any worker (shared cache), else of this process."""
+    results = cache.get(CACHE_KEY)
+    if results is None:
+        with _results_lock:
+            results = dict(_results)
+    return results
+
+
+def liveness():
+    return {
+        'status': 'ok',
+        'pid': os.getpid(),
+        'uptime_seconds': round(time.time() - _started_at, 1),
+    }
+
+
+def readiness():
+    """
+    Readiness from cached probe results only; never calls an upstream.
+    Returns (ready, report).
+    """
+    results = cached_results()
+    now = time.time()
+    failing = []
+    # Without the prober there is nothing to judge readiness by
+    required = HEALTH_REQUIRED if HEALTH_PROBE_INTERVAL > 0 else []
+    for name in required:
+        result = results.get(name)
+        if result is None:
+            failing.append(f'{name}: not probed yet')
+        elif result.get('ok') is None:
+            continue
+        elif now - result['checked_at'] > HEALTH_STALE_AFTER:
+            failing.append(f'{name}: probe result stale')
+        elif not result['ok']:
+            failing.append(f'{name}: unreachable')
+
+    ready = not failing
+    return ready, {
+        'status': 'ready' if ready else 'not_ready',
+        'failing': failing,
+        'required': required,
+        'probe_interval_seconds': HEALTH_PROBE_INTERVAL,
+        'checks': {
+            name: dict(result, age_seconds=round(now - result['checked_at'], 1))
+            for name, result in results.items()
+        },
+        'listing': catalog.listing_status(),
+    }
+
+
+def _probe_loop():
+    while True:
+        try:
+            run_probes()
+        except Exception:
+            logger.exception("Health probe round crashed")
+        time.sleep(HEALTH_PROBE_INTERVAL)
+
+
+def start_prober():
+    """Start the background prober (once per process) when enabled."""
+    global _prober_started
+    if HEALTH_PROBE_INTERVAL <= 0:
+        return
+    with _prober_guard:
+        if _prober_started:
+            return
+        _prober_started = True
+    threading.Thread(target=_probe_loop, name='health-probes', daemon=True).start()
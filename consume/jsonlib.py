@@ -0,0 +1,60 @@
+import json
+
+from decouple import config
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+# 'auto' uses orjson when installed, 'stdlib' forces the json module
+JSON_BACKEND = config('JSON_BACKEND', default='auto').strip().lower()
+
+_use_orjson = orjson is not None and JSON_BACKEND != 'stdlib'
+BACKEND = 'orjson' if _use_orjson else 'stdlib'
+
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data):
+    """
+    Decode JSON from str or bytes. Bytes are decoded directly, without an
+    intermediate str, when the fast backend is available.
+    """
+    if _use_orjson:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson only reads UTF-8; let the stdlib sort out other encodings
+            if not isinstance(data, (bytes, bytearray)):
+                raise
+    return json.loads(data)
+
+
+def dumps_bytes(value, pretty=False):
+    """Encode to UTF-8 JSON bytes."""
+    if _use_orjson:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_INDENT_2 if pretty else 0)
+        except TypeError:
+            # Non-str keys, integers beyond 64 bit, unknown types
+            pass
+    if pretty:
+        return json.dumps(value, indent=2, ensure_ascii=False, default=str).encode('utf-8')
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+
+
+def dumps(value, pretty=False):
+    """Encode to a JSON str (two-space indented when ``pretty``)."""
+    return dumps_bytes(value, pretty=pretty).decode('utf-8')
+
+
+def response_json(response):
+    """Drop-in for ``response.json()`` that decodes the raw body bytes."""
+    return loads(response.content)
+
+
+def json_response(data, status=200, content_type='application/json'):
+    """JsonResponse equivalent encoded with the configured backend."""
+    return HttpResponse(dumps_bytes(data), status=status, content_type=content_type)
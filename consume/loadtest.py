@@ -0,0 +1,264 @@
+"""
+Closed-loop HTTP load generator for the app served locally against the
+stub dataspace.
+
+The stub dataspace and the app each run in their own process, so the load
+generator, the upstreams and the worker under test do not share a GIL.
+Every serving mode (WSGI, ASGI) is swept over increasing concurrency; each
+level reports throughput and latency percentiles, and the knee is the level
+with the best throughput-to-latency ratio (Kleinrock's "power").
+"""
+import importlib.util
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import requests
+
+from .benchsuite import percentile
+from .stubs import StubConfig, StubDataspace
+
+MANAGE_PY = Path(__file__).resolve().parent.parent / 'manage.py'
+DEFAULT_MIX = {'listing': 6, 'offer': 3, 'consume': 1}
+SESSION_COOKIE = 'loadtest'
+STARTUP_TIMEOUT = 30
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_listening(port, process, timeout=STARTUP_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process exited with status {process.returncode} during startup")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Nothing listening on port {port} after {timeout}s")
+
+
+def available_modes():
+    """
+    Serving modes that can run here. WSGI uses gunicorn (one worker with a
+    thread pool, as deployed) or falls back to Django's threaded runserver.
+    ASGI needs uvicorn.
+    """
+    modes = {'wsgi': 'gunicorn' if importlib.util.find_spec('gunicorn') else 'runserver'}
+    if importlib.util.find_spec('uvicorn'):
+        modes['asgi'] = 'uvicorn'
+    return modes
+
+
+def _server_command(mode, server, port, threads):
+    address = f'127.0.0.1:{port}'
+    if server == 'gunicorn':
+        return [
+            sys.executable, '-m', 'gunicorn', 'core.wsgi:application',
+            '--bind', address, '--workers', '1', '--threads', str(threads),
+            '--worker-class', 'gthread',
+        ]
+    if server == 'uvicorn':
+        return [
+            sys.executable, '-m', 'uvicorn', 'core.asgi:application',
+            '--host', '127.0.0.1', '--port', str(port), '--workers', '1', '--no-access-log',
+        ]
+    return [sys.executable, str(MANAGE_PY), 'runserver', address, '--noreload']
+
+
+def _stub_command(stub_config, port):
+    command = [
+        sys.executable, str(MANAGE_PY), 'run_stub_dataspace',
+        '--port', str(port),
+        '--connectors', str(stub_config.connectors),
+        '--catalogs', str(stub_config.catalogs),
+        '--offers', str(stub_config.offers),
+        '--latency', str(stub_config.latency),
+        '--artifact-legs', str(stub_config.artifact_legs),
+        '--artifacts-per-offer', str(stub_config.artifacts_per_offer),
+    ]
+    for role, seconds in stub_config.role_latency.items():
+        command += ['--role-latency', f'{role}={seconds}']
+    return command
+
+
+@contextmanager
+def served_app(mode, server, stub_config, threads=8, extra_env=None):
+    """
+    Start the stub dataspace and the app (in ``mode`` via ``server``) as
+    child processes wired to each other. Yields the app's base URL.
+    """
+    processes = []
+    with tempfile.TemporaryDirectory(prefix='consume-load-') as scratch:
+        stub_port, app_port = _free_port(), _free_port()
+        stub_base = f'http://127.0.0.1:{stub_port}'
+        connector_base = f'{stub_base}/c0/connector'
+        env = dict(os.environ)
+        env.update({
+            'BASE_URL': connector_base,
+            'CONNECTOR_BASE': connector_base,
+            'BROKER': f'{stub_base}/broker/infrastructure',
+            'BROKERS': '',
+            'PROVIDER_UI_BASE': connector_base,
+            'AUTH_SERVICE_BASE_URL': stub_base,
+            'AUTHORIZATION': 'Basic c3R1YjpzdHVi',
+            'ALLOWED_HOSTS': '127.0.0.1,localhost',
+            'DJANGO_DEBUG': 'False',
+            'DJANGO_DB_NAME': str(Path(scratch) / 'db.sqlite3'),
+            'OFFER_SNAPSHOT_PATH': str(Path(scratch) / 'offer_snapshot.json'),
+            'ARTIFACT_STORE_DIR': str(Path(scratch) / 'artifacts'),
+            'LOG_LEVEL': 'WARNING',
+            'PYTHONUNBUFFERED': '1',
+        })
+        env.update(extra_env or {})
+        cwd = str(MANAGE_PY.parent)
+        log = open(Path(scratch) / 'children.log', 'wb')
+        try:
+            subprocess.run(
+                [sys.executable, str(MANAGE_PY), 'migrate', '--noinput'],
+                env=env, cwd=cwd, stdout=log, stderr=subprocess.STDOUT, check=True,
+            )
+            for command, port in (
+                (_stub_command(stub_config, stub_port), stub_port),
+                (_server_command(mode, server, app_port, threads), app_port),
+            ):
+                process = subprocess.Popen(command, env=env, cwd=cwd, stdout=log, stderr=subprocess.STDOUT)
+                processes.append(process)
+                _wait_until_listening(port, process)
+            yield f'http://127.0.0.1:{app_port}'
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+            for process in processes:
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+            log.close()
+
+
+def request_mix(offer_ids, mix=None):
+    """
+    Return (kinds, weights, builders) for the weighted listing/offer/consume
+    mix: the request kinds with a positive weight, their weights in the
+    same order, and a URL builder per kind.
+    """
+    mix = mix or DEFAULT_MIX
+    builders = {
+        'listing': lambda rnd: '/consume/',
+        'offer': lambda rnd: f'/consume/selected_offer/{rnd.choice(offer_ids)}/',
+        'consume': lambda rnd: f'/consume/selected_offer/{rnd.choice(offer_ids)}/?consume=1',
+    }
+    kinds = [kind for kind, weight in mix.items() if weight > 0]
+    return kinds, [mix[kind] for kind in kinds], builders
+
+
+def run_level(base_url, concurrency, duration, offer_ids, mix=None, seed=1):
+    """
+    Drive ``concurrency`` closed-loop clients for ``duration`` seconds.
+    Returns throughput, latency percentiles and per-kind error counts.
+    """
+    kinds, weights, builders = request_mix(offer_ids, mix)
+    latencies = []
+    errors = {}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(index):
+        rnd = random.Random(seed * 1000 + index)
+        session = requests.Session()
+        session.cookies.set('sessionid', SESSION_COOKIE)
+        mine = []
+        failed = {}
+        while time.monotonic() < stop_at:
+            kind = rnd.choices(kinds, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = session.get(base_url + builders[kind](rnd), timeout=60, allow_redirects=False)
+                ok = response.status_code == 200
+            except requests.exceptions.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            if ok:
+                mine.append(elapsed)
+            else:
+                failed[kind] = failed.get(kind, 0) + 1
+        with lock:
+            latencies.extend(mine)
+            for kind, count in failed.items():
+                errors[kind] = errors.get(kind, 0) + count
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    row = {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': sum(errors.values()),
+        'errors_by_kind': errors,
+        'throughput_rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': None,
+        'p95_ms': None,
+        'p99_ms': None,
+        'mean_ms': None,
+    }
+    if latencies:
+        row.update({
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'mean_ms': sum(latencies) / len(latencies) * 1000,
+        })
+    return row
+
+
+def knee_point(curve):
+    """
+    Concurrency level with the highest throughput / mean latency. Past it,
+    more clients mostly add queueing delay rather than throughput.
+    """
+    best = None
+    for row in curve:
+        if not row['mean_ms'] or not row['requests']:
+            continue
+        power = row['throughput_rps'] / row['mean_ms']
+        if best is None or power > best[0]:
+            best = (power, row['concurrency'])
+    return best[1] if best else None
+
+
+def sweep(mode, server, stub_config=None, levels=(1, 2, 4, 8, 16, 32), duration=10,
+          mix=None, threads=8, warmup=2, extra_env=None, progress=None):
+    """
+    Serve the app in ``mode`` and run every concurrency level against it.
+    Returns {'mode', 'server', 'levels': [...], 'knee': concurrency or None}.
+    """
+    stub_config = stub_config or StubConfig()
+    offer_ids = list(StubDataspace(stub_config).offers)
+    curve = []
+    with served_app(mode, server, stub_config, threads=threads, extra_env=extra_env) as base_url:
+        # Fill the listing cache and open connections before measuring
+        run_level(base_url, 1, warmup, offer_ids, {'listing': 1})
+        for level in levels:
+            row = run_level(base_url, level, duration, offer_ids, mix)
+            curve.append(row)
+            if progress:
+                progress(mode, row)
+    return {'mode': mode, 'server': server, 'levels': curve, 'knee': knee_point(curve)}
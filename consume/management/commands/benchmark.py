@@ -0,0 +1,122 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from consume import benchmarks, benchsuite
+from consume.stubs import StubConfig
+
+
+class Command(BaseCommand):
+    help = "Run local performance benchmarks for the consume app."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'suite',
+            choices=['offers-memory', 'route-map', 'json', 'templates', 'dataspace'],
+            help='Benchmark to run.'
+        )
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=10000,
+            help='Number of synthetic offers.'
+        )
+        dataspace = parser.add_argument_group('dataspace suite (runs against the stub dataspace)')
+        dataspace.add_argument('--connectors', type=int, default=3)
+        dataspace.add_argument('--catalogs', type=int, default=2, help='Catalogs per connector.')
+        dataspace.add_argument('--offers', type=int, default=20, help='Offers per catalog.')
+        dataspace.add_argument('--latency', type=float, default=0.0, help='Stub response delay in seconds.')
+        dataspace.add_argument('--iterations', type=int, default=20, help='Timed runs per scenario.')
+        dataspace.add_argument(
+            '--only', action='append', default=[], metavar='PREFIX',
+            help='Run only scenarios whose name starts with PREFIX (repeatable).'
+        )
+        dataspace.add_argument('--baseline', default=None, help='Baseline file to compare with or save to.')
+        dataspace.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline.')
+        dataspace.add_argument(
+            '--tolerance', type=float, default=benchsuite.DEFAULT_TOLERANCE,
+            help='Allowed p50/p95 slowdown against the baseline, as a fraction.'
+        )
+        dataspace.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Exit with an error when a scenario regressed beyond the tolerance.'
+        )
+
+    def handle(self, *args, **options):
+        if options['suite'] == 'offers-memory':
+            result = benchmarks.offer_footprint(count=options['count'])
+            self.stdout.write(f"offers:            {result['offers']}")
+            self.stdout.write(
+                f"dict per offer:    {result['legacy_per_offer']:.0f} B "
+                f"(total {result['legacy_total_bytes']} B)"
+            )
+            self.stdout.write(
+                f"record per offer:  {result['record_per_offer']:.0f} B "
+                f"(total {result['record_total_bytes']} B)"
+            )
+        elif options['suite'] == 'route-map':
+            for row in benchmarks.route_map_timing():
+                self.stdout.write(
+                    f"legs={row['legs']:<6} mapped={row['mapped_legs']:<6} {row['ms']:.2f} ms"
+                )
+        elif options['suite'] == 'json':
+            for row in benchmarks.json_codec_timing():
+                line = f"{row['payload']:<16} {row['bytes']:>9} B"
+                for codec in ('stdlib', 'orjson'):
+                    if f'{codec}_decode_ms' in row:
+                        line += (
+                            f"  {codec}: decode {row[f'{codec}_decode_ms']:.2f} ms"
+                            f" encode {row[f'{codec}_encode_ms']:.2f} ms"
+                        )
+                self.stdout.write(line)
+        elif options['suite'] == 'templates':
+            self.stdout.write(f"offers: {options['count']}")
+            for row in benchmarks.template_render_timing(count=options['count']):
+                self.stdout.write(f"{row['scenario']:<20} {row['ms']:>9.2f} ms")
+        elif options['suite'] == 'dataspace':
+            self._dataspace(options)
+
+    def _dataspace(self, options):
+        stub_config = StubConfig(
+            connectors=options['connectors'],
+            catalogs=options['catalogs'],
+            offers=options['offers'],
+            latency=options['latency'],
+        )
+        result = benchsuite.run_suite(
+            stub_config,
+            iterations=options['iterations'],
+            only=options['only'] or None,
+        )
+        baseline = None if options['save_baseline'] else benchsuite.load_baseline(options['baseline'])
+        comparison = {
+            row['name']: row
+            for row in benchsuite.compare(result, baseline, options['tolerance'])
+        } if baseline else {}
+        if baseline and baseline.get('parameters') != result['parameters']:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline was recorded with different parameters: {baseline.get('parameters')}"
+            ))
+
+        self.stdout.write(
+            f"{'scenario':<16} {'p50 ms':>9} {'p95 ms':>9} {'req/s':>9} {'peak KiB':>10}"
+        )
+        regressions = []
+        for row in result['scenarios']:
+            line = (
+                f"{row['name']:<16} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f}"
+                f" {row['throughput_rps']:>9.1f} {row['peak_kib']:>10.0f}"
+            )
+            delta = comparison.get(row['name'])
+            if delta and delta['p50_ratio'] is not None:
+                line += f"  p50 x{delta['p50_ratio']:.2f} p95 x{delta['p95_ratio']:.2f}"
+                if delta['regression']:
+                    line += '  REGRESSION'
+                    regressions.append(row['name'])
+            self.stdout.write(line)
+
+        if options['save_baseline']:
+            path = benchsuite.save_baseline(result, options['baseline'])
+            self.stdout.write(f"Baseline saved to {path}")
+        elif not baseline:
+            self.stdout.write("No baseline to compare with; store one with --save-baseline.")
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f"Regressed beyond {options['tolerance']:.0%}: {', '.join(regressions)}")
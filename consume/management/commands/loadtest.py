@@ -0,0 +1,105 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from consume import loadtest
+from consume.stubs import StubConfig
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the app against the stub dataspace and sweep a listing/offer/consume "
+        "request mix over increasing concurrency, per serving mode."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modes', nargs='+', choices=['wsgi', 'asgi'], default=['wsgi', 'asgi'],
+            help='Serving modes to sweep (ASGI needs uvicorn).'
+        )
+        parser.add_argument(
+            '--concurrency', nargs='+', type=int, default=[1, 2, 4, 8, 16, 32],
+            help='Concurrent clients per level.'
+        )
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per level.')
+        parser.add_argument(
+            '--mix', default='listing=6,offer=3,consume=1',
+            help='Relative weights of listing, offer and consume requests.'
+        )
+        parser.add_argument('--threads', type=int, default=8, help='gunicorn worker threads (WSGI).')
+        parser.add_argument('--connectors', type=int, default=3)
+        parser.add_argument('--catalogs', type=int, default=2, help='Catalogs per connector.')
+        parser.add_argument('--offers', type=int, default=20, help='Offers per catalog.')
+        parser.add_argument('--latency', type=float, default=0.02, help='Stub response delay in seconds.')
+        parser.add_argument('--auth-latency', type=float, default=None, help='Stub auth service delay in seconds.')
+        parser.add_argument(
+            '--listing-ttl', type=int, default=None,
+            help='OFFER_LISTING_TTL for the served app; low values keep the crawl on the request path.'
+        )
+        parser.add_argument('--json', dest='json_path', default=None, help='Also write the curves to this file.')
+
+    def _mix(self, value):
+        mix = {}
+        for part in value.split(','):
+            kind, _, weight = part.partition('=')
+            kind = kind.strip()
+            if kind not in loadtest.DEFAULT_MIX:
+                raise CommandError(f"Unknown request kind in --mix: {kind}")
+            mix[kind] = float(weight or 1)
+        return mix
+
+    def handle(self, *args, **options):
+        role_latency = {}
+        if options['auth_latency'] is not None:
+            role_latency['auth'] = options['auth_latency']
+        stub_config = StubConfig(
+            connectors=options['connectors'],
+            catalogs=options['catalogs'],
+            offers=options['offers'],
+            latency=options['latency'],
+            role_latency=role_latency,
+        )
+        extra_env = {}
+        if options['listing_ttl'] is not None:
+            extra_env['OFFER_LISTING_TTL'] = str(options['listing_ttl'])
+        mix = self._mix(options['mix'])
+
+        available = loadtest.available_modes()
+        results = []
+        for mode in options['modes']:
+            server = available.get(mode)
+            if not server:
+                self.stdout.write(self.style.WARNING(f"Skipping {mode}: no server installed for it"))
+                continue
+            self.stdout.write(f"\n{mode.upper()} ({server})")
+            self.stdout.write(
+                f"{'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}"
+            )
+            result = loadtest.sweep(
+                mode, server, stub_config,
+                levels=options['concurrency'],
+                duration=options['duration'],
+                mix=mix,
+                threads=options['threads'],
+                extra_env=extra_env,
+                progress=self._progress,
+            )
+            results.append(result)
+            if result['knee']:
+                self.stdout.write(f"knee: {result['knee']} concurrent clients")
+            else:
+                self.stdout.write(self.style.WARNING("knee: no successful level"))
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as handle:
+                json.dump({'mix': mix, 'modes': results}, handle, indent=2)
+            self.stdout.write(f"\nCurves written to {options['json_path']}")
+
+    def _progress(self, mode, row):
+        def ms(value):
+            return f"{value:>8.1f}" if value is not None else f"{'-':>8}"
+
+        self.stdout.write(
+            f"{row['concurrency']:>7} {row['throughput_rps']:>8.1f} {ms(row['p50_ms'])}"
+            f" {ms(row['p95_ms'])} {ms(row['p99_ms'])} {row['errors']:>7}"
+        )
@@ -0,0 +1,70 @@
+import threading
+
+from django.core.management.base import BaseCommand
+
+from consume import warmup
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the broker, offer listing and extras caches. With --loop, keep "
+        "refreshing on an interval; only one process per lock file refreshes at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and refresh every --interval seconds.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=warmup.CACHE_REFRESH_INTERVAL or 300,
+            help='Seconds between refreshes.'
+        )
+        parser.add_argument(
+            '--jitter',
+            type=int,
+            default=warmup.CACHE_REFRESH_JITTER,
+            help='Maximum random offset added to or removed from each interval.'
+        )
+        extras = parser.add_mutually_exclusive_group()
+        extras.add_argument(
+            '--extras',
+            action='store_true',
+            help='Also refresh the Provider UI extras (CACHE_WARMUP_EXTRAS_LIMIT offers).'
+        )
+        extras.add_argument(
+            '--no-extras',
+            action='store_true',
+            help='Skip the Provider UI extras lookups.'
+        )
+
+    def handle(self, *args, **options):
+        include_extras = None
+        if options['extras']:
+            include_extras = True
+        elif options['no_extras']:
+            include_extras = False
+
+        if not options['loop']:
+            summary = warmup.warm_caches(include_extras=include_extras)
+            self.stdout.write(
+                f"ok={summary['ok']} offers={summary['offers']} "
+                f"extras={summary['extras']} seconds={summary['seconds']}"
+            )
+            return
+
+        self.stdout.write(
+            f"Refreshing every {options['interval']}s (±{options['jitter']}s). Ctrl+C to stop."
+        )
+        try:
+            warmup.run_scheduler(
+                options['interval'],
+                jitter=options['jitter'],
+                include_extras=include_extras,
+                stop_event=threading.Event()
+            )
+        except KeyboardInterrupt:
+            pass
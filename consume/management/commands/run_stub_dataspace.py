@@ -0,0 +1,77 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from consume.stubs import StubConfig, StubServer
+
+
+class Command(BaseCommand):
+    help = "Serve a fake broker, connectors, Provider UI and auth service for offline work."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8099)
+        parser.add_argument('--connectors', type=int, default=3)
+        parser.add_argument('--catalogs', type=int, default=2, help='Catalogs per connector.')
+        parser.add_argument('--offers', type=int, default=10, help='Offers per catalog.')
+        parser.add_argument('--page-size', type=int, default=20, help='Default page size of paged endpoints.')
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response.')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Random ± seconds on top of --latency.')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503.')
+        parser.add_argument(
+            '--role-latency', action='append', default=[], metavar='ROLE=SECONDS',
+            help='Per-role latency override (broker, connector, artifact, extras, auth).'
+        )
+        parser.add_argument(
+            '--role-error-rate', action='append', default=[], metavar='ROLE=RATE',
+            help='Per-role error rate override.'
+        )
+        parser.add_argument('--artifact-kind', choices=['shipment', 'csv', 'mixed'], default='shipment')
+        parser.add_argument('--artifact-legs', type=int, default=50, help='Legs per shipment artifact.')
+        parser.add_argument('--artifacts-per-offer', type=int, default=1, help='Artifacts under each offer.')
+        parser.add_argument('--artifact-rows', type=int, default=1000, help='Rows per CSV artifact.')
+        parser.add_argument('--description-padding', type=int, default=0,
+                            help='Extra characters per offer description.')
+        parser.add_argument('--fresh-agreements', action='store_true',
+                            help='Issue a new agreement URL for every contract request.')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def _overrides(self, values):
+        overrides = {}
+        for value in values:
+            role, _, number = value.partition('=')
+            overrides[role.strip()] = float(number)
+        return overrides
+
+    def handle(self, *args, **options):
+        stub_config = StubConfig(
+            connectors=options['connectors'],
+            catalogs=options['catalogs'],
+            offers=options['offers'],
+            page_size=options['page_size'],
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            role_latency=self._overrides(options['role_latency']),
+            role_error_rate=self._overrides(options['role_error_rate']),
+            artifact_kind=options['artifact_kind'],
+            artifact_legs=options['artifact_legs'],
+            artifacts_per_offer=options['artifacts_per_offer'],
+            artifact_rows=options['artifact_rows'],
+            description_padding=options['description_padding'],
+            fresh_agreements=options['fresh_agreements'],
+            seed=options['seed'],
+        )
+        server = StubServer(stub_config, host=options['host'], port=options['port']).start()
+        self.stdout.write(f"Stub dataspace listening on {server.base_url}")
+        self.stdout.write(f"{len(server.dataspace.offers)} offers, e.g. {server.sample_offer_id()}")
+        self.stdout.write("Point the app at it with:")
+        for name, value in server.env().items():
+            self.stdout.write(f"  {name}={value}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumedShipment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('route_key', models.CharField(max_length=64, unique=True)),
+                ('offer_id', models.CharField(blank=True, max_length=255)),
+                ('shipment_id', models.CharField(blank=True, max_length=255)),
+                ('parcel_id', models.CharField(blank=True, max_length=255)),
+                ('total_emissions', models.FloatField(blank=True, null=True)),
+                ('emissions_unit', models.CharField(blank=True, max_length=32)),
+                ('standard', models.CharField(blank=True, max_length=255)),
+                ('calculated_at', models.DateTimeField(blank=True, null=True)),
+                ('total_distance', models.FloatField(blank=True, null=True)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-recorded_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ShipmentLeg',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.FloatField(blank=True, null=True)),
+                ('origin', models.CharField(blank=True, max_length=255)),
+                ('destination', models.CharField(blank=True, max_length=255)),
+                ('corridor', models.CharField(db_index=True, max_length=511)),
+                ('distance', models.FloatField(blank=True, null=True)),
+                ('emissions', models.FloatField(blank=True, null=True)),
+                ('shipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='legs', to='consume.consumedshipment')),
+            ],
+            options={
+                'ordering': ['shipment', 'sequence'],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consume', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consumedshipment',
+            name='agreement_url',
+            field=models.CharField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='consumedshipment',
+            name='artifact_url',
+            field=models.CharField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AlterField(
+            model_name='consumedshipment',
+            name='route_key',
+            field=models.CharField(db_index=True, max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='consumedshipment',
+            constraint=models.UniqueConstraint(fields=('agreement_url', 'artifact_url'), name='consume_shipment_agreement_artifact'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+def drop_duplicate_content(apps, schema_editor):
+    # Keep the first recording of each artifact body
+    ConsumedShipment = apps.get_model('consume', 'ConsumedShipment')
+    seen = set()
+    duplicates = []
+    for pk, route_key in ConsumedShipment.objects.order_by('recorded_at', 'pk').values_list('pk', 'route_key'):
+        if route_key in seen:
+            duplicates.append(pk)
+        seen.add(route_key)
+    ConsumedShipment.objects.filter(pk__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consume', '0002_shipment_per_agreement'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='consumedshipment',
+            name='consume_shipment_agreement_artifact',
+        ),
+        migrations.RunPython(drop_duplicate_content, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='consumedshipment',
+            name='route_key',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+    ]
@@ -1,3 +1,52 @@
 from django.db import models
 
-# Create your models here.
+
+class ConsumedShipment(models.Model):
+    """
+    Shipment footprint extracted from a consumed transport-chain artifact.
+    One row per artifact body; route_key is its SHA-256, so the same content
+    consumed under later agreements is not counted again.
+    """
+
+    route_key = models.CharField(max_length=64, unique=True)
+    agreement_url = models.CharField(max_length=500, null=True, blank=True)
+    artifact_url = models.CharField(max_length=500, null=True, blank=True)
+    offer_id = models.CharField(max_length=255, blank=True)
+    shipment_id = models.CharField(max_length=255, blank=True)
+    parcel_id = models.CharField(max_length=255, blank=True)
+    total_emissions = models.FloatField(null=True, blank=True)
+    emissions_unit = models.CharField(max_length=32, blank=True)
+    standard = models.CharField(max_length=255, blank=True)
+    calculated_at = models.DateTimeField(null=True, blank=True)
+    total_distance = models.FloatField(null=True, blank=True)
+    recorded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-recorded_at']
+
+    def __str__(self):
+        return self.shipment_id or self.route_key[:12]
+
+
+class ShipmentLeg(models.Model):
+    """
+    One mapped transport leg of a consumed shipment with its emissions.
+    """
+
+    shipment = models.ForeignKey(
+        ConsumedShipment,
+        related_name='legs',
+        on_delete=models.CASCADE
+    )
+    sequence = models.FloatField(null=True, blank=True)
+    origin = models.CharField(max_length=255, blank=True)
+    destination = models.CharField(max_length=255, blank=True)
+    corridor = models.CharField(max_length=511, db_index=True)
+    distance = models.FloatField(null=True, blank=True)
+    emissions = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['shipment', 'sequence']
+
+    def __str__(self):
+        return self.corridor
@@ -0,0 +1,105 @@
+import sys
+
+
+def _intern(value):
+    """
+    Intern strings that repeat across many offers (connector ids, catalog
+    titles/descriptions, keywords) so every record points at one shared copy.
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+class OfferRecord:
+    """
+    Compact representation of one offer in the listing.
+
+    Exposes the same attribute names as the dicts the listing used to build,
+    so templates keep using ``offer.catalog_title`` etc. unchanged. Use
+    ``as_dict()`` when a plain JSON-serializable structure is needed.
+    """
+
+    __slots__ = (
+        'connector_id',
+        'catalog_title',
+        'catalog_description',
+        'offer_title',
+        'offer_description',
+        'offer_keywords',
+        'offer_publisher',
+        'offer_url',
+        'offer_modified',
+    )
+
+    FIELDS = __slots__ + ('offer_id',)
+
+    def __init__(self, connector_id, catalog_title, catalog_description,
+                 offer_title=None, offer_description=None, offer_keywords=(),
+                 offer_publisher=None, offer_url='', offer_modified=None):
+        self.connector_id = _intern(connector_id)
+        self.catalog_title = _intern(catalog_title)
+        self.catalog_description = _intern(catalog_description)
+        self.offer_title = offer_title
+        self.offer_description = offer_description
+        self.offer_keywords = tuple(_intern(k) for k in (offer_keywords or ()))
+        self.offer_publisher = _intern(offer_publisher)
+        self.offer_url = offer_url or ''
+        # Provider's modificationDate; keys the cached offer card
+        self.offer_modified = offer_modified
+
+    @classmethod
+    def from_resource(cls, connector_id, catalog_title, catalog_description, resource):
+        """
+        Build a record from one entry of a catalog's ``_embedded.resources``.
+        """
+        self_href = (
+            resource.get('_links', {})
+                    .get('self', {})
+                    .get('href', '')
+        )
+        return cls(
+            connector_id,
+            catalog_title,
+            catalog_description,
+            offer_title=resource.get('title'),
+            offer_description=resource.get('description'),
+            offer_keywords=resource.get('keywords', []),
+            offer_publisher=resource.get('publisher'),
+            offer_url=self_href,
+            offer_modified=resource.get('modificationDate'),
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data.get('connector_id'),
+            data.get('catalog_title'),
+            data.get('catalog_description'),
+            offer_title=data.get('offer_title'),
+            offer_description=data.get('offer_description'),
+            offer_keywords=data.get('offer_keywords') or (),
+            offer_publisher=data.get('offer_publisher'),
+            offer_url=data.get('offer_url') or '',
+            offer_modified=data.get('offer_modified'),
+        )
+
+    @property
+    def offer_id(self):
+        return self.offer_url.rstrip('/').split('/')[-1]
+
+    def as_dict(self):
+        data = {name: getattr(self, name) for name in self.FIELDS}
+        data['offer_keywords'] = list(self.offer_keywords)
+        return data
+
+    def __eq__(self, other):
+        if not isinstance(other, OfferRecord):
+            return NotImplemented
+        return all(getattr(self, n) == getattr(other, n) for n in self.__slots__)
+
+    def __hash__(self):
+        return hash(self.offer_url)
+
+    def __repr__(self):
+        return f"OfferRecord(offer_id={self.offer_id!r}, connector_id={self.connector_id!r})"
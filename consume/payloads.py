@@ -0,0 +1,88 @@
+import itertools
+import json
+
+import requests
+from decouple import config
+
+# Characters of a payload written to the log before it is cut off
+LOG_PAYLOAD_MAX_CHARS = config('LOG_PAYLOAD_MAX_CHARS', default=2000, cast=int)
+# Log every Nth formatted payload in full (0 never, 1 always)
+LOG_PAYLOAD_SAMPLE_RATE = config('LOG_PAYLOAD_SAMPLE_RATE', default=0, cast=int)
+
+_formatted = itertools.count(1)
+
+
+def _full_sample():
+    if LOG_PAYLOAD_SAMPLE_RATE <= 0:
+        return False
+    return next(_formatted) % LOG_PAYLOAD_SAMPLE_RATE == 0
+
+
+def _bounded_json(value, limit, indent):
+    """
+    Encode ``value`` but stop as soon as ``limit`` characters have been
+    produced, so a large payload is never serialized whole just to be cut.
+    """
+    parts = []
+    size = 0
+    encoder = json.JSONEncoder(indent=indent, default=str, ensure_ascii=False)
+    for chunk in encoder.iterencode(value):
+        parts.append(chunk)
+        size += len(chunk)
+        if limit is not None and size > limit:
+            break
+    return ''.join(parts)
+
+
+class Payload:
+    """
+    Log argument that renders a payload only when a record is actually
+    emitted. Accepts dicts/lists (JSON-encoded), str/bytes and
+    ``requests.Response`` objects (their body). Output is truncated to
+    LOG_PAYLOAD_MAX_CHARS unless this record is picked by the 1-in-N
+    full-payload sample.
+    """
+
+    __slots__ = ('value', 'limit')
+
+    def __init__(self, value, limit=None):
+        self.value = value
+        self.limit = LOG_PAYLOAD_MAX_CHARS if limit is None else limit
+
+    def _render(self, limit):
+        """Returns (text, total size or None, whether the source was sliced)."""
+        value = self.value
+        encoding = 'utf-8'
+        # requests.Response: slice the raw body instead of decoding all of it
+        if isinstance(value, requests.Response):
+            # Never read a streamed body just to log it; even hasattr() on
+            # .content would consume it
+            if value._content is False:
+                return '<streamed body>', None, False
+            encoding = value.encoding or encoding
+            value = value.content
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            raw = bytes(value if limit is None else value[:limit * 4])
+            return raw.decode(encoding, errors='replace'), len(value), len(raw) < len(value)
+        if isinstance(value, str):
+            return value, len(value), False
+        text = _bounded_json(value, limit, 2)
+        return text, None, False
+
+    def __str__(self):
+        limit = None if _full_sample() else self.limit
+        text, total, cut = self._render(limit)
+        if limit is not None and len(text) > limit:
+            text, cut = text[:limit], True
+        if not cut:
+            return text
+        if total is not None:
+            return f"{text}… [truncated, {total} total]"
+        return f"{text}… [truncated]"
+
+    __repr__ = __str__
+
+
+def payload(value, limit=None):
+    """Wrap ``value`` for lazy, size-capped logging: ``logger.debug("%s", payload(x))``."""
+    return Payload(value, limit)
@@ -0,0 +1,298 @@
+import logging
+import mmap
+import re
+from contextlib import contextmanager
+
+from decouple import config
+
+from .artifacts import get_store
+
+# Bytes of the artifact rendered inline on the offer page
+ARTIFACT_PREVIEW_BYTES = config('ARTIFACT_PREVIEW_BYTES', default=64 * 1024, cast=int)
+# Upper bound for one page of the preview endpoint
+ARTIFACT_PAGE_MAX_BYTES = config('ARTIFACT_PAGE_MAX_BYTES', default=256 * 1024, cast=int)
+ARTIFACT_PAGE_MAX_LINES = config('ARTIFACT_PAGE_MAX_LINES', default=2000, cast=int)
+ARTIFACT_KEY_RE = re.compile(r'^[0-9a-f]{64}$')
+
+logger = logging.getLogger(__name__)
+
+# Tolerates strings cut off at either end of a slice
+_JSON_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*(?:"|\\?\Z)|[{}\[\],:]|\s+|[^{}\[\],:"\s]+', re.S)
+_JSON_STRING_RE = re.compile(rb'"(?:[^"\\]|\\.)*"', re.S)
+_STRING_TAIL_RE = re.compile(r'(?:[^"\\]|\\.)*(?:"|\\?\Z)', re.S)
+_STRING_REST_RE = re.compile(rb'(?:[^"\\]|\\.)*(")?', re.S)
+# Bytes scanned per step when a page is requested without a cursor
+_SCAN_CHUNK = 1024 * 1024
+
+
+@contextmanager
+def open_artifact(key):
+    """
+    Memory-map a stored artifact for the duration of the block. Yields a
+    dict (content, content_type, encoding) or None when the key is unknown
+    or has been evicted. ``content`` supports slicing, ``find`` and
+    ``read`` like bytes without loading the file into memory.
+    """
+    if not ARTIFACT_KEY_RE.match(key or ''):
+        yield None
+        return
+    store = get_store()
+    content = store.open(key)
+    if content is None:
+        yield None
+        return
+    meta = store.metadata(key) or {}
+    try:
+        yield {
+            'content': content,
+            'content_type': meta.get('content_type') or '',
+            'encoding': meta.get('encoding') or 'utf-8',
+        }
+    finally:
+        if isinstance(content, mmap.mmap):
+            content.close()
+
+
+def is_json(content_type, content):
+    if 'json' in (content_type or '').lower():
+        return True
+    return content[:64].lstrip()[:1] in (b'{', b'[')
+
+
+def _align(content, pos, encoding):
+    """
+    Move a byte offset back to the start of a UTF-8 character so a slice
+    never splits a multi-byte sequence.
+    """
+    if encoding.lower().replace('-', '') not in ('utf8', 'utf8sig'):
+        return pos
+    while 0 < pos < len(content) and (content[pos] & 0xC0) == 0x80:
+        pos -= 1
+    return pos
+
+
+def _json_state(chunk, depth=0, in_string=False):
+    """
+    Nesting depth and whether we are inside a string at the end of
+    ``chunk``, given the state at its start. Computed without a
+    Python-level loop over every byte.
+    """
+    if in_string:
+        match = _STRING_REST_RE.match(chunk)
+        if match.group(1) is None:
+            return depth, True
+        chunk = chunk[match.end():]
+    stripped = _JSON_STRING_RE.sub(b'', chunk)
+    quote = stripped.find(b'"')
+    in_string = quote != -1
+    if in_string:
+        stripped = stripped[:quote]
+    depth += (
+        stripped.count(b'{') + stripped.count(b'[')
+        - stripped.count(b'}') - stripped.count(b']')
+    )
+    return max(depth, 0), in_string
+
+
+def _past_escape(content, pos):
+    """
+    Move ``pos`` forward by one byte when it would split a backslash
+    escape, so the state at a page boundary is unambiguous.
+    """
+    run = 0
+    while run < pos and content[pos - run - 1] == 0x5C:
+        run += 1
+    return min(pos + 1, len(content)) if run % 2 else pos
+
+
+def _state_at(content, offset):
+    """
+    JSON state at ``offset`` for a page requested without a cursor,
+    scanned in _SCAN_CHUNK steps so memory stays flat.
+    """
+    depth, in_string = 0, False
+    pos = 0
+    while pos < offset:
+        end = min(_past_escape(content, min(pos + _SCAN_CHUNK, offset)), offset)
+        depth, in_string = _json_state(content[pos:end], depth, in_string)
+        pos = end
+    return depth, in_string
+
+
+def make_cursor(offset, depth=0, in_string=False):
+    return f"{offset}.{depth}.{int(in_string)}"
+
+
+def parse_cursor(value):
+    """(offset, depth, in_string) from a byte page cursor; ValueError if malformed."""
+    offset, depth, in_string = (int(part) for part in value.split('.'))
+    if offset < 0 or depth < 0 or in_string not in (0, 1):
+        raise ValueError(f"Invalid cursor {value!r}")
+    return offset, depth, bool(in_string)
+
+
+def pretty_json_fragment(text, depth=0, in_string=False, indent=2):
+    """
+    Re-indent a slice of a JSON document without parsing it, so only the
+    visible part is formatted. ``depth``/``in_string`` describe the state
+    at the start of the slice; concatenated pages line up.
+    """
+    out = []
+    pos = 0
+    if in_string:
+        match = _STRING_TAIL_RE.match(text)
+        out.append(match.group(0))
+        pos = match.end()
+
+    pad = ' ' * indent
+    for match in _JSON_TOKEN_RE.finditer(text, pos):
+        token = match.group(0)
+        if token in ('{', '['):
+            depth += 1
+            out.append(token + '\n' + pad * depth)
+        elif token in ('}', ']'):
+            depth = max(depth - 1, 0)
+            out.append('\n' + pad * depth + token)
+        elif token == ',':
+            out.append(',\n' + pad * depth)
+        elif token == ':':
+            out.append(': ')
+        elif token.isspace():
+            continue
+        else:
+            out.append(token)
+    return ''.join(out)
+
+
+def _decode(content, encoding):
+    return content.decode(encoding, errors='replace')
+
+
+def byte_page(artifact, offset=0, length=None, pretty=True, cursor=None):
+    """
+    One page of the artifact starting at byte ``offset``, or where the
+    ``cursor`` returned with the previous page points. The cursor carries
+    the JSON state at that point, so paging costs the page and not the
+    bytes before it.
+    """
+    content = artifact['content']
+    encoding = artifact.get('encoding') or 'utf-8'
+    length = min(length or ARTIFACT_PREVIEW_BYTES, ARTIFACT_PAGE_MAX_BYTES)
+    state = None
+    if cursor:
+        offset, *state = parse_cursor(cursor)
+    start = _align(content, min(max(offset, 0), len(content)), encoding)
+    end = _align(content, min(start + length, len(content)), encoding)
+    if end == start and start < len(content):
+        end = min(start + length, len(content))
+
+    formatted = pretty and is_json(artifact.get('content_type'), content)
+    if formatted:
+        end = _past_escape(content, end)
+    chunk = content[start:end]
+    if formatted:
+        if state is None or start != offset:
+            state = _state_at(content, start)
+        depth, in_string = state
+        text = pretty_json_fragment(_decode(chunk, encoding), depth, in_string)
+        next_state = _json_state(chunk, depth, in_string)
+    else:
+        text = _decode(chunk, encoding)
+        next_state = (0, False)
+
+    has_more = end < len(content)
+    return {
+        'mode': 'bytes',
+        'text': text,
+        'offset': start,
+        'next_offset': end if has_more else None,
+        'next_cursor': make_cursor(end, *next_state) if has_more else None,
+        'total_bytes': len(content),
+        'has_more': has_more,
+        'pretty': formatted,
+    }
+
+
+def _line_offset(content, line):
+    """
+    Byte offset where zero-based ``line`` starts, for a page requested
+    without a cursor. Whole _SCAN_CHUNK steps are skipped with a count of
+    their newlines.
+    """
+    pos = 0
+    while line and pos < len(content):
+        chunk = content[pos:pos + _SCAN_CHUNK]
+        newlines = chunk.count(b'\n')
+        if newlines < line:
+            line -= newlines
+            pos += len(chunk)
+            continue
+        found = -1
+        for _ in range(line):
+            found = chunk.find(b'\n', found + 1)
+        return pos + found + 1
+    return min(pos, len(content))
+
+
+def line_page(artifact, line=0, lines=200, cursor=None):
+    """
+    ``lines`` lines of the artifact starting at zero-based line ``line``.
+    ``cursor`` is the byte offset of that line, as returned in the
+    previous page's ``next_cursor``, and saves locating it.
+    """
+    content = artifact['content']
+    encoding = artifact.get('encoding') or 'utf-8'
+    lines = min(max(lines, 1), ARTIFACT_PAGE_MAX_LINES)
+    line = max(line, 0)
+
+    if cursor:
+        start = int(cursor)
+        if not 0 <= start <= len(content):
+            raise ValueError(f"Invalid cursor {cursor!r}")
+    else:
+        start = _line_offset(content, line)
+    end = start
+    for _ in range(lines):
+        end = content.find(b'\n', end) + 1
+        if end == 0:
+            end = len(content)
+            break
+    # Never return more than a byte page, even for a few very long lines
+    if end - start > ARTIFACT_PAGE_MAX_BYTES:
+        end = _align(content, start + ARTIFACT_PAGE_MAX_BYTES, encoding)
+
+    chunk = content[start:end]
+    has_more = end < len(content)
+    return {
+        'mode': 'lines',
+        'text': _decode(chunk, encoding),
+        'line': line,
+        # A page cut short by ARTIFACT_PAGE_MAX_BYTES resumes mid-line
+        'next_line': line + chunk.count(b'\n') if has_more else None,
+        'next_cursor': str(end) if has_more else None,
+        'offset': start,
+        'total_bytes': len(content),
+        'has_more': has_more,
+        'pretty': False,
+    }
+
+
+def build_preview(content, content_type='', encoding=None, key=None):
+    """
+    Bounded inline preview of a downloaded artifact: at most
+    ARTIFACT_PREVIEW_BYTES, JSON re-indented for that slice only.
+    """
+    page = byte_page({
+        'content': content,
+        'content_type': content_type,
+        'encoding': encoding or 'utf-8',
+    }, 0, ARTIFACT_PREVIEW_BYTES)
+    return {
+        'body': page['text'],
+        'truncated': page['has_more'],
+        'shown_bytes': page['next_offset'] or page['total_bytes'],
+        'next_cursor': page['next_cursor'],
+        'total_bytes': page['total_bytes'],
+        'content_type': content_type or '',
+        'key': key,
+    }
@@ -0,0 +1,163 @@
+"""
+Live progress of the consumption pipeline as Server-Sent Events.
+
+runner() runs in its own thread and publishes one ``step`` event per
+completed step (with its duration), then ``done`` with the URL of the
+rendered result, or ``failed``. Under ASGI the events are relayed by an
+async generator, so an open stream holds no worker thread while a step is
+waiting on the connector. Under WSGI a sync generator relays them and
+occupies a worker thread for the whole run. When the client disconnects
+and the relay is closed, the pipeline is cancelled at its next upstream
+call or download chunk.
+"""
+import asyncio
+import logging
+import queue
+import secrets
+import threading
+import time
+
+from decouple import config
+from django.conf import settings
+from django.db import connections
+
+from core.deadline import RequestCancelled, request_budget
+from core.tracing import span
+
+from .artifacts import get_store
+from .connector import runner
+from .jsonlib import dumps
+
+# Seconds a streamed consumption result stays available to the offer page
+CONSUME_RESULT_TTL = config('CONSUME_RESULT_TTL', default=600, cast=int)
+# Seconds between keep-alive comments while a step is running, so proxies
+# do not close an idle stream
+SSE_HEARTBEAT = config('SSE_HEARTBEAT', default=15, cast=float)
+
+TOTAL_STEPS = 6
+HEARTBEAT = b': keep-alive\n\n'
+
+logger = logging.getLogger(__name__)
+
+
+def event(name, data):
+    """One SSE frame with a JSON payload."""
+    return f"event: {name}\ndata: {dumps(data)}\n\n".encode('utf-8')
+
+
+def save_result(offer_id, consumption):
+    """
+    Keep a finished consumption for the offer page; returns its token. It
+    is written to the artifact store, which every worker shares, since the
+    page request may reach a different worker than the stream.
+    """
+    token = secrets.token_urlsafe(16)
+    get_store().put_result(token, {'offer_id': offer_id, 'consumption': consumption}, CONSUME_RESULT_TTL)
+    return token
+
+
+def load_result(token, offer_id):
+    """The consumption stored under ``token`` for ``offer_id``, or None."""
+    entry = get_store().get_result(token, CONSUME_RESULT_TTL) if token else None
+    if not entry or entry.get('offer_id') != offer_id:
+        return None
+    return entry['consumption']
+
+
+def _pipeline(offer_url, offer_id, result_url, parent, relay, cancel):
+    """Run runner(), relaying every frame and finally None."""
+    started = time.perf_counter()
+    completed = []
+
+    def publish(frame):
+        # Nobody reads the frames once the relay is closed
+        if frame is None or not cancel.is_set():
+            relay(frame)
+
+    def on_step(step):
+        completed.append(step['label'])
+        publish(event('step', dict(step, index=len(completed), total=TOTAL_STEPS)))
+
+    try:
+        # The request (and its budget and trace) ended when the stream began
+        with span('consume.stream', parent=parent, offer_id=offer_id), \
+                request_budget(getattr(settings, 'REQUEST_DEADLINE_SECONDS', 25), cancel=cancel):
+            consumption = runner(offer_url, on_step=on_step)
+    except RequestCancelled:
+        logger.info("Streamed consumption of offer %s cancelled after %s", offer_id, completed)
+    except Exception as exc:
+        logger.warning("Streamed consumption of offer %s failed: %s", offer_id, exc)
+        publish(event('failed', {'detail': str(exc), 'completed': completed}))
+    else:
+        token = save_result(offer_id, consumption)
+        publish(event('done', {
+            'url': f'{result_url}?result={token}',
+            'total_ms': round((time.perf_counter() - started) * 1000, 1),
+        }))
+    finally:
+        # This thread's database connection (shipment recording) is not reused
+        connections.close_all()
+        publish(None)
+
+
+def _start(offer_url, offer_id, result_url, parent, publish):
+    """Start the pipeline thread; returns the event that cancels it."""
+    cancel = threading.Event()
+    threading.Thread(
+        target=_pipeline,
+        args=(offer_url, offer_id, result_url, parent, publish, cancel),
+        name='consume-stream',
+        daemon=True,
+    ).start()
+    return cancel
+
+
+def stream(offer_url, offer_id, result_url, parent=None):
+    """
+    Sync generator of SSE frames (WSGI). ``parent`` is the trace to
+    continue, see core.tracing.current_parent().
+    """
+    frames = queue.Queue()
+    cancel = _start(offer_url, offer_id, result_url, parent, frames.put)
+    try:
+        yield event('start', {'total': TOTAL_STEPS})
+        while True:
+            try:
+                frame = frames.get(timeout=SSE_HEARTBEAT)
+            except queue.Empty:
+                yield HEARTBEAT
+                continue
+            if frame is None:
+                return
+            yield frame
+    finally:
+        # Closed early (GeneratorExit) when the client disconnected
+        cancel.set()
+
+
+async def astream(offer_url, offer_id, result_url, parent=None):
+    """Async generator of SSE frames (ASGI); see stream()."""
+    loop = asyncio.get_running_loop()
+    frames = asyncio.Queue()
+
+    def publish(frame):
+        try:
+            loop.call_soon_threadsafe(frames.put_nowait, frame)
+        except RuntimeError:
+            pass  # the event loop closed with the relay
+
+    cancel = _start(offer_url, offer_id, result_url, parent, publish)
+    try:
+        yield event('start', {'total': TOTAL_STEPS})
+        while True:
+            try:
+                frame = await asyncio.wait_for(frames.get(), SSE_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+                continue
+            if frame is None:
+                return
+            yield frame
+    finally:
+        # aclose() or task cancellation when the client disconnected
+        cancel.set()
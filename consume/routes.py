@@ -0,0 +1,634 @@
+import difflib
+import json
+import logging
+from functools import lru_cache
+from pathlib import Path
+
+import ijson
+import numpy as np
+from decouple import config
+from django.utils.dateparse import parse_datetime
+
+from .preview import open_artifact
+
+GAZETTEER_PATH = Path(config(
+    'ROUTE_GAZETTEER_PATH',
+    default=str(Path(__file__).resolve().parent / 'data' / 'gazetteer.json')
+))
+# Minimum difflib similarity for a fuzzy place-name match (0 disables fuzzy matching)
+GAZETTEER_FUZZY_CUTOFF = config('ROUTE_GAZETTEER_FUZZY_CUTOFF', default=0.85, cast=float)
+
+EARTH_RADIUS_KM = 6371.0088
+
+logger = logging.getLogger(__name__)
+
+
+def _fold(value):
+    """Case-fold and collapse whitespace for lookups."""
+    return ' '.join(str(value).split()).casefold()
+
+
+class Gazetteer:
+    """
+    Place-name index built once from a gazetteer file.
+
+    Canonical names and aliases are case-folded into a single lookup table.
+    Names that do not match directly are retried without a trailing
+    "Hub"/"Port" qualifier and finally fuzzily. Results are memoized per
+    spelling.
+    """
+
+    QUALIFIERS = ('hub', 'port', 'terminal')
+
+    def __init__(self, places, fuzzy_cutoff=GAZETTEER_FUZZY_CUTOFF):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._index = {}
+        for place in places:
+            entry = (place['name'], (float(place['lat']), float(place['lng'])))
+            for label in [place['name']] + list(place.get('aliases') or []):
+                self._index.setdefault(_fold(label), entry)
+        self._keys = list(self._index)
+        self.lookup = lru_cache(maxsize=4096)(self._lookup)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as handle:
+            document = json.load(handle)
+        return cls(document.get('places') or [])
+
+    def _lookup(self, name):
+        """
+        Return (canonical_name, (lat, lng)) or None.
+        """
+        if not name:
+            return None
+        key = _fold(name.split(':')[-1])
+        entry = self._index.get(key)
+        if entry:
+            return entry
+
+        words = key.split(' ')
+        while len(words) > 1 and words[-1] in self.QUALIFIERS:
+            words.pop()
+            entry = self._index.get(' '.join(words))
+            if entry:
+                return entry
+
+        if self.fuzzy_cutoff > 0:
+            close = difflib.get_close_matches(key, self._keys, n=1, cutoff=self.fuzzy_cutoff)
+            if close:
+                return self._index[close[0]]
+        return None
+
+    def __len__(self):
+        return len(self._index)
+
+
+@lru_cache(maxsize=1)
+def get_gazetteer():
+    try:
+        return Gazetteer.from_file(GAZETTEER_PATH)
+    except (OSError, ValueError) as exc:
+        logger.error("Could not load route gazetteer %s: %s", GAZETTEER_PATH, exc)
+        return Gazetteer([])
+
+
+class EmissionIndex:
+    """
+    Case-folded label → CO2e lookup built once per shipment breakdown.
+    """
+
+    def __init__(self, emissions_map):
+        self._index = {}
+        for label, value in (emissions_map or {}).items():
+            self._index.setdefault(_fold(label), value)
+
+    def match(self, leg_label, start, end):
+        if not self._index:
+            return None
+        candidates = []
+        if leg_label:
+            candidates.append(leg_label)
+        if start and end:
+            candidates.extend([
+                f"{start} to {end}",
+                f"{start} Hub to {end}",
+                f"{start} to {end} Hub",
+            ])
+        for candidate in candidates:
+            key = _fold(candidate)
+            if key in self._index:
+                return self._index[key]
+        return None
+
+
+def split_leg_places(leg_name):
+    if not leg_name:
+        return (None, None)
+    cleaned = leg_name.split(':')[-1]
+    parts = cleaned.split(' to ')
+    if len(parts) == 2:
+        return parts[0].strip(), parts[1].strip()
+    return cleaned.strip(), None
+
+
+def haversine_km(start_coords, end_coords):
+    """
+    Great-circle distances for arrays of (lat, lng) start/end pairs.
+    """
+    start = np.radians(np.asarray(start_coords, dtype=float).reshape(-1, 2))
+    end = np.radians(np.asarray(end_coords, dtype=float).reshape(-1, 2))
+    dlat = end[:, 0] - start[:, 0]
+    dlng = end[:, 1] - start[:, 1]
+    a = np.sin(dlat / 2) ** 2 + np.cos(start[:, 0]) * np.cos(end[:, 0]) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def iter_transport_legs(payload):
+    """
+    Yield every transport leg dict of ``unified.transportChains``.
+    """
+    chains = ((payload or {}).get('unified') or {}).get('transportChains') or {}
+    for chain in chains.values():
+        element = chain.get('transportChainElement') or {}
+        yield from element.get('transportLegs') or []
+
+
+def _resolve_legs(raw_legs, gazetteer):
+    legs = []
+    last_known_name = None
+    last_known_coords = None
+
+    for leg in raw_legs:
+        leg_name = leg.get('legName')
+        start, end = split_leg_places(leg_name)
+
+        start_place = gazetteer.lookup(start)
+        end_place = gazetteer.lookup(end)
+        if start_place:
+            start, start_coords = start_place
+        else:
+            start_coords = None
+        if end_place:
+            end, end_coords = end_place
+        else:
+            end_coords = None
+
+        if not start and last_known_name:
+            start = last_known_name
+        if not start_coords and last_known_coords:
+            start_coords = last_known_coords
+            if not start:
+                start = last_known_name
+
+        if not start_coords or not end_coords:
+            # can't map this leg; skip but continue tracking last known
+            if end_coords:
+                last_known_coords = end_coords
+                last_known_name = end or last_known_name
+            continue
+
+        last_known_coords = end_coords
+        last_known_name = end or start or last_known_name
+
+        legs.append({
+            'sequence': leg.get('sequence'),
+            'start': start,
+            'end': end,
+            'start_coords': start_coords,
+            'end_coords': end_coords,
+            'distance': leg.get('distance'),
+            'leg_label': leg_name
+        })
+    return legs
+
+
+def _footprint_metrics(shipment_fp):
+    metrics = {
+        'shipment_id': shipment_fp.get('shipmentId'),
+        'parcel_id': ((shipment_fp.get('scope') or {}).get('parcelId')),
+        'total_emissions': ((shipment_fp.get('totalEmissions') or {}).get('co2e')),
+        'emissions_unit': ((shipment_fp.get('totalEmissions') or {}).get('unit')),
+        'standard': shipment_fp.get('standardsUsed'),
+        'calculated_at': shipment_fp.get('calculationTimestamp')
+    }
+    calc_dt = parse_datetime(metrics['calculated_at']) if metrics['calculated_at'] else None
+    if calc_dt:
+        metrics['calculated_at_human'] = calc_dt.strftime('%Y-%m-%d %H:%M')
+    else:
+        metrics['calculated_at_human'] = metrics['calculated_at']
+    return metrics
+
+
+def _split_breakdown(breakdown):
+    leg_emissions = {}
+    non_leg_hotspots = []
+    for entry in breakdown:
+        activity = entry.get('activity', '')
+        if not activity:
+            continue
+        label = activity.split(':', 1)[-1].strip() if ':' in activity else activity
+        leg_emissions[label] = entry.get('co2e')
+        if 'transport leg' not in activity.lower():
+            non_leg_hotspots.append(entry)
+    return leg_emissions, non_leg_hotspots
+
+
+def build_route_map_from_parts(raw_legs, shipment_fp, gazetteer=None):
+    """
+    Build the Leaflet route map structure from transport legs and the
+    shipment footprint. Returns None when no leg can be placed on the map.
+    """
+    gazetteer = gazetteer or get_gazetteer()
+    legs = _resolve_legs(raw_legs, gazetteer)
+    if not legs:
+        return None
+
+    legs.sort(key=lambda item: item.get('sequence') or 0)
+
+    stops = []
+    seen = set()
+    for leg in legs:
+        if leg['start'] and leg['start'] not in seen:
+            lat, lng = leg['start_coords']
+            stops.append({
+                'name': leg['start'],
+                'lat': lat,
+                'lng': lng,
+                'sequence': leg.get('sequence')
+            })
+            seen.add(leg['start'])
+        if leg['end'] and leg['end'] not in seen:
+            lat, lng = leg['end_coords']
+            stops.append({
+                'name': leg['end'],
+                'lat': lat,
+                'lng': lng,
+                'sequence': (leg.get('sequence') or 0) + 0.1
+            })
+            seen.add(leg['end'])
+
+    stop_coords = np.array([(stop['lat'], stop['lng']) for stop in stops], dtype=float)
+    low = stop_coords.min(axis=0)
+    high = stop_coords.max(axis=0)
+    bounds = [
+        [float(low[0]), float(low[1])],
+        [float(high[0]), float(high[1])]
+    ]
+
+    # Straight-line length is used where the payload does not state a distance
+    geodesic = haversine_km(
+        [leg['start_coords'] for leg in legs],
+        [leg['end_coords'] for leg in legs]
+    )
+
+    shipment_fp = shipment_fp or {}
+    metrics = _footprint_metrics(shipment_fp)
+    leg_emissions, non_leg_hotspots = _split_breakdown(shipment_fp.get('breakdown') or [])
+    emission_index = EmissionIndex(leg_emissions)
+
+    leg_details = []
+    segments = []
+    total_distance = 0
+    for idx, leg in enumerate(legs):
+        total_distance += leg.get('distance') or 0
+        emission_value = emission_index.match(leg['leg_label'], leg['start'], leg['end'])
+        leg_details.append({
+            'sequence': leg.get('sequence'),
+            'label': f"{leg.get('start')} → {leg.get('end')}",
+            'distance': leg.get('distance'),
+            'emissions': emission_value
+        })
+        segments.append({
+            'from': leg['start'],
+            'to': leg['end'],
+            'distance': leg.get('distance'),
+            'geodesic_km': round(float(geodesic[idx]), 1),
+            'coords': [
+                list(leg['start_coords']),
+                list(leg['end_coords'])
+            ],
+            'emissions': emission_value
+        })
+
+    metrics['total_distance'] = total_distance
+
+    return {
+        'stops': stops,
+        'segments': segments,
+        'bounds': bounds,
+        'metrics': metrics,
+        'breakdown': non_leg_hotspots[:4],
+        'leg_details': leg_details
+    }
+
+
+_CHAINS_PREFIX = 'unified.transportChains.'
+_LEGS_SUFFIX = '.transportChainElement.transportLegs.item'
+_FOOTPRINT_PREFIX = 'unified.shipment.shipmentFootprint'
+# Only these leg attributes are needed for the map; the rest is dropped while parsing
+_LEG_FIELDS = ('sequence', 'legName', 'distance')
+# Slice size when parsing an in-memory buffer that is not bytes
+_BUFFER_CHUNK = 64 * 1024
+
+
+class _ChunkReader:
+    """
+    File-like adapter over an iterator of byte chunks (e.g.
+    ``response.iter_content()``) so ijson can parse a download as it streams.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = b''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                break
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _as_source(source):
+    if isinstance(source, str):
+        return source.encode('utf-8')
+    if isinstance(source, bytes) or hasattr(source, 'read'):
+        return source
+    if isinstance(source, (bytearray, memoryview)):
+        # ijson only takes bytes or file objects; read buffers slice by slice
+        view = memoryview(source)
+        return _ChunkReader(
+            view[start:start + _BUFFER_CHUNK].tobytes()
+            for start in range(0, len(view), _BUFFER_CHUNK)
+        )
+    return _ChunkReader(source)
+
+
+def extract_route_parts(source):
+    """
+    Incrementally parse a unified transport-chain document and return
+    (legs, shipment_footprint). Only transport legs (trimmed to the fields
+    the map uses) and the shipment footprint are materialized; everything
+    else in the artifact is skipped as it streams past.
+
+    ``source`` may be a str/bytes body, a binary file object or an iterable
+    of byte chunks. Raises ValueError if the document is not valid JSON.
+    """
+    legs = []
+    footprint = None
+    builder = None
+    builder_prefix = None
+
+    try:
+        for prefix, event, value in ijson.parse(_as_source(source), use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == builder_prefix and event == 'end_map':
+                    if builder_prefix == _FOOTPRINT_PREFIX:
+                        footprint = builder.value
+                    else:
+                        legs.append({k: builder.value.get(k) for k in _LEG_FIELDS})
+                    builder = None
+                continue
+            if event != 'start_map':
+                continue
+            if prefix == _FOOTPRINT_PREFIX or (
+                prefix.startswith(_CHAINS_PREFIX) and prefix.endswith(_LEGS_SUFFIX)
+            ):
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+                builder_prefix = prefix
+    except ijson.JSONError as exc:
+        raise ValueError(f"Invalid transport-chain JSON: {exc}") from exc
+
+    return legs, footprint
+
+
+def build_route_map_from_stream(source):
+    """
+    Build the route map straight from an artifact stream without decoding
+    the whole document. Returns None for invalid or unmappable documents.
+    """
+    try:
+        legs, footprint = extract_route_parts(source)
+    except ValueError:
+        return None
+    return build_route_map_from_parts(legs, footprint)
+
+
+def build_route_map(consumption):
+    """
+    Build the route map for a consumption result whose artifact body is a
+    unified transport-chain JSON document.
+    """
+    preview = (consumption or {}).get('response_preview') or {}
+    # The inline body is only a bounded preview; map the stored full copy
+    with open_artifact(preview.get('key')) as artifact:
+        body = artifact['content'] if artifact else preview.get('body')
+        if not body:
+            return None
+        return build_route_map_from_stream(body)
+
+
+# Emission bands shared with the map legend (kg CO2e per leg)
+EMISSION_BANDS = ((5, 'low'), (15, 'medium'))
+# Pixel tolerance for server-side simplification at a given zoom level
+ROUTE_SIMPLIFY_PIXELS = config('ROUTE_SIMPLIFY_PIXELS', default=1.5, cast=float)
+# Routes with at most this many segments are always sent leg by leg
+ROUTE_SIMPLIFY_MIN_SEGMENTS = config('ROUTE_SIMPLIFY_MIN_SEGMENTS', default=200, cast=int)
+
+
+def emission_band(value):
+    if value is None:
+        return 'unknown'
+    for limit, band in EMISSION_BANDS:
+        if value < limit:
+            return band
+    return 'high'
+
+
+def zoom_tolerance(zoom):
+    """
+    Degrees covered by ROUTE_SIMPLIFY_PIXELS screen pixels at a Web
+    Mercator zoom level.
+    """
+    return ROUTE_SIMPLIFY_PIXELS * 360.0 / (256 * 2 ** max(0, zoom))
+
+
+def simplify_polyline(coords, tolerance):
+    """
+    Douglas-Peucker simplification of a list of [lat, lng] points.
+    """
+    points = np.asarray(coords, dtype=float)
+    if len(points) < 3 or tolerance <= 0:
+        return points.tolist()
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = points[first], points[last]
+        inner = points[first + 1:last]
+        direction = end - start
+        length = np.hypot(direction[0], direction[1])
+        if length == 0:
+            distances = np.hypot(inner[:, 0] - start[0], inner[:, 1] - start[1])
+        else:
+            distances = np.abs(
+                direction[0] * (inner[:, 1] - start[1]) - direction[1] * (inner[:, 0] - start[0])
+            ) / length
+        idx = int(np.argmax(distances))
+        if distances[idx] > tolerance:
+            split = first + 1 + idx
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return points[keep].tolist()
+
+
+def _lnglat(coords):
+    # GeoJSON positions are [longitude, latitude]
+    return [[lng, lat] for lat, lng in coords]
+
+
+def _snap(point, tolerance):
+    return (round(point[0] / tolerance), round(point[1] / tolerance))
+
+
+def _simplified_paths(segments, tolerance):
+    """
+    Reduce segments for display at a given tolerance: legs that overlap once
+    their endpoints are snapped to the tolerance grid are merged (summing
+    their distance and emissions), consecutive connected legs of the same
+    emission band are joined into one path, and each path is simplified.
+    """
+    merged = {}
+    for segment in segments:
+        band = emission_band(segment.get('emissions'))
+        start, end = segment['coords']
+        key = (band, _snap(start, tolerance), _snap(end, tolerance))
+        entry = merged.get(key)
+        if entry is None:
+            entry = merged[key] = {
+                'band': band,
+                'coords': [start, end],
+                'legs': 0,
+                'distance': 0,
+                'emissions': None,
+            }
+        entry['legs'] += 1
+        entry['distance'] += segment.get('distance') or 0
+        if segment.get('emissions') is not None:
+            entry['emissions'] = (entry['emissions'] or 0) + segment['emissions']
+
+    paths = []
+    current = None
+    for entry in merged.values():
+        start, end = entry['coords']
+        connected = current and current['band'] == entry['band'] and current['coords'][-1] == start
+        if not connected:
+            current = dict(entry, coords=[start])
+            paths.append(current)
+        else:
+            current['legs'] += entry['legs']
+            current['distance'] += entry['distance']
+            if entry['emissions'] is not None:
+                current['emissions'] = (current['emissions'] or 0) + entry['emissions']
+        current['coords'].append(end)
+
+    for path in paths:
+        path['coords'] = simplify_polyline(path['coords'], tolerance)
+        if path['emissions'] is not None:
+            path['emissions'] = round(path['emissions'], 3)
+    return paths
+
+
+def route_geojson(route_map, zoom=None):
+    """
+    Convert a route map into a GeoJSON FeatureCollection.
+
+    Segments become LineString features and stops Point features; metrics,
+    leg details and hotspots travel as foreign members under ``properties``.
+    When ``zoom`` is given and the route is long, consecutive legs with the
+    same emission band are merged and simplified for that zoom level.
+    """
+    segments = route_map['segments']
+    features = []
+
+    if zoom is not None and len(segments) > ROUTE_SIMPLIFY_MIN_SEGMENTS:
+        for path in _simplified_paths(segments, zoom_tolerance(zoom)):
+            features.append({
+                'type': 'Feature',
+                'geometry': {'type': 'LineString', 'coordinates': _lnglat(path['coords'])},
+                'properties': {
+                    'kind': 'path',
+                    'band': path['band'],
+                    'legs': path['legs'],
+                    'distance': path['distance'],
+                    'emissions': path['emissions'],
+                },
+            })
+    else:
+        for segment in segments:
+            features.append({
+                'type': 'Feature',
+                'geometry': {'type': 'LineString', 'coordinates': _lnglat(segment['coords'])},
+                'properties': {
+                    'kind': 'leg',
+                    'band': emission_band(segment.get('emissions')),
+                    'from': segment.get('from'),
+                    'to': segment.get('to'),
+                    'distance': segment.get('distance'),
+                    'geodesic_km': segment.get('geodesic_km'),
+                    'emissions': segment.get('emissions'),
+                },
+            })
+
+    for order, stop in enumerate(route_map['stops'], start=1):
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [stop['lng'], stop['lat']]},
+            'properties': {
+                'kind': 'stop',
+                'name': stop['name'],
+                'order': order,
+            },
+        })
+
+    (min_lat, min_lng), (max_lat, max_lng) = route_map['bounds']
+    return {
+        'type': 'FeatureCollection',
+        'bbox': [min_lng, min_lat, max_lng, max_lat],
+        'features': features,
+        'properties': {
+            'zoom': zoom,
+            'simplified': any(f['properties']['kind'] == 'path' for f in features),
+            'metrics': route_map['metrics'],
+            'breakdown': route_map['breakdown'],
+            'leg_details': route_map['leg_details'],
+        },
+    }
+
+
+def looks_like_route_document(body):
+    """
+    Cheap check, without parsing, whether an artifact body may contain a
+    unified transport chain worth offering on the map.
+    """
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    if not body or not hasattr(body, 'find'):
+        return False
+    return body[:64].lstrip()[:1] == b'{' and body.find(b'"transportChains"') != -1
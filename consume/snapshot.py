@@ -0,0 +1,141 @@
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from decouple import config
+
+from .jsonlib import dumps_bytes, loads
+from .offers import OfferRecord
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_PATH = Path(config(
+    'OFFER_SNAPSHOT_PATH',
+    default=str(Path(__file__).resolve().parent.parent / 'var' / 'offer_snapshot.json')
+))
+
+# Fields stored as indexes into the snapshot's shared string table
+_SHARED_FIELDS = ('connector_id', 'catalog_title', 'catalog_description', 'offer_publisher')
+_ROW_FIELDS = (
+    'connector_id',
+    'catalog_title',
+    'catalog_description',
+    'offer_title',
+    'offer_description',
+    'offer_keywords',
+    'offer_publisher',
+    'offer_url',
+    'offer_modified',
+)
+
+logger = logging.getLogger(__name__)
+
+
+def save_offers(offers, path=None):
+    """
+    Persist the last known good offer listing. Strings shared between offers
+    (connector, catalog, publisher, keywords) are written once in a string
+    table and referenced by index. The file is replaced atomically so a
+    concurrent reader never sees a partial snapshot.
+    """
+    path = Path(path or SNAPSHOT_PATH)
+    strings = []
+    index = {}
+
+    def ref(value):
+        if value is None:
+            return None
+        pos = index.get(value)
+        if pos is None:
+            pos = index[value] = len(strings)
+            strings.append(value)
+        return pos
+
+    rows = []
+    for offer in offers:
+        row = []
+        for name in _ROW_FIELDS:
+            value = getattr(offer, name)
+            if name in _SHARED_FIELDS:
+                value = ref(value)
+            elif name == 'offer_keywords':
+                value = [ref(k) for k in value]
+            row.append(value)
+        rows.append(row)
+
+    document = {
+        'version': SNAPSHOT_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'fields': list(_ROW_FIELDS),
+        'strings': strings,
+        'offers': rows,
+    }
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix='.snapshot-')
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(dumps_bytes(document))
+        os.replace(tmp_name, path)
+    except OSError as exc:
+        logger.warning("Could not write offer snapshot %s: %s", path, exc)
+        return False
+
+    logger.info("Wrote offer snapshot %s (%s offers)", path, len(rows))
+    return True
+
+
+def modified_at(path=None):
+    """Modification time of the snapshot file, or None when there is none."""
+    try:
+        return os.stat(Path(path or SNAPSHOT_PATH)).st_mtime
+    except OSError:
+        return None
+
+
+def load_offers(path=None):
+    """
+    Load the last persisted listing.
+
+    Returns (offers, created_at) or (None, None) when no usable snapshot exists.
+    """
+    path = Path(path or SNAPSHOT_PATH)
+    try:
+        with open(path, 'rb') as handle:
+            document = loads(handle.read())
+    except FileNotFoundError:
+        return None, None
+    except (OSError, ValueError) as exc:
+        logger.warning("Ignoring unreadable offer snapshot %s: %s", path, exc)
+        return None, None
+
+    if document.get('version') != SNAPSHOT_VERSION:
+        logger.warning("Ignoring offer snapshot %s with unknown version", path)
+        return None, None
+
+    strings = document.get('strings') or []
+    fields = document.get('fields') or list(_ROW_FIELDS)
+
+    def deref(value):
+        return strings[value] if value is not None else None
+
+    offers = []
+    try:
+        for row in document.get('offers') or []:
+            data = dict(zip(fields, row))
+            for name in _SHARED_FIELDS:
+                data[name] = deref(data.get(name))
+            data['offer_keywords'] = [deref(k) for k in data.get('offer_keywords') or []]
+            offers.append(OfferRecord.from_dict(data))
+    except (IndexError, TypeError) as exc:
+        logger.warning("Ignoring corrupt offer snapshot %s: %s", path, exc)
+        return None, None
+
+    created_at = None
+    try:
+        created_at = datetime.fromisoformat(document.get('created_at'))
+    except (TypeError, ValueError):
+        pass
+
+    return offers, created_at
@@ -0,0 +1,507 @@
+"""
+In-process fake dataspace for offline development and benchmarks.
+
+One HTTP server plays every upstream role the app talks to:
+
+* connector ``/c<N>/connector/api/...`` (catalogs, paged offers, offer
+  details and policy, IDS description/contract, agreements, artifact data)
+  and the broker query it proxies (``/c0/connector/api/ids/query``)
+* Provider UI extras ``/c<N>/connector/api/offers/<id>/extras/``
+* auth service ``/api/auth/me/``
+
+Connector paths are accepted under any number of ``/c<N>[/connector]``
+prefixes, since the app rebuilds returned hrefs under CONNECTOR_BASE.
+
+Sizes, latency, error rates and payload sizes are set with StubConfig;
+``python manage.py run_stub_dataspace`` prints matching .env settings.
+"""
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .benchmarks import synthetic_shipment
+
+ROLES = ('broker', 'connector', 'artifact', 'extras', 'auth')
+AUTH_COOKIE = 'sessionid'
+
+logger = logging.getLogger(__name__)
+
+
+class StubConfig:
+    """
+    Shape and behaviour of the fake dataspace.
+
+    ``latency``/``error_rate`` apply to every role unless overridden in
+    ``role_latency``/``role_error_rate`` (keys from ROLES). Latency is in
+    seconds with ±``jitter`` spread. ``artifact_kind`` is 'shipment',
+    'csv' or 'mixed' (alternating per offer). Every offer has
+    ``artifacts_per_offer`` artifacts, one representation each. With
+    ``fresh_agreements`` every contract request gets a new agreement URL,
+    as a real connector issues.
+    """
+
+    def __init__(self, connectors=3, catalogs=2, offers=10, page_size=20,
+                 latency=0.0, jitter=0.0, error_rate=0.0,
+                 role_latency=None, role_error_rate=None,
+                 artifact_kind='shipment', artifact_legs=50, artifact_rows=1000,
+                 artifacts_per_offer=1, description_padding=0,
+                 fresh_agreements=False, seed=1):
+        self.connectors = connectors
+        self.catalogs = catalogs
+        self.offers = offers
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.role_latency = dict(role_latency or {})
+        self.role_error_rate = dict(role_error_rate or {})
+        self.artifact_kind = artifact_kind
+        self.artifact_legs = artifact_legs
+        self.artifact_rows = artifact_rows
+        self.artifacts_per_offer = max(1, artifacts_per_offer)
+        self.description_padding = description_padding
+        self.fresh_agreements = fresh_agreements
+        self.seed = seed
+
+    def latency_for(self, role):
+        return self.role_latency.get(role, self.latency)
+
+    def error_rate_for(self, role):
+        return self.role_error_rate.get(role, self.error_rate)
+
+
+def _offer_id(connector, catalog, offer):
+    return f"{connector:04d}{catalog:04d}-0000-4000-8000-{offer:012d}"
+
+
+def _catalog_id(connector, catalog):
+    return f"{connector:04d}{catalog:04d}-0000-4000-8000-ca7a1065ca7a"
+
+
+def _artifact_id(offer_id, index):
+    # The first artifact shares the offer's id, further ones get a suffix
+    return offer_id if index == 0 else f"{offer_id}-a{index}"
+
+
+_ARTIFACT_ID = re.compile(r'^(?P<offer>[0-9a-f-]{36})(?:-a(?P<index>\d+))?$')
+# Agreements are the offer id, plus a counter when they are fresh per contract
+_AGREEMENT_ID = re.compile(r'^(?P<offer>[0-9a-f-]{36})(?:-g\d+)?$')
+
+
+# Connector paths may arrive under any number of /c<N>[/connector]
+# prefixes because the app rebuilds hrefs under CONNECTOR_BASE
+_PREFIXED_PATH = re.compile(r'^(?P<prefix>(?:/c\d+(?:/connector)?)*)(?P<path>/.*)$')
+
+
+class StubDataspace:
+    """Generated dataspace content plus the request routing."""
+
+    def __init__(self, config=None):
+        self.config = config or StubConfig()
+        self.base_url = ''
+        self.requests = {role: 0 for role in ROLES}
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+        self._artifacts = {}
+        self._artifact_lock = threading.Lock()
+        self._agreements = 0
+        # offer id -> (connector, catalog, index)
+        self.offers = {}
+        for c in range(self.config.connectors):
+            for k in range(self.config.catalogs):
+                for o in range(self.config.offers):
+                    self.offers[_offer_id(c, k, o)] = (c, k, o)
+        self._routes = [
+            ('POST', r'/api/ids/query', 'broker', self.broker_query),
+            ('GET', r'/api/catalogs', 'connector', self.catalogs),
+            ('GET', r'/api/catalogs/(?P<catalog>[\w-]+)/offers', 'connector', self.catalog_offers),
+            ('GET', r'/api/offers/(?P<offer>[\w-]+)/extras', 'extras', self.extras),
+            ('GET', r'/api/offers/(?P<offer>[\w-]+)/policy', 'connector', self.policy),
+            ('GET', r'/api/offers/(?P<offer>[\w-]+)/catalogs', 'connector', self.offer_catalogs),
+            ('GET', r'/api/offers/(?P<offer>[\w-]+)', 'connector', self.offer),
+            ('POST', r'/api/ids/description', 'connector', self.description),
+            ('POST', r'/api/ids/contract', 'connector', self.contract),
+            ('GET', r'/api/agreements/(?P<offer>[\w-]+)/artifacts', 'connector', self.agreement_artifacts),
+            ('GET', r'/api/artifacts/(?P<artifact>[\w-]+)/data', 'artifact', self.artifact_data),
+            ('GET', r'/api/auth/me', 'auth', self.auth_me),
+        ]
+        self._routes = [
+            (method, re.compile(pattern + '/?$'), role, handler)
+            for method, pattern, role, handler in self._routes
+        ]
+
+    # -- helpers -----------------------------------------------------------
+
+    def connector_base(self, connector=0):
+        return f"{self.base_url}/c{connector}/connector"
+
+    def _random(self):
+        with self._rng_lock:
+            return self._rng.random()
+
+    def _page(self, items, key, query, self_href):
+        page = int((query.get('page') or ['0'])[0])
+        size = int((query.get('size') or [str(self.config.page_size)])[0]) or self.config.page_size
+        total_pages = max(1, -(-len(items) // size))
+        return {
+            '_embedded': {key: items[page * size:(page + 1) * size]},
+            '_links': {'self': {'href': self_href}},
+            'page': {
+                'size': size,
+                'totalElements': len(items),
+                'totalPages': total_pages,
+                'number': page,
+            },
+        }
+
+    def _resource(self, offer_id):
+        c, k, o = self.offers[offer_id]
+        base = self.connector_base(c)
+        return {
+            'title': f'Stub offer {c}-{k}-{o}',
+            'description': f'Synthetic offer {o} of catalog {k} on connector {c}. '
+                           + 'x' * self.config.description_padding,
+            'keywords': [f'kw{o % 7}', 'stub'],
+            'publisher': f'https://participant-{c}.stub.example',
+            'language': 'https://w3id.org/idsa/code/EN',
+            'modificationDate': '2024-01-01T00:00:00.000+0000',
+            '_links': {
+                'self': {'href': f'{base}/api/offers/{offer_id}'},
+                'catalogs': {'href': f'{base}/api/offers/{offer_id}/catalogs{{?page,size}}'},
+            },
+        }
+
+    def _catalog(self, c, k):
+        base = self.connector_base(c)
+        catalog_id = _catalog_id(c, k)
+        return {
+            'title': f'Stub catalog {c}-{k}',
+            'description': f'Catalog {k} of stub connector {c}',
+            '_links': {
+                'self': {'href': f'{base}/api/catalogs/{catalog_id}'},
+                'offers': {'href': f'{base}/api/catalogs/{catalog_id}/offers{{?page,size}}'},
+            },
+        }
+
+    def artifact_ids(self, offer_id):
+        return [_artifact_id(offer_id, n) for n in range(self.config.artifacts_per_offer)]
+
+    def _artifact_offer(self, artifact_id):
+        """(offer id, artifact index) of an artifact id, or None."""
+        match = _ARTIFACT_ID.match(artifact_id)
+        if not match or match.group('offer') not in self.offers:
+            return None
+        index = int(match.group('index') or 0)
+        if index >= self.config.artifacts_per_offer:
+            return None
+        return match.group('offer'), index
+
+    def _artifact_body(self, artifact_id):
+        with self._artifact_lock:
+            cached = self._artifacts.get(artifact_id)
+        if cached is not None:
+            return cached
+
+        offer_id, index = self._artifact_offer(artifact_id)
+        c, k, o = self.offers[offer_id]
+        kind = self.config.artifact_kind
+        if kind == 'mixed':
+            kind = 'csv' if o % 2 else 'shipment'
+        if kind == 'csv':
+            rnd = random.Random(o + index * 7919)
+            lines = ['row,corridor,distance_km,co2e_kg,mode']
+            for row in range(self.config.artifact_rows):
+                lines.append(
+                    f"{row},C{rnd.randint(1, 40)},{rnd.randint(5, 900)},"
+                    f"{'' if row % 17 == 0 else round(rnd.random() * 90, 3)},{rnd.choice(('road', 'rail', 'sea'))}"
+                )
+            body = ('\n'.join(lines) + '\n').encode('utf-8'), 'text/csv; charset=utf-8'
+        else:
+            document = synthetic_shipment(self.config.artifact_legs, seed=o + 1 + index * 7919)
+            body = json.dumps(document).encode('utf-8'), 'application/json'
+
+        with self._artifact_lock:
+            self._artifacts[artifact_id] = body
+        return body
+
+    # -- handlers: each returns (status, body, extra headers) --------------
+
+    def broker_query(self, request, connector):
+        sparql = request['body'].decode('utf-8', errors='replace')
+        limit = re.search(r'LIMIT\s+(\d+)', sparql)
+        offset = re.search(r'OFFSET\s+(\d+)', sparql)
+        title = re.search(r'CONTAINS\(LCASE\(STR\(\?title\)\), LCASE\("((?:[^"\\]|\\.)*)"\)\)', sparql)
+
+        nodes = []
+        for idx in range(self.config.connectors):
+            base = self.connector_base(idx)
+            nodes.append({
+                '@id': f'{self.base_url}/connectors/{idx}',
+                '@type': 'ids:BaseConnector',
+                'title': f'Stub connector {idx}',
+                'description': f'Stub connector {idx} serving {self.config.catalogs} catalogs',
+                'accessURL': f'{base}/api/ids/data',
+                'sameAs': base,
+                'maintainer': f'https://participant-{idx}.stub.example',
+                'resourceCatalog': [f'{base}/api/catalogs/{k}' for k in range(self.config.catalogs)],
+            })
+        if title:
+            needle = title.group(1).lower()
+            nodes = [n for n in nodes if needle in n['title'].lower()]
+        start = int(offset.group(1)) if offset else 0
+        if limit:
+            nodes = nodes[start:start + int(limit.group(1))]
+        if not nodes:
+            return 417, {
+                'message': 'No results',
+                'details': {'reason': {'@id': 'https://w3id.org/idsa/code/NOT_FOUND'}},
+            }, {}
+        return 200, {'@context': {'ids': 'https://w3id.org/idsa/core/'}, '@graph': nodes}, {}
+
+    def _catalog_position(self, catalog_id):
+        head = catalog_id[:8]
+        if not head.isdigit() or catalog_id != _catalog_id(int(head[:4]), int(head[4:])):
+            return None
+        c, k = int(head[:4]), int(head[4:])
+        if c >= self.config.connectors or k >= self.config.catalogs:
+            return None
+        return c, k
+
+    def catalogs(self, request, connector):
+        c = connector
+        items = [self._catalog(c, k) for k in range(self.config.catalogs)]
+        return 200, self._page(items, 'catalogs', request['query'], f'{self.connector_base(c)}/api/catalogs'), {}
+
+    def catalog_offers(self, request, catalog, connector):
+        position = self._catalog_position(catalog)
+        if position is None:
+            return 404, {'message': 'Catalog not found'}, {}
+        c, k = position
+        items = [self._resource(_offer_id(c, k, o)) for o in range(self.config.offers)]
+        href = f'{self.connector_base(c)}/api/catalogs/{catalog}/offers'
+        return 200, self._page(items, 'resources', request['query'], href), {}
+
+    def offer(self, request, offer, connector):
+        if offer not in self.offers:
+            return 404, {'message': 'Offer not found'}, {}
+        return 200, self._resource(offer), {}
+
+    def policy(self, request, offer, connector):
+        if offer not in self.offers:
+            return 404, {'message': 'Offer not found'}, {}
+        return 200, {
+            '@type': 'ids:ContractOffer',
+            'ids:permission': [{'ids:action': [{'@id': 'https://w3id.org/idsa/code/USE'}]}],
+        }, {}
+
+    def offer_catalogs(self, request, offer, connector):
+        if offer not in self.offers:
+            return 404, {'message': 'Offer not found'}, {}
+        c, k, _ = self.offers[offer]
+        href = f'{self.connector_base(c)}/api/offers/{offer}/catalogs'
+        return 200, self._page([self._catalog(c, k)], 'catalogs', request['query'], href), {}
+
+    def description(self, request, connector):
+        element = (request['query'].get('elementId') or [''])[0]
+        position = self._catalog_position(element.rstrip('/').split('/')[-1])
+        if position is None:
+            return 400, {'message': 'Unknown elementId'}, {}
+        c, k = position
+        resources = []
+        for o in range(self.config.offers):
+            offer_id = _offer_id(c, k, o)
+            base = self.connector_base(c)
+            resources.append({
+                '@type': 'ids:Resource',
+                '@id': f'{base}/api/offers/{offer_id}',
+                'ids:title': [{'@value': f'Stub offer {c}-{k}-{o}'}],
+                'ids:contractOffer': [{
+                    '@id': f'{base}/api/contracts/{offer_id}',
+                    'ids:permission': [{
+                        'ids:action': [{'@id': 'https://w3id.org/idsa/code/USE'}],
+                        'ids:target': f'{base}/api/artifacts/{offer_id}',
+                    }],
+                }],
+                'ids:representation': [
+                    {'ids:instance': [{'@id': f'{base}/api/artifacts/{artifact}'}]}
+                    for artifact in self.artifact_ids(offer_id)
+                ],
+            })
+        return 200, {
+            '@type': 'ids:ResourceCatalog',
+            '@id': element,
+            'ids:offeredResource': resources,
+        }, {}
+
+    def contract(self, request, connector):
+        resource = (request['query'].get('resourceIds') or [''])[0]
+        offer = resource.rstrip('/').split('/')[-1]
+        if offer not in self.offers:
+            return 400, {'message': 'Unknown resource'}, {}
+        for artifact in request['query'].get('artifactIds') or []:
+            position = self._artifact_offer(artifact.rstrip('/').split('/')[-1])
+            if position is None or position[0] != offer:
+                return 400, {'message': f'Artifact {artifact} is not part of the resource'}, {}
+        base = self.connector_base(self.offers[offer][0])
+        agreement = offer
+        if self.config.fresh_agreements:
+            with self._rng_lock:
+                self._agreements += 1
+                agreement = f'{offer}-g{self._agreements}'
+        return 201, {
+            '_links': {
+                'self': {'href': f'{base}/api/agreements/{agreement}'},
+                'artifacts': {'href': f'{base}/api/agreements/{agreement}/artifacts{{?page,size,sort}}'},
+            },
+        }, {}
+
+    def agreement_artifacts(self, request, offer, connector):
+        agreement = offer
+        match = _AGREEMENT_ID.match(agreement)
+        offer = match['offer'] if match else None
+        if offer not in self.offers:
+            return 404, {'message': 'Agreement not found'}, {}
+        base = self.connector_base(self.offers[offer][0])
+        items = [
+            {
+                'title': f'Artifact {n} of {offer}',
+                '_links': {
+                    'self': {'href': f'{base}/api/artifacts/{artifact}'},
+                    'data': {'href': f'{base}/api/artifacts/{artifact}/data'},
+                },
+            }
+            for n, artifact in enumerate(self.artifact_ids(offer))
+        ]
+        href = f'{base}/api/agreements/{agreement}/artifacts'
+        return 200, self._page(items, 'artifacts', request['query'], href), {}
+
+    def artifact_data(self, request, artifact, connector):
+        if self._artifact_offer(artifact) is None:
+            return 404, {'message': 'Artifact not found'}, {}
+        body, content_type = self._artifact_body(artifact)
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        if request['headers'].get('If-None-Match') == etag:
+            return 304, b'', {'ETag': etag}
+        return 200, body, {'ETag': etag, 'Content-Type': content_type}
+
+    def extras(self, request, offer, connector):
+        if offer not in self.offers:
+            return 404, b'', {}
+        c, k, o = self.offers[offer]
+        return 200, {
+            'data_model': f'https://models.stub.example/transport/{o % 3}',
+            'purpose_of_use': 'Emission reporting and route analysis',
+        }, {}
+
+    def auth_me(self, request, connector):
+        if AUTH_COOKIE not in request['headers'].get('Cookie', ''):
+            return 401, {'detail': 'Authentication credentials were not provided.'}, {}
+        return 200, {'id': 1, 'username': 'stub-user', 'email': 'stub@example.org'}, {}
+
+    # -- dispatch ----------------------------------------------------------
+
+    def handle(self, method, path, query, headers, body):
+        parts = _PREFIXED_PATH.match(path)
+        prefix, path = parts.group('prefix'), parts.group('path')
+        first = re.match(r'/c(\d+)', prefix)
+        connector = int(first.group(1)) if first else 0
+        for route_method, pattern, role, handler in self._routes:
+            if route_method != method:
+                continue
+            match = pattern.match(path)
+            if not match:
+                continue
+            self.requests[role] += 1
+            delay = self.config.latency_for(role)
+            if delay or self.config.jitter:
+                time.sleep(max(0.0, delay + (self._random() * 2 - 1) * self.config.jitter))
+            if self._random() < self.config.error_rate_for(role):
+                return 503, {'message': f'Injected {role} failure'}, {}
+            request = {'query': query, 'headers': headers, 'body': body}
+            return handler(request, connector=connector, **match.groupdict())
+        return 404, {'message': f'No stub route for {method} {path}'}, {}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _dispatch(self, method):
+        parts = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        status, payload, headers = self.server.dataspace.handle(
+            method, parts.path, parse_qs(parts.query), self.headers, body
+        )
+        if not isinstance(payload, (bytes, bytearray)):
+            payload = json.dumps(payload).encode('utf-8')
+            headers.setdefault('Content-Type', 'application/json')
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if method != 'HEAD':
+            self.wfile.write(payload)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def log_message(self, format, *args):
+        logger.debug("stub %s - %s", self.address_string(), format % args)
+
+
+class StubServer:
+    """A running stub dataspace; use as a context manager or call stop()."""
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.dataspace = StubDataspace(config)
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.dataspace = self.dataspace
+        self.base_url = f"http://{host}:{self.httpd.server_port}"
+        self.dataspace.base_url = self.base_url
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='stub-dataspace', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def env(self):
+        """Settings pointing the app at this stub (see README)."""
+        connector = self.dataspace.connector_base(0)
+        return {
+            'BASE_URL': connector,
+            'CONNECTOR_BASE': connector,
+            'BROKER': f'{self.base_url}/broker/infrastructure',
+            'PROVIDER_UI_BASE': connector,
+            'AUTH_SERVICE_BASE_URL': self.base_url,
+            'AUTHORIZATION': 'Basic c3R1YjpzdHVi',
+        }
+
+    def sample_offer_id(self):
+        return next(iter(self.dataspace.offers))
+
+
+def start_stub_dataspace(config=None, host='127.0.0.1', port=0):
+    """Start a stub dataspace in a background thread and return the StubServer."""
+    return StubServer(config, host=host, port=port).start()
@@ -0,0 +1,290 @@
+import csv
+import io
+import logging
+import random
+
+import ijson
+from decouple import config
+from django.core.cache import cache
+
+# Leading rows shown as-is
+TABULAR_HEAD_ROWS = config('TABULAR_HEAD_ROWS', default=10, cast=int)
+# Rows drawn uniformly from the rest of the artifact
+TABULAR_SAMPLE_ROWS = config('TABULAR_SAMPLE_ROWS', default=10, cast=int)
+TABULAR_MAX_COLUMNS = config('TABULAR_MAX_COLUMNS', default=40, cast=int)
+# Stop scanning after this many rows (the summary is then marked incomplete).
+# The scan runs inside the consume request at roughly 20 µs per row.
+TABULAR_MAX_ROWS = config('TABULAR_MAX_ROWS', default=20000, cast=int)
+# Longest cell value kept for display and min/max of text columns
+CELL_CHARS = 80
+# Summaries are keyed by artifact content hash, so they never go stale
+TABULAR_CACHE_TTL = 24 * 3600
+SNIFF_BYTES = 16 * 1024
+
+logger = logging.getLogger(__name__)
+
+_NULLS = {'', 'null', 'none', 'nan', 'n/a', 'na'}
+_BOOLEANS = {'true': True, 'false': False}
+_NUMBER_START = frozenset('0123456789+-.')
+
+
+def _clip(value):
+    if isinstance(value, str) and len(value) > CELL_CHARS:
+        return value[:CELL_CHARS - 1] + '…'
+    return value
+
+
+def _parse_cell(value):
+    """
+    Interpret a CSV cell: returns (kind, value) with kind one of 'null',
+    'integer', 'number', 'boolean' or 'string'.
+    """
+    text = value.strip()
+    # Only attempt numeric parsing for cells that can start a number
+    if text[:1] in _NUMBER_START:
+        try:
+            return 'integer', int(text)
+        except ValueError:
+            pass
+        try:
+            return 'number', float(text)
+        except ValueError:
+            return 'string', text
+    lowered = text.lower()
+    if lowered in _NULLS:
+        return 'null', None
+    if lowered in _BOOLEANS:
+        return 'boolean', _BOOLEANS[lowered]
+    return 'string', text
+
+
+def _json_cell(value):
+    if value is None:
+        return 'null', None
+    if isinstance(value, bool):
+        return 'boolean', value
+    if isinstance(value, int):
+        return 'integer', value
+    if isinstance(value, float):
+        return 'number', value
+    if isinstance(value, str):
+        return 'string', value
+    return 'object', None
+
+
+class ColumnStats:
+    """Running type, null count and min/max of one column."""
+
+    __slots__ = ('name', 'kinds', 'nulls', 'minimum', 'maximum')
+
+    def __init__(self, name):
+        self.name = name
+        self.kinds = set()
+        self.nulls = 0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, kind, value):
+        if kind == 'null':
+            self.nulls += 1
+            return
+        self.kinds.add(kind)
+        if kind == 'object' or kind == 'boolean':
+            return
+        if kind == 'string':
+            value = _clip(value)
+        # Numbers and strings are compared separately; a mixed column keeps numbers
+        if self.minimum is not None and isinstance(value, str) != isinstance(self.minimum, str):
+            if isinstance(value, str):
+                return
+            self.minimum = self.maximum = None
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    @property
+    def type(self):
+        kinds = self.kinds
+        if not kinds:
+            return 'null'
+        if kinds <= {'integer'}:
+            return 'integer'
+        if kinds <= {'integer', 'number'}:
+            return 'number'
+        if len(kinds) == 1:
+            return next(iter(kinds))
+        return 'mixed'
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'type': self.type,
+            'nulls': self.nulls,
+            'min': self.minimum,
+            'max': self.maximum,
+        }
+
+
+def _lines(content, encoding):
+    """Decoded lines of a bytes/mmap body without copying it whole."""
+    if hasattr(content, 'readline') and hasattr(content, 'seek'):
+        content.seek(0)
+        raw = iter(content.readline, b'')
+    else:
+        raw = io.BytesIO(bytes(content))
+    for line in raw:
+        yield line.decode(encoding, errors='replace')
+
+
+def _csv_rows(content, encoding, dialect):
+    reader = csv.reader(_lines(content, encoding), dialect)
+    header = next(reader, None)
+    if not header:
+        return None, iter(())
+    return header, (list(map(_parse_cell, row)) for row in reader)
+
+
+def _json_rows(content):
+    """
+    Stream the objects of a top-level JSON array. The first object's keys
+    (plus any new keys seen later, while there is room) become the columns.
+    """
+    columns = []
+    seen = set()
+    source = content
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    else:
+        source = bytes(content)
+
+    def rows():
+        for item in ijson.items(source, 'item', use_float=True):
+            if not isinstance(item, dict):
+                raise ValueError("JSON array does not hold objects")
+            for key in item:
+                if key not in seen and len(columns) < TABULAR_MAX_COLUMNS:
+                    seen.add(key)
+                    columns.append(key)
+            yield [_json_cell(item.get(name)) for name in columns]
+
+    return columns, rows()
+
+
+def detect_format(content, content_type=''):
+    """
+    'csv', 'json' or None for artifacts that do not look tabular. Only the
+    first few kilobytes are inspected.
+    """
+    content_type = (content_type or '').lower()
+    head = bytes(content[:SNIFF_BYTES]).lstrip()
+    if not head:
+        return None
+    if head[:1] == b'[':
+        return 'json' if head[1:].lstrip()[:1] == b'{' else None
+    if 'csv' in content_type or 'tab-separated-values' in content_type:
+        return 'csv'
+    if 'json' in content_type or head[:1] in (b'{', b'<'):
+        return None
+    lines = head.split(b'\n')[:5]
+    if len(lines) < 2:
+        return None
+    for delimiter in (b',', b';', b'\t', b'|'):
+        counts = {line.count(delimiter) for line in lines[:-1] if line.strip()}
+        if len(counts) == 1 and counts.pop() > 0:
+            return 'csv'
+    return None
+
+
+def tabular_preview(content, content_type='', encoding='utf-8'):
+    """
+    Summarize a CSV or JSON-array artifact in a single streaming pass: the
+    first TABULAR_HEAD_ROWS rows, a reservoir sample of TABULAR_SAMPLE_ROWS
+    of the remaining rows, and per-column type, null count and min/max.
+
+    Returns None when the artifact is not tabular or cannot be read as such.
+    """
+    kind = detect_format(content, content_type)
+    if kind is None:
+        return None
+
+    try:
+        if kind == 'csv':
+            sample = bytes(content[:SNIFF_BYTES]).decode(encoding, errors='replace')
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+            except csv.Error:
+                dialect = csv.excel
+            header, rows = _csv_rows(content, encoding, dialect)
+            if header is None:
+                return None
+            columns = [_clip(name.strip()) or f"column_{i + 1}" for i, name in enumerate(header)]
+            columns = columns[:TABULAR_MAX_COLUMNS]
+        else:
+            columns, rows = _json_rows(content)
+
+        stats = []
+        head = []
+        reservoir = []
+        rng = random.Random(0)
+        count = 0
+        complete = True
+        for row in rows:
+            if count >= TABULAR_MAX_ROWS:
+                complete = False
+                break
+            while len(stats) < len(columns):
+                column = ColumnStats(columns[len(stats)])
+                # A JSON key first seen now was missing from earlier rows
+                column.nulls = count
+                stats.append(column)
+            cells = row[:len(columns)]
+            for column, (cell_kind, value) in zip(stats, cells):
+                column.add(cell_kind, value)
+            # Short rows count their missing cells as nulls
+            for column in stats[len(cells):]:
+                column.nulls += 1
+
+            display = [_clip(value) for _, value in cells]
+            if count < TABULAR_HEAD_ROWS:
+                head.append(display)
+            elif len(reservoir) < TABULAR_SAMPLE_ROWS:
+                reservoir.append((count, display))
+            else:
+                slot = rng.randrange(count - TABULAR_HEAD_ROWS + 1)
+                if slot < TABULAR_SAMPLE_ROWS:
+                    reservoir[slot] = (count, display)
+            count += 1
+    except (csv.Error, ijson.JSONError, ValueError) as exc:
+        logger.info("Artifact is not readable as %s table: %s", kind, exc)
+        return None
+
+    if not columns or not count:
+        return None
+
+    width = len(columns)
+    return {
+        'format': kind,
+        'columns': [column.as_dict() for column in stats] or [ColumnStats(c).as_dict() for c in columns],
+        'head': [cells + [None] * (width - len(cells)) for cells in head],
+        'sample': [
+            {'row': index + 1, 'cells': cells + [None] * (width - len(cells))}
+            for index, cells in sorted(reservoir)
+        ],
+        'rows': count,
+        'complete': complete,
+    }
+
+
+def cached_tabular_preview(key, content, content_type='', encoding='utf-8'):
+    """
+    tabular_preview() memoized per artifact content hash, so re-consuming
+    an unchanged artifact does not rescan it.
+    """
+    cache_key = f"consume:table:{key}"
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached.get('table')
+    table = tabular_preview(content, content_type, encoding)
+    cache.set(cache_key, {'table': table}, TABULAR_CACHE_TTL)
+    return table
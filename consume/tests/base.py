@@ -0,0 +1,48 @@
+from contextlib import ExitStack
+
+from django.test import TestCase, override_settings
+
+from .. import connector, snapshot
+from ..benchsuite import reset_caches, stub_environment
+from ..stubs import StubConfig
+
+
+class StubDataspaceTestCase(TestCase):
+    """
+    Runs the tests of a class against one stub dataspace (connector, broker,
+    provider UI and auth service on a local port) with a scratch snapshot
+    and artifact store.
+    """
+
+    stub_config = StubConfig(connectors=2, catalogs=2, offers=3, page_size=2)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._stack = ExitStack()
+        cls.server = cls._stack.enter_context(stub_environment(cls.stub_config))
+        cls._stack.enter_context(override_settings(
+            AUTH_SERVICE_BASE_URL=cls.server.env()['AUTH_SERVICE_BASE_URL']
+        ))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._stack.close()
+        super().tearDownClass()
+
+    def setUp(self):
+        reset_caches()
+        # Every test crawls live instead of loading an earlier test's snapshot
+        snapshot.SNAPSHOT_PATH.unlink(missing_ok=True)
+        for role in self.server.dataspace.requests:
+            self.server.dataspace.requests[role] = 0
+
+    def get(self, path, **extra):
+        # The session middleware drops the cookie it does not know; the
+        # stub auth service accepts any session
+        self.client.cookies['sessionid'] = 'test-session'
+        return self.client.get(path, **extra)
+
+    def consume(self, offer_id=None):
+        offer_id = offer_id or self.server.sample_offer_id()
+        return connector.runner(f"{connector.BASE_URL}api/offers/{offer_id}")
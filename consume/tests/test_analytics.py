@@ -0,0 +1,77 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from .. import analytics, connector
+from ..models import ConsumedShipment, ShipmentLeg
+from ..stubs import StubConfig
+from .base import StubDataspaceTestCase
+
+ROUTE_MAP = {
+    'metrics': {
+        'shipment_id': 'S-1',
+        'total_emissions': '16.5',
+        'emissions_unit': 'kg',
+        'standard': ['GLEC', 'ISO 14083'],
+        'calculated_at': '2026-01-02T03:04:05Z',
+        'total_distance': 140.5,
+    },
+    'segments': [
+        {'from': 'Kokkola', 'to': 'Seinäjoki', 'distance': 140.5, 'emissions': 16.5},
+    ],
+    'leg_details': [{'sequence': 1}],
+}
+
+
+class RecordRouteMapTests(TestCase):
+
+    def test_metrics_and_legs_are_stored(self):
+        shipment = analytics.record_route_map('a' * 64, ROUTE_MAP, offer_id='offer')
+
+        self.assertEqual(shipment.shipment_id, 'S-1')
+        self.assertEqual(shipment.total_emissions, 16.5)
+        self.assertEqual(shipment.standard, 'GLEC, ISO 14083')
+        self.assertIsNotNone(shipment.calculated_at)
+        leg = shipment.legs.get()
+        self.assertEqual(leg.corridor, 'Kokkola → Seinäjoki')
+        self.assertEqual(leg.sequence, 1)
+
+    def test_same_content_is_stored_once(self):
+        first = analytics.record_route_map('a' * 64, ROUTE_MAP, agreement_url='agreement-1')
+        second = analytics.record_route_map('a' * 64, ROUTE_MAP, agreement_url='agreement-2')
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(ShipmentLeg.objects.count(), 1)
+
+    def test_empty_route_map_is_not_stored(self):
+        self.assertIsNone(analytics.record_route_map('a' * 64, {}))
+        self.assertFalse(ConsumedShipment.objects.exists())
+
+
+class ConsumptionRecordingTests(StubDataspaceTestCase):
+
+    stub_config = StubConfig(connectors=1, catalogs=1, offers=2, artifacts_per_offer=3,
+                             fresh_agreements=True)
+
+    def test_shipments_are_recorded_once_across_fresh_agreements(self):
+        with mock.patch.object(
+            connector, 'record_consumption', wraps=analytics.record_consumption
+        ) as record_consumption:
+            result = self.consume()
+            self.consume()
+
+        agreements = [call.args[1] for call in record_consumption.call_args_list]
+        self.assertEqual(len(set(agreements)), 2)
+        shipments = ConsumedShipment.objects.filter(
+            route_key__in=[artifact['key'] for artifact in result['artifacts']]
+        )
+        self.assertEqual(shipments.count(), 3)
+        self.assertEqual(len({shipment.agreement_url for shipment in shipments}), 1)
+
+    def test_recorded_content_is_not_parsed_again(self):
+        self.consume()
+
+        with mock.patch.object(analytics, 'cached_route_map') as cached_route_map:
+            self.consume()
+
+        cached_route_map.assert_not_called()
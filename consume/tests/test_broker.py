@@ -0,0 +1,207 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .. import broker
+
+
+class CanonicalUrlTests(SimpleTestCase):
+
+    def test_spellings_of_one_location_compare_equal(self):
+        spellings = [
+            'https://Connector.Example/api/',
+            'https://connector.example:443/api',
+            'HTTPS://connector.example/api//',
+        ]
+
+        self.assertEqual(
+            {broker.canonical_url(url) for url in spellings},
+            {'https://connector.example/api'}
+        )
+
+    def test_non_default_port_and_user_are_kept(self):
+        self.assertEqual(
+            broker.canonical_url('http://admin@Host:8080/x/'),
+            'http://admin@host:8080/x'
+        )
+
+    def test_empty_values_pass_through(self):
+        self.assertEqual(broker.canonical_url(''), '')
+        self.assertIsNone(broker.canonical_url(None))
+
+
+class MergeGraphsTests(SimpleTestCase):
+
+    def test_same_connector_from_two_brokers_is_merged(self):
+        first = {
+            '@context': {'ids': 'https://w3id.org/idsa/core/'},
+            '@graph': [{
+                '@id': 'https://c1.example/',
+                'title': 'Connector 1',
+                'sameAs': 'https://c1.example/connector',
+                'resourceCatalog': ['https://c1.example/api/catalogs/a'],
+            }],
+        }
+        second = {'@graph': [{
+            '@id': 'https://C1.example',
+            'description': 'Seen by the second broker',
+            'sameAs': ['https://c1.example/connector', 'https://c1-alias.example/connector'],
+            'resourceCatalog': 'https://c1.example/api/catalogs/b',
+        }]}
+
+        merged = broker.merge_graphs([first, second])
+
+        self.assertEqual(merged['@context'], first['@context'])
+        [node] = merged['@graph']
+        self.assertEqual(node['title'], 'Connector 1')
+        self.assertEqual(node['description'], 'Seen by the second broker')
+        self.assertEqual(
+            node['sameAs'],
+            ['https://c1.example/connector', 'https://c1-alias.example/connector']
+        )
+        self.assertEqual(
+            node['resourceCatalog'],
+            ['https://c1.example/api/catalogs/a', 'https://c1.example/api/catalogs/b']
+        )
+
+    def test_distinct_connectors_are_kept_apart(self):
+        merged = broker.merge_graphs([
+            {'@graph': [{'@id': 'https://c1.example'}]},
+            {'@graph': [{'@id': 'https://c2.example'}]},
+        ])
+
+        self.assertEqual(len(merged['@graph']), 2)
+        self.assertNotIn('@context', merged)
+
+    def test_graph_nodes_accepts_every_response_shape(self):
+        node = {'@id': 'https://c1.example'}
+
+        self.assertEqual(broker.graph_nodes({'@graph': [node]}), [node])
+        self.assertEqual(broker.graph_nodes(node), [node])
+        self.assertEqual(broker.graph_nodes([node]), [node])
+        self.assertEqual(broker.graph_nodes({'@graph': None}), [])
+        self.assertEqual(broker.graph_nodes('nonsense'), [])
+
+
+class GetAllConnectorsTests(SimpleTestCase):
+
+    def setUp(self):
+        broker._broker_cache.clear()
+        self.addCleanup(broker._broker_cache.clear)
+
+    @mock.patch.object(broker, 'BROKERS', [])
+    @mock.patch.object(broker, '_query_connectors')
+    def test_no_broker_configured_is_an_error(self, query):
+        with self.assertLogs('consume.broker', 'ERROR'):
+            result = broker.get_all_connectors()
+
+        self.assertTrue(broker.is_error(result))
+        query.assert_not_called()
+
+    @mock.patch.object(broker, 'BROKERS', ['https://b1.example', 'https://b2.example'])
+    def test_failing_broker_is_skipped(self):
+        results = {
+            'https://b1.example': {'error': 'Broker unreachable'},
+            'https://b2.example': {'@graph': [{'@id': 'https://c1.example'}]},
+        }
+
+        with mock.patch.object(broker, '_query_connectors', lambda b, f: results[b]), \
+                self.assertLogs('consume.broker', 'WARNING'):
+            merged = broker.get_all_connectors()
+
+        self.assertEqual(broker.graph_nodes(merged), [{'@id': 'https://c1.example'}])
+
+    @mock.patch.object(broker, 'BROKERS', ['https://b1.example'])
+    def test_successful_response_is_cached(self):
+        graph = {'@graph': [{'@id': 'https://c1.example'}]}
+
+        with mock.patch.object(broker, '_query_connectors', return_value=graph) as query:
+            broker.get_all_connectors()
+            broker.get_all_connectors()
+            broker.get_all_connectors(refresh=True)
+
+        self.assertEqual(query.call_count, 2)
+
+
+class BuildConnectorQueryTests(SimpleTestCase):
+
+    def test_unpaged_query_has_no_subselect(self):
+        query = broker.build_connector_query()
+
+        self.assertIn('CONSTRUCT', query)
+        self.assertNotIn('SELECT DISTINCT', query)
+        self.assertNotIn('LIMIT', query)
+        self.assertIn('OPTIONAL {', query)
+
+    def test_paging_applies_to_connectors_in_a_stable_order(self):
+        query = broker.build_connector_query(limit=50, offset=100)
+
+        subselect = query[query.index('SELECT DISTINCT ?connector'):]
+        self.assertIn('ORDER BY ?connector', subselect)
+        self.assertIn('LIMIT 50', subselect)
+        self.assertIn('OFFSET 100', subselect)
+
+    def test_first_page_has_no_offset(self):
+        self.assertNotIn('OFFSET', broker.build_connector_query(limit=50, offset=0))
+
+    def test_filters_are_escaped_sparql_strings(self):
+        query = broker.build_connector_query(
+            maintainer='https://participant.example',
+            title_contains='say "hi"\n',
+            require_catalog=True,
+        )
+
+        self.assertIn('FILTER(STR(?maintainer) = "https://participant.example")', query)
+        self.assertIn('LCASE("say \\"hi\\"\\n")', query)
+        self.assertNotIn('OPTIONAL {\n    ?connector ids:resourceCatalog', query)
+
+
+@mock.patch.object(broker, 'BROKER_PAGE_SIZE', 2)
+@mock.patch.object(broker, 'BROKER_PAGE_PARALLEL', 3)
+class QueryConnectorsTests(SimpleTestCase):
+
+    def broker_with(self, connectors):
+        """A fake _post_query over ``connectors`` nodes; records the offsets asked for."""
+        self.offsets = []
+
+        def post_query(recipient, sparql):
+            offset = int(sparql.split('OFFSET ')[1].split()[0]) if 'OFFSET' in sparql else 0
+            self.offsets.append(offset)
+            nodes = [{'@id': f'https://c{n}.example'} for n in range(offset, min(offset + 2, connectors))]
+            return {'@graph': nodes}
+
+        return mock.patch.object(broker, '_post_query', side_effect=post_query)
+
+    def test_small_broker_gets_a_single_query(self):
+        with self.broker_with(1):
+            result = broker._query_connectors('https://b.example', {})
+
+        self.assertEqual(self.offsets, [0])
+        self.assertEqual(len(broker.graph_nodes(result)), 1)
+
+    def test_full_first_page_fans_out_and_stops_at_the_short_page(self):
+        with self.broker_with(5):
+            result = broker._query_connectors('https://b.example', {})
+
+        self.assertEqual(sorted(self.offsets), [0, 2, 4, 6])
+        self.assertEqual(len(broker.graph_nodes(result)), 5)
+
+    def test_exact_multiple_ends_on_an_empty_page(self):
+        with self.broker_with(2):
+            result = broker._query_connectors('https://b.example', {})
+
+        self.assertEqual(sorted(self.offsets), [0, 2, 4, 6])
+        self.assertEqual(len(broker.graph_nodes(result)), 2)
+
+    @mock.patch.object(broker, 'BROKER_MAX_PAGES', 2)
+    def test_paging_stops_at_max_pages(self):
+        with self.broker_with(100), self.assertLogs('consume.broker', 'WARNING'):
+            result = broker._query_connectors('https://b.example', {})
+
+        self.assertEqual(sorted(self.offsets), [0, 2])
+        self.assertEqual(len(broker.graph_nodes(result)), 4)
+
+    def test_failing_page_fails_the_broker(self):
+        error = {'error': 'Broker returned error', 'status_code': 503}
+        with mock.patch.object(broker, '_post_query', return_value=error):
+            self.assertEqual(broker._query_connectors('https://b.example', {}), error)
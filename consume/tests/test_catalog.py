@@ -0,0 +1,88 @@
+from django.urls import reverse
+
+from .. import broker, catalog, snapshot
+from ..benchsuite import reset_caches
+from .base import StubDataspaceTestCase
+
+
+class ListingCrawlTests(StubDataspaceTestCase):
+
+    def test_offers_api_lists_every_offer_of_every_connector(self):
+        response = self.get(reverse('consume:offers_api'))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        cfg = self.stub_config
+        self.assertEqual(data['count'], cfg.connectors * cfg.catalogs * cfg.offers)
+        self.assertEqual(data['source'], 'live')
+        self.assertFalse(data['stale'])
+
+    def test_listing_is_served_from_memory_after_the_crawl(self):
+        self.get(reverse('consume:offers_api'))
+        requests = self.server.dataspace.requests
+        crawled = (requests['broker'], requests['connector'])
+
+        response = self.get(reverse('consume:connector_offers'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((requests['broker'], requests['connector']), crawled)
+
+
+
+    def test_cold_worker_serves_the_snapshot_without_crawling(self):
+        self.get(reverse('consume:offers_api'))
+        reset_caches()
+        requests = self.server.dataspace.requests
+        crawled = (requests['broker'], requests['connector'])
+
+        listing = catalog.get_listing()
+
+        self.assertEqual(listing['source'], 'snapshot')
+        self.assertFalse(listing['stale'])
+        self.assertEqual((requests['broker'], requests['connector']), crawled)
+
+
+class DegradedListingTests(StubDataspaceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.offers = catalog.get_listing()['offers']
+        # The listing has expired and the broker is down from here on
+        catalog._listing['loaded_at'] = None
+        broker._broker_cache.clear()
+        self.server.dataspace.config.role_error_rate['broker'] = 1.0
+        self.addCleanup(self.server.dataspace.config.role_error_rate.pop, 'broker')
+
+    def test_failed_crawl_keeps_serving_the_last_listing_as_stale(self):
+        listing = catalog.get_listing()
+
+        self.assertTrue(listing['stale'])
+        self.assertTrue(listing['error'])
+        self.assertEqual(listing['offers'], self.offers)
+
+    def test_cold_worker_serves_the_snapshot_while_the_broker_is_down(self):
+        reset_caches()
+
+        response = self.get(reverse('consume:offers_api'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], len(self.offers))
+        self.assertEqual(response.json()['source'], 'snapshot')
+
+    def test_failed_crawl_without_snapshot_is_an_error(self):
+        reset_caches()
+        snapshot.SNAPSHOT_PATH.unlink()
+
+        response = self.get(reverse('consume:offers_api'))
+
+        self.assertEqual(response.status_code, 502)
+        self.assertTrue(response.json()['error'])
+
+    def test_failed_crawl_is_not_retried_before_the_retry_interval(self):
+        catalog.get_listing()
+        failed = self.server.dataspace.requests['broker']
+
+        listing = catalog.get_listing()
+
+        self.assertTrue(listing['stale'])
+        self.assertEqual(self.server.dataspace.requests['broker'], failed)
@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from ..conditional import make_etag, not_modified, viewer, with_validators
+from .base import StubDataspaceTestCase
+
+MODIFIED = datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class ValidatorTests(SimpleTestCase):
+
+    def test_etag_depends_on_every_part_and_the_fragment_version(self):
+        etag = make_etag('listing', 1.5, b'raw')
+
+        self.assertRegex(etag, r'^"[0-9a-f]{32}"$')
+        self.assertEqual(etag, make_etag('listing', 1.5, b'raw'))
+        self.assertNotEqual(etag, make_etag('listing', 1.5))
+        self.assertNotEqual(make_etag('a', 'b'), make_etag('ab'))
+        with override_settings(TEMPLATE_FRAGMENT_VERSION=2):
+            self.assertNotEqual(etag, make_etag('listing', 1.5, b'raw'))
+
+    def test_not_modified_for_a_matching_etag_or_date(self):
+        etag = make_etag('x')
+        factory = RequestFactory()
+
+        response = not_modified(factory.get('/', HTTP_IF_NONE_MATCH=etag), etag, MODIFIED)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(
+            not_modified(factory.get('/', HTTP_IF_MODIFIED_SINCE='Thu, 01 Oct 2026 12:00:00 GMT'),
+                         etag, MODIFIED).status_code,
+            304
+        )
+        self.assertIsNone(not_modified(factory.get('/', HTTP_IF_NONE_MATCH='"old"'), etag, MODIFIED))
+        self.assertIsNone(not_modified(factory.get('/'), etag))
+
+    def test_validated_responses_are_private_and_vary_by_cookie(self):
+        response = with_validators(HttpResponse(), '"e"', MODIFIED)
+
+        self.assertEqual(response['Last-Modified'], 'Thu, 01 Oct 2026 12:00:00 GMT')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_viewer(self):
+        request = RequestFactory().get('/')
+        self.assertIsNone(viewer(request))
+        request.auth_profile = {'id': 1, 'name': 'A', 'email': 'a@x', 'username': 'a', 'token': 't'}
+        self.assertEqual(viewer(request), (1, 'A', 'a@x', 'a'))
+
+
+class ConditionalGetTests(StubDataspaceTestCase):
+
+    def test_offers_api_answers_304_for_a_current_etag(self):
+        first = self.get(reverse('consume:offers_api'))
+        self.assertTrue(first.has_header('ETag'))
+
+        second = self.get(reverse('consume:offers_api'), HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b'')
+
+    def test_listing_page_answers_304_for_a_current_etag(self):
+        first = self.get(reverse('consume:connector_offers'))
+        self.assertEqual(first.status_code, 200)
+
+        second = self.get(reverse('consume:connector_offers'), HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(second.status_code, 304)
+
+    def test_stale_etag_gets_the_full_response(self):
+        response = self.get(reverse('consume:offers_api'), HTTP_IF_NONE_MATCH='"outdated"')
+
+        self.assertEqual(response.status_code, 200)
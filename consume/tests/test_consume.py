@@ -0,0 +1,66 @@
+import json
+from unittest import mock
+
+from django.urls import reverse
+
+from .. import connector
+from ..stubs import StubConfig
+from .base import StubDataspaceTestCase
+
+
+class ConsumePipelineTests(StubDataspaceTestCase):
+
+    stub_config = StubConfig(connectors=1, catalogs=1, offers=2, artifacts_per_offer=3)
+
+    def test_runner_fetches_and_previews_every_artifact(self):
+        result = self.consume()
+
+        self.assertEqual(
+            [step['label'] for step in result['steps']],
+            ['Offer discovery', 'Catalog lookup', 'Description request',
+             'Contract negotiation', 'Artifact agreement', 'Artifact retrieval']
+        )
+        self.assertEqual(len(result['artifacts']), 3)
+        self.assertEqual(self.server.dataspace.requests['artifact'], 3)
+        for artifact in result['artifacts']:
+            self.assertEqual(artifact['source'], 'downloaded')
+            self.assertEqual(artifact['preview']['key'], artifact['key'])
+            self.assertIn(artifact['artifact_url'], artifact['curl_command'])
+        self.assertEqual(result['response_preview'], result['artifacts'][0]['preview'])
+
+    def test_second_run_reuses_the_stored_artifacts(self):
+        self.consume()
+
+        result = self.consume()
+
+        self.assertEqual(
+            [artifact['source'] for artifact in result['artifacts']],
+            ['revalidated'] * 3
+        )
+
+    # The pipeline thread cannot write past the test's open transaction
+    @mock.patch.object(connector, 'record_consumption')
+    def test_streamed_consumption_ends_with_a_link_to_the_result(self, record_consumption):
+        offer_id = self.server.sample_offer_id()
+
+        response = self.get(reverse('consume:consume_stream', args=[offer_id]))
+        frames = b''.join(response.streaming_content).decode()
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(frames.count('event: step'), 6)
+        done = frames.split('event: done', 1)[1]
+        url = json.loads(done.split('data: ', 1)[1].split('\n', 1)[0])['url']
+        page = self.get(url)
+        self.assertEqual(page.status_code, 200)
+        self.assertContains(page, 'Artifact 3 of 3')
+
+    def test_offer_page_shows_every_artifact_and_its_route_map(self):
+        # Not the sample offer, whose first download the runner tests expect
+        offer_id = [offer for offer in self.server.dataspace.offers if offer != self.server.sample_offer_id()][0]
+
+        page = self.get(reverse('consume:selected_offer', args=[offer_id]), data={'consume': '1'})
+
+        self.assertEqual(page.status_code, 200)
+        for n in (1, 2, 3):
+            self.assertContains(page, f'Artifact {n} of 3')
+        self.assertContains(page, 'class="route-analysis', count=3)
@@ -0,0 +1,47 @@
+from django.test import SimpleTestCase
+
+from ..stubs import StubConfig, StubDataspace
+
+
+class StubDataspaceRoutingTests(SimpleTestCase):
+
+    def setUp(self):
+        self.dataspace = StubDataspace(StubConfig(connectors=3, catalogs=1, offers=2))
+        self.dataspace.base_url = 'http://stub'
+
+    def handle(self, method, path, query=None, headers=None, body=b''):
+        return self.dataspace.handle(method, path, query or {}, headers or {}, body)
+
+    def test_broker_query_honours_limit_and_offset(self):
+        status, body, _ = self.handle(
+            'POST', '/c0/connector/api/ids/query', body=b'SELECT ... LIMIT 2 OFFSET 2'
+        )
+
+        self.assertEqual(status, 200)
+        self.assertEqual([node['title'] for node in body['@graph']], ['Stub connector 2'])
+        self.assertEqual(self.dataspace.requests['broker'], 1)
+
+    def test_broker_query_past_the_end_answers_no_results(self):
+        status, _, _ = self.handle(
+            'POST', '/c0/connector/api/ids/query', body=b'SELECT ... LIMIT 2 OFFSET 4'
+        )
+
+        self.assertEqual(status, 417)
+
+    def test_artifact_answers_304_for_its_etag(self):
+        offer_id = next(iter(self.dataspace.offers))
+        artifact = self.dataspace.artifact_ids(offer_id)[0]
+        path = f'/c0/connector/api/artifacts/{artifact}/data'
+        _, body, headers = self.handle('GET', path)
+
+        status, _, _ = self.handle('GET', path, headers={'If-None-Match': headers['ETag']})
+
+        self.assertTrue(body)
+        self.assertEqual(status, 304)
+
+    def test_auth_service_needs_a_session_cookie(self):
+        self.assertEqual(self.handle('GET', '/api/auth/me')[0], 401)
+        self.assertEqual(self.handle('GET', '/api/auth/me', headers={'Cookie': 'sessionid=x'})[0], 200)
+
+    def test_unknown_path_is_404(self):
+        self.assertEqual(self.handle('GET', '/c0/connector/api/nothing')[0], 404)
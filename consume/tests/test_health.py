@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.urls import reverse
+
+from .. import connector, health
+from .base import StubDataspaceTestCase
+
+
+class HealthTests(StubDataspaceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.dict(health._results, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_liveness_needs_no_session_or_upstream(self):
+        response = self.client.get(reverse('health'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'ok')
+        self.assertEqual(sum(self.server.dataspace.requests.values()), 0)
+
+    def test_readiness_without_prober_reports_ready(self):
+        response = self.client.get(reverse('health_ready'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['required'], [])
+
+    @mock.patch.object(health, 'HEALTH_PROBE_INTERVAL', 30)
+    @mock.patch.object(health, 'HEALTH_STALE_AFTER', 90)
+    def test_readiness_follows_the_probe_results(self):
+        self.assertEqual(self.client.get(reverse('health_ready')).status_code, 503)
+
+        results = health.run_probes()
+        response = self.client.get(reverse('health_ready'))
+
+        self.assertTrue(all(results[name]['ok'] for name in health.HEALTH_REQUIRED))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'ready')
+
+    @mock.patch.object(health, 'HEALTH_PROBE_INTERVAL', 30)
+    @mock.patch.object(health, 'HEALTH_STALE_AFTER', 90)
+    def test_unreachable_connector_is_not_ready(self):
+        with mock.patch.object(connector, 'CONNECTOR_BASE', 'http://127.0.0.1:9/'):
+            health.run_probes()
+
+        response = self.client.get(reverse('health_ready'))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('connector: unreachable', response.json()['failing'])
+
+    @mock.patch.object(health, 'HEALTH_PROBE_INTERVAL', 30)
+    @mock.patch.object(health, 'HEALTH_STALE_AFTER', 90)
+    def test_stale_probe_results_are_not_ready(self):
+        health.run_probes()
+
+        with mock.patch.object(health.time, 'time', return_value=health.time.time() + 91):
+            ready, report = health.readiness()
+
+        self.assertFalse(ready)
+        self.assertIn('connector: probe result stale', report['failing'])
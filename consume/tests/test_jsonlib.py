@@ -0,0 +1,59 @@
+import json
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .. import jsonlib
+
+VALUE = {'title': 'Kokkola → Seinäjoki', 'legs': [1, 2.5, None, True], 'nested': {'a': []}}
+
+
+class BackendTestsMixin:
+    """The same behaviour is expected from either backend."""
+
+    use_orjson = False
+
+    def setUp(self):
+        patcher = mock.patch.object(jsonlib, '_use_orjson', self.use_orjson)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_round_trip(self):
+        self.assertEqual(jsonlib.loads(jsonlib.dumps(VALUE)), VALUE)
+        self.assertEqual(jsonlib.loads(jsonlib.dumps_bytes(VALUE)), VALUE)
+        self.assertEqual(jsonlib.dumps(VALUE), json.dumps(VALUE, separators=(',', ':'), ensure_ascii=False))
+
+    def test_pretty_matches_stdlib_indent(self):
+        self.assertEqual(jsonlib.dumps(VALUE, pretty=True), json.dumps(VALUE, indent=2, ensure_ascii=False))
+
+    def test_values_the_fast_path_rejects_fall_back(self):
+        self.assertEqual(jsonlib.loads(jsonlib.dumps({1: 'a'})), {'1': 'a'})
+        self.assertEqual(jsonlib.loads(jsonlib.dumps([2 ** 70])), [2 ** 70])
+        self.assertEqual(jsonlib.dumps(Decimal('1.5')), '"1.5"')
+
+    def test_non_utf8_bytes_are_decoded(self):
+        self.assertEqual(jsonlib.loads(json.dumps(VALUE).encode('utf-16')), VALUE)
+
+    def test_invalid_json_raises_the_common_error(self):
+        with self.assertRaises(jsonlib.JSONDecodeError):
+            jsonlib.loads(b'{"a": ')
+        with self.assertRaises(jsonlib.JSONDecodeError):
+            jsonlib.loads('{"a": ')
+
+    def test_json_response(self):
+        response = jsonlib.json_response(VALUE, status=201, content_type='application/geo+json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Content-Type'], 'application/geo+json')
+        self.assertEqual(json.loads(response.content), VALUE)
+
+
+class StdlibBackendTests(BackendTestsMixin, SimpleTestCase):
+    use_orjson = False
+
+
+@unittest.skipIf(jsonlib.orjson is None, 'orjson is not installed')
+class OrjsonBackendTests(BackendTestsMixin, SimpleTestCase):
+    use_orjson = True
@@ -0,0 +1,56 @@
+from django.test import SimpleTestCase
+
+from ..offers import OfferRecord
+
+
+def _resource(offer_id, **fields):
+    return dict({
+        'title': f'Offer {offer_id}',
+        'description': 'Transport chain',
+        'keywords': ['transport', 'emissions'],
+        'publisher': 'https://provider.example',
+        'modificationDate': '2024-01-01T00:00:00Z',
+        '_links': {'self': {'href': f'https://connector.example/api/offers/{offer_id}'}},
+    }, **fields)
+
+
+class OfferRecordTests(SimpleTestCase):
+
+    def test_from_resource_reads_the_catalog_entry(self):
+        record = OfferRecord.from_resource('connector-1', 'Catalog', 'About', _resource('abc'))
+
+        self.assertEqual(record.offer_id, 'abc')
+        self.assertEqual(record.offer_title, 'Offer abc')
+        self.assertEqual(record.offer_keywords, ('transport', 'emissions'))
+        self.assertEqual(record.offer_modified, '2024-01-01T00:00:00Z')
+
+    def test_repeated_strings_share_one_copy(self):
+        # Built at runtime so the compiler cannot fold them into one constant
+        first = OfferRecord(''.join(['connector-', '1']), ''.join(['Cata', 'log']), 'About',
+                            offer_keywords=[''.join(['trans', 'port'])])
+        second = OfferRecord(''.join(['connector', '-1']), ''.join(['Cat', 'alog']), 'About',
+                             offer_keywords=[''.join(['tran', 'sport'])])
+
+        self.assertIs(first.connector_id, second.connector_id)
+        self.assertIs(first.catalog_title, second.catalog_title)
+        self.assertIs(first.offer_keywords[0], second.offer_keywords[0])
+
+    def test_records_have_no_instance_dict(self):
+        record = OfferRecord('connector-1', 'Catalog', 'About')
+
+        self.assertFalse(hasattr(record, '__dict__'))
+
+    def test_as_dict_round_trips(self):
+        record = OfferRecord.from_resource('connector-1', 'Catalog', 'About', _resource('abc'))
+
+        data = record.as_dict()
+
+        self.assertEqual(data['offer_id'], 'abc')
+        self.assertEqual(data['offer_keywords'], ['transport', 'emissions'])
+        self.assertEqual(OfferRecord.from_dict(data), record)
+
+    def test_missing_links_give_an_empty_offer_url(self):
+        record = OfferRecord.from_resource('connector-1', 'Catalog', 'About', {'title': 'No links'})
+
+        self.assertEqual(record.offer_url, '')
+        self.assertEqual(record.offer_keywords, ())
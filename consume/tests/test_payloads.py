@@ -0,0 +1,67 @@
+import io
+import json
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from .. import payloads
+from ..payloads import payload
+
+
+def _response(body, stream=False):
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = 'utf-8'
+    response.raw = io.BytesIO(body)
+    if not stream:
+        response._content = body
+    return response
+
+
+@mock.patch.object(payloads, 'LOG_PAYLOAD_SAMPLE_RATE', 0)
+class PayloadTests(SimpleTestCase):
+
+    def test_short_payloads_are_logged_whole(self):
+        self.assertEqual(str(payload('hello')), 'hello')
+        self.assertEqual(json.loads(str(payload({'a': [1, 2]}))), {'a': [1, 2]})
+
+    def test_text_is_cut_at_the_limit(self):
+        self.assertEqual(str(payload('x' * 50, limit=10)), 'x' * 10 + '… [truncated, 50 total]')
+
+    def test_bytes_are_cut_without_decoding_the_rest(self):
+        body = 'ä'.encode() * 100
+
+        text = str(payload(body, limit=10))
+
+        self.assertTrue(text.startswith('ä' * 10 + '…'))
+        self.assertTrue(text.endswith('[truncated, 200 total]'))
+
+    def test_json_encoding_stops_at_the_limit(self):
+        value = list(range(100000))
+
+        self.assertLess(len(payloads._bounded_json(value, 20, 2)), 40)
+        self.assertEqual(str(payload(value, limit=20)), json.dumps(value, indent=2)[:20] + '… [truncated]')
+
+    def test_response_body_is_logged(self):
+        self.assertEqual(str(payload(_response(b'{"ok": true}'))), '{"ok": true}')
+
+    def test_streamed_response_is_left_unread(self):
+        response = _response(b'{"ok": true}', stream=True)
+
+        self.assertEqual(str(payload(response)), '<streamed body>')
+        self.assertEqual(response.raw.tell(), 0)
+        self.assertEqual(response.content, b'{"ok": true}')
+
+    def test_every_nth_payload_is_logged_in_full(self):
+        with mock.patch.object(payloads, 'LOG_PAYLOAD_SAMPLE_RATE', 3), \
+                mock.patch.object(payloads, '_formatted', iter(range(1, 100))):
+            texts = [str(payload('x' * 50, limit=10)) for _ in range(6)]
+
+        self.assertEqual([len(text) == 50 for text in texts], [False, False, True, False, False, True])
+
+    def test_nothing_is_rendered_until_formatted(self):
+        with mock.patch.object(payloads, '_bounded_json') as bounded_json:
+            payload({'a': 1})
+
+        bounded_json.assert_not_called()
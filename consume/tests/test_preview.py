@@ -0,0 +1,134 @@
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from .. import preview
+from ..preview import open_artifact
+from ..stubs import StubConfig
+from .base import StubDataspaceTestCase
+
+
+def _artifact(content, content_type='application/json'):
+    return {'content': content, 'content_type': content_type, 'encoding': 'utf-8'}
+
+
+class CursorTests(SimpleTestCase):
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(preview.parse_cursor(preview.make_cursor(120, 3, True)), (120, 3, True))
+
+    def test_malformed_cursors_raise_value_error(self):
+        for value in ('nonsense', '1.2', '-1.0.0', '1.0.2'):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                preview.parse_cursor(value)
+
+
+class BytePageTests(SimpleTestCase):
+
+    def test_pages_never_split_a_multibyte_character(self):
+        content = 'ä'.encode() * 10
+        page = preview.byte_page(_artifact(content, 'text/plain'), 0, 3, pretty=False)
+
+        self.assertEqual(page['text'], 'ä')
+        self.assertEqual(page['next_offset'], 2)
+
+    def test_pretty_pages_carry_the_json_state_across_the_cut(self):
+        content = b'{"a": [1, 2, {"b": "x, y"}], "c": 3}'
+        artifact = _artifact(content)
+        texts = []
+        cursor = None
+        while True:
+            page = preview.byte_page(artifact, length=7, cursor=cursor)
+            texts.append(page['text'])
+            if not page['has_more']:
+                break
+            cursor = page['next_cursor']
+
+        self.assertEqual(''.join(texts), preview.pretty_json_fragment(content.decode()))
+        self.assertEqual(json.loads(''.join(texts)), json.loads(content))
+
+    def test_preview_is_capped(self):
+        content = b'x' * (preview.ARTIFACT_PREVIEW_BYTES + 10)
+
+        result = preview.build_preview(content, 'text/plain', key='k')
+
+        self.assertTrue(result['truncated'])
+        self.assertEqual(result['shown_bytes'], preview.ARTIFACT_PREVIEW_BYTES)
+
+
+class LinePageTests(SimpleTestCase):
+
+    def test_line_offset_skips_whole_chunks(self):
+        content = b''.join(b'%d\n' % n for n in range(100))
+        artifact = _artifact(content, 'text/csv')
+
+        with mock.patch.object(preview, '_SCAN_CHUNK', 16):
+            page = preview.line_page(artifact, line=42, lines=2)
+
+        self.assertEqual(page['text'], '42\n43\n')
+        self.assertEqual(page['next_line'], 44)
+
+
+class ArtifactPagingMixin:
+    """Consumes the sample offer and pages its first artifact."""
+
+    def setUp(self):
+        super().setUp()
+        self.key = self.consume()['artifacts'][0]['key']
+        with open_artifact(self.key) as artifact:
+            self.content = bytes(artifact['content'])
+        self.url = reverse('consume:artifact_preview', args=[self.key])
+
+    def pages(self, **params):
+        texts = []
+        while True:
+            page = self.get(self.url, data=params).json()
+            texts.append(page['text'])
+            if not page['has_more']:
+                return texts
+            params = dict(params, cursor=page['next_cursor'])
+
+
+class BytePagingTests(ArtifactPagingMixin, StubDataspaceTestCase):
+
+    stub_config = StubConfig(connectors=1, catalogs=1, offers=1, artifact_legs=200)
+
+    def test_raw_byte_pages_join_up_to_the_artifact(self):
+        texts = self.pages(length=1000, pretty=0)
+
+        self.assertGreater(len(texts), 1)
+        self.assertEqual(''.join(texts).encode(), self.content)
+
+    def test_pretty_byte_pages_join_up_to_the_same_document(self):
+        texts = self.pages(length=1000)
+
+        self.assertEqual(json.loads(''.join(texts)), json.loads(self.content))
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.get(self.url, data={'cursor': 'nonsense'})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_artifact_is_reported_expired(self):
+        response = self.get(reverse('consume:artifact_preview', args=['0' * 64]))
+
+        self.assertEqual(response.status_code, 404)
+
+
+class LinePagingTests(ArtifactPagingMixin, StubDataspaceTestCase):
+
+    stub_config = StubConfig(connectors=1, catalogs=1, offers=1, artifact_kind='csv', artifact_rows=500)
+
+    def test_line_pages_join_up_to_the_artifact(self):
+        texts = self.pages(line=0, lines=50)
+
+        self.assertGreater(len(texts), 1)
+        self.assertEqual(''.join(texts).encode(), self.content)
+
+    def test_line_number_without_cursor_starts_at_that_line(self):
+        page = self.get(self.url, data={'line': 10, 'lines': 5}).json()
+
+        self.assertEqual(page['text'].encode(), b''.join(self.content.splitlines(True)[10:15]))
+        self.assertEqual(page['next_line'], 15)
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .. import artifacts, progress
+from ..progress import event, load_result, save_result
+
+
+class ResultHandoverTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        patcher = mock.patch.object(artifacts, '_store', artifacts.ArtifactStore(self.root, 0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_result_is_readable_by_another_worker(self):
+        token = save_result('offer-1', {'steps': [{'label': 'Offer discovery'}]})
+
+        # A separate process only shares the store directory
+        with mock.patch.object(artifacts, '_store', artifacts.ArtifactStore(self.root, 0)):
+            consumption = load_result(token, 'offer-1')
+
+        self.assertEqual(consumption, {'steps': [{'label': 'Offer discovery'}]})
+
+    def test_result_is_bound_to_its_offer(self):
+        token = save_result('offer-1', {})
+
+        self.assertIsNone(load_result(token, 'offer-2'))
+
+    def test_unknown_and_malformed_tokens(self):
+        for token in (None, '', 'x' * 22, '../../etc/passwd', 'a/b' * 8):
+            with self.subTest(token=token):
+                self.assertIsNone(load_result(token, 'offer-1'))
+
+    @mock.patch.object(progress, 'CONSUME_RESULT_TTL', 60)
+    def test_expired_results_are_ignored_and_pruned(self):
+        old = save_result('offer-1', {})
+        path = artifacts.get_store()._result_path(old)
+        expired = time.time() - 61
+        os.utime(path, (expired, expired))
+
+        self.assertIsNone(load_result(old, 'offer-1'))
+        fresh = save_result('offer-1', {})
+        self.assertFalse(path.exists())
+        self.assertEqual(load_result(fresh, 'offer-1'), {})
+
+
+class EventTests(SimpleTestCase):
+
+    def test_frame_format(self):
+        self.assertEqual(event('step', {'index': 1}), b'event: step\ndata: {"index":1}\n\n')
@@ -0,0 +1,306 @@
+import io
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from .. import routes
+from ..analytics import route_cache_key
+from .base import StubDataspaceTestCase
+
+PLACES = [
+    {'name': 'Kokkola', 'lat': 63.838, 'lng': 23.13},
+    {'name': 'Seinäjoki', 'lat': 62.79, 'lng': 22.84, 'aliases': ['Seinajoki']},
+    {'name': 'Helsinki', 'lat': 60.17, 'lng': 24.94},
+]
+
+
+class GazetteerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.gazetteer = routes.Gazetteer(PLACES, fuzzy_cutoff=0.85)
+
+    def test_names_and_aliases_match_case_insensitively(self):
+        self.assertEqual(self.gazetteer.lookup('  KOKKOLA '), ('Kokkola', (63.838, 23.13)))
+        self.assertEqual(self.gazetteer.lookup('seinajoki')[0], 'Seinäjoki')
+        self.assertEqual(len(self.gazetteer), 4)
+
+    def test_qualifier_and_prefix_are_ignored(self):
+        self.assertEqual(self.gazetteer.lookup('Helsinki Port Terminal')[0], 'Helsinki')
+        self.assertEqual(self.gazetteer.lookup('Transport leg: Kokkola')[0], 'Kokkola')
+
+    def test_close_spelling_matches_fuzzily(self):
+        self.assertEqual(self.gazetteer.lookup('Helsinky')[0], 'Helsinki')
+
+    def test_fuzzy_matching_can_be_disabled(self):
+        strict = routes.Gazetteer(PLACES, fuzzy_cutoff=0)
+
+        self.assertIsNone(strict.lookup('Helsinky'))
+
+    def test_unknown_or_empty_names(self):
+        self.assertIsNone(self.gazetteer.lookup('Atlantis'))
+        self.assertIsNone(self.gazetteer.lookup(''))
+        self.assertIsNone(self.gazetteer.lookup(None))
+
+    def test_bundled_gazetteer_loads(self):
+        self.assertGreater(len(routes.get_gazetteer()), 0)
+
+
+class EmissionIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.index = routes.EmissionIndex({
+            'Kokkola to Seinäjoki': 4.5,
+            'Seinäjoki Hub to Helsinki': 12.0,
+        })
+
+    def test_leg_label_matches_case_insensitively(self):
+        self.assertEqual(self.index.match('kokkola  TO seinäjoki', None, None), 4.5)
+
+    def test_resolved_places_match_with_a_hub_qualifier(self):
+        self.assertEqual(self.index.match('Leg 2', 'Seinäjoki', 'Helsinki'), 12.0)
+
+    def test_no_match(self):
+        self.assertIsNone(self.index.match('Helsinki to Kokkola', 'Helsinki', 'Kokkola'))
+        self.assertIsNone(routes.EmissionIndex({}).match('Kokkola to Seinäjoki', None, None))
+
+
+class RouteMapTests(SimpleTestCase):
+
+    def setUp(self):
+        self.gazetteer = routes.Gazetteer(PLACES)
+
+    def test_split_leg_places(self):
+        self.assertEqual(routes.split_leg_places('Leg 1: Kokkola to Helsinki'), ('Kokkola', 'Helsinki'))
+        self.assertEqual(routes.split_leg_places('Kokkola'), ('Kokkola', None))
+        self.assertEqual(routes.split_leg_places(None), (None, None))
+
+    def test_haversine_km(self):
+        [distance] = routes.haversine_km([(60.17, 24.94)], [(63.838, 23.13)])
+
+        self.assertAlmostEqual(distance, 418, delta=5)
+
+    def test_build_route_map_from_parts(self):
+        legs = [
+            {'sequence': 2, 'legName': 'Seinäjoki to Helsinki', 'distance': 330},
+            {'sequence': 1, 'legName': 'Kokkola to Seinajoki', 'distance': 140},
+            {'sequence': 3, 'legName': 'Helsinki to Atlantis', 'distance': 999},
+        ]
+        footprint = {
+            'shipmentId': 'S-1',
+            'totalEmissions': {'co2e': 20.5, 'unit': 'kg'},
+            'breakdown': [
+                {'activity': 'Transport leg: Kokkola to Seinäjoki', 'co2e': 4.5},
+                {'activity': 'Cross-docking', 'co2e': 1.0},
+            ],
+        }
+
+        route_map = routes.build_route_map_from_parts(legs, footprint, gazetteer=self.gazetteer)
+
+        self.assertEqual([stop['name'] for stop in route_map['stops']], ['Kokkola', 'Seinäjoki', 'Helsinki'])
+        self.assertEqual(len(route_map['segments']), 2)
+        self.assertEqual(route_map['segments'][0]['emissions'], 4.5)
+        self.assertIsNone(route_map['segments'][1]['emissions'])
+        self.assertEqual(route_map['metrics']['total_distance'], 470)
+        self.assertEqual(route_map['metrics']['shipment_id'], 'S-1')
+        self.assertEqual(route_map['breakdown'], [{'activity': 'Cross-docking', 'co2e': 1.0}])
+        self.assertEqual(route_map['bounds'], [[60.17, 22.84], [63.838, 24.94]])
+
+    def test_unplaceable_route_gives_none(self):
+        legs = [{'sequence': 1, 'legName': 'Atlantis to Lemuria'}]
+
+        self.assertIsNone(routes.build_route_map_from_parts(legs, None, gazetteer=self.gazetteer))
+
+
+def _route_map(count):
+    """A straight route of ``count`` legs heading east along one latitude."""
+    segments = [
+        {
+            'from': f'P{n}', 'to': f'P{n + 1}', 'distance': 10, 'geodesic_km': 10.0,
+            'coords': [[60.0, 20.0 + n * 0.001], [60.0, 20.0 + (n + 1) * 0.001]],
+            'emissions': 1.0,
+        }
+        for n in range(count)
+    ]
+    return {
+        'segments': segments,
+        'stops': [{'name': 'P0', 'lat': 60.0, 'lng': 20.0}],
+        'bounds': [[60.0, 20.0], [60.0, 20.0 + count * 0.001]],
+        'metrics': {'total_distance': 10 * count},
+        'breakdown': [],
+        'leg_details': [],
+    }
+
+
+class RouteGeoJsonTests(SimpleTestCase):
+
+    def test_short_route_is_sent_leg_by_leg(self):
+        geojson = routes.route_geojson(_route_map(3), zoom=5)
+
+        kinds = [feature['properties']['kind'] for feature in geojson['features']]
+        self.assertEqual(kinds, ['leg', 'leg', 'leg', 'stop'])
+        self.assertFalse(geojson['properties']['simplified'])
+        # GeoJSON positions and bbox are longitude first
+        self.assertEqual(geojson['features'][0]['geometry']['coordinates'][0], [20.0, 60.0])
+        self.assertEqual(geojson['bbox'], [20.0, 60.0, 20.003, 60.0])
+
+    @mock.patch.object(routes, 'ROUTE_SIMPLIFY_MIN_SEGMENTS', 10)
+    def test_long_route_is_merged_and_simplified_per_zoom(self):
+        geojson = routes.route_geojson(_route_map(50), zoom=3)
+
+        [path] = [f for f in geojson['features'] if f['properties']['kind'] == 'path']
+        self.assertTrue(geojson['properties']['simplified'])
+        self.assertEqual(path['properties']['legs'], 50)
+        self.assertEqual(path['properties']['distance'], 500)
+        self.assertEqual(path['properties']['emissions'], 50.0)
+        self.assertEqual(len(path['geometry']['coordinates']), 2)
+
+    @mock.patch.object(routes, 'ROUTE_SIMPLIFY_MIN_SEGMENTS', 10)
+    def test_without_zoom_every_leg_is_kept(self):
+        geojson = routes.route_geojson(_route_map(50))
+
+        self.assertEqual(sum(f['properties']['kind'] == 'leg' for f in geojson['features']), 50)
+
+    def test_emission_band(self):
+        self.assertEqual(routes.emission_band(None), 'unknown')
+        self.assertEqual(routes.emission_band(4.9), 'low')
+        self.assertEqual(routes.emission_band(5), 'medium')
+        self.assertEqual(routes.emission_band(15), 'high')
+
+    def test_zoom_tolerance_halves_per_level(self):
+        self.assertAlmostEqual(routes.zoom_tolerance(4), routes.zoom_tolerance(3) / 2)
+        self.assertEqual(routes.zoom_tolerance(-1), routes.zoom_tolerance(0))
+
+
+class SimplifyPolylineTests(SimpleTestCase):
+
+    def test_collinear_points_are_dropped(self):
+        line = [[0, 0], [0, 1], [0, 2], [0, 3]]
+
+        self.assertEqual(routes.simplify_polyline(line, 0.1), [[0, 0], [0, 3]])
+
+    def test_corner_beyond_tolerance_is_kept(self):
+        line = [[0, 0], [1, 1], [0, 2]]
+
+        self.assertEqual(routes.simplify_polyline(line, 0.5), [[0, 0], [1, 1], [0, 2]])
+        self.assertEqual(routes.simplify_polyline(line, 2), [[0, 0], [0, 2]])
+
+    def test_short_lines_and_zero_tolerance_are_unchanged(self):
+        self.assertEqual(routes.simplify_polyline([[0, 0], [1, 1]], 5), [[0, 0], [1, 1]])
+        line = [[0, 0], [0, 1], [0, 2]]
+        self.assertEqual(routes.simplify_polyline(line, 0), line)
+
+    def test_closed_loop(self):
+        loop = [[0, 0], [1, 0], [1, 1], [0, 0]]
+
+        self.assertEqual(routes.simplify_polyline(loop, 0.1), loop)
+
+
+class RouteGeoJsonViewTests(StubDataspaceTestCase):
+
+    def test_consumed_shipment_is_served_as_geojson(self):
+        key = self.consume()['artifacts'][0]['key']
+        url = reverse('consume:route_geojson', args=[key])
+
+        # The map parsed while recording the shipment is reused
+        with mock.patch('consume.analytics.build_route_map_from_stream') as build:
+            response = self.get(url, data={'zoom': 5})
+            self.assertEqual(self.get(url, data={'zoom': 6}).status_code, 200)
+        build.assert_not_called()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/geo+json')
+        self.assertEqual(response.json()['type'], 'FeatureCollection')
+
+    def test_expired_map_is_rebuilt_from_the_stored_artifact(self):
+        key = self.consume()['artifacts'][0]['key']
+        cache.delete(route_cache_key('map', key))
+
+        response = self.get(reverse('consume:route_geojson', args=[key]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['type'], 'FeatureCollection')
+        self.assertIsNotNone(cache.get(route_cache_key('map', key)))
+
+    def test_invalid_zoom_is_rejected(self):
+        key = self.consume()['artifacts'][0]['key']
+
+        response = self.get(reverse('consume:route_geojson', args=[key]), data={'zoom': 'far'})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_route_is_404(self):
+        self.assertEqual(self.get(reverse('consume:route_geojson', args=['nope'])).status_code, 404)
+        self.assertEqual(self.get(reverse('consume:route_geojson', args=['0' * 64])).status_code, 404)
+
+
+def _shipment_document():
+    return json.dumps({
+        'unified': {
+            'shipment': {'shipmentFootprint': {
+                'shipmentId': 'S-1',
+                'totalEmissions': {'co2e': 16.5, 'unit': 'kg'},
+            }},
+            'transportChains': {
+                'chain1': {'transportChainElement': {'transportLegs': [
+                    {'sequence': 1, 'legName': 'Kokkola to Seinäjoki', 'distance': 140.5,
+                     'vehicle': {'plate': 'ABC-123', 'axles': [1, 2, 3]}},
+                    {'sequence': 2, 'legName': 'Seinäjoki to Helsinki', 'distance': 330},
+                ]}},
+            },
+            'documents': ['x' * 1000],
+        },
+    }).encode('utf-8')
+
+
+class ExtractRoutePartsTests(SimpleTestCase):
+
+    def test_legs_are_trimmed_to_the_mapped_fields(self):
+        legs, footprint = routes.extract_route_parts(_shipment_document())
+
+        self.assertEqual(legs, [
+            {'sequence': 1, 'legName': 'Kokkola to Seinäjoki', 'distance': 140.5},
+            {'sequence': 2, 'legName': 'Seinäjoki to Helsinki', 'distance': 330},
+        ])
+        self.assertEqual(footprint['shipmentId'], 'S-1')
+
+    def test_every_source_kind_gives_the_same_parts(self):
+        body = _shipment_document()
+        expected = routes.extract_route_parts(body)
+
+        # Chunks split mid-token, as a download would deliver them
+        chunks = (body[i:i + 7] for i in range(0, len(body), 7))
+        self.assertEqual(routes.extract_route_parts(chunks), expected)
+        self.assertEqual(routes.extract_route_parts(body.decode('utf-8')), expected)
+        self.assertEqual(routes.extract_route_parts(io.BytesIO(body)), expected)
+        self.assertEqual(routes.extract_route_parts(memoryview(body)), expected)
+        self.assertEqual(routes.extract_route_parts(bytearray(body)), expected)
+
+    def test_document_without_chains(self):
+        self.assertEqual(routes.extract_route_parts(b'{"unified": {"other": [1, 2]}}'), ([], None))
+        self.assertEqual(routes.extract_route_parts(b'[]'), ([], None))
+
+    def test_truncated_document_raises_value_error(self):
+        body = _shipment_document()
+
+        for cut in (1, len(body) // 3, len(body) - 1):
+            with self.subTest(cut=cut), self.assertRaises(ValueError):
+                routes.extract_route_parts(body[:cut])
+
+    def test_malformed_documents_raise_value_error(self):
+        for body in (b'', b'not json', b'{"unified": {"transportChains": {"c": ]}}', b'{"a": 1}}'):
+            with self.subTest(body=body), self.assertRaises(ValueError):
+                routes.extract_route_parts(body)
+
+    def test_stream_builder_gives_none_for_broken_documents(self):
+        self.assertIsNone(routes.build_route_map_from_stream(_shipment_document()[:200]))
+        self.assertIsNone(routes.build_route_map_from_stream(b'{"unified": {}}'))
+
+    def test_looks_like_route_document(self):
+        self.assertTrue(routes.looks_like_route_document(_shipment_document()))
+        self.assertTrue(routes.looks_like_route_document('  {"transportChains": {}}'))
+        self.assertFalse(routes.looks_like_route_document(b'id,name\n1,"transportChains"\n'))
+        self.assertFalse(routes.looks_like_route_document(b''))
+        self.assertFalse(routes.looks_like_route_document(None))
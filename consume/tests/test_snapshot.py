@@ -0,0 +1,74 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from .. import snapshot
+from ..offers import OfferRecord
+
+
+def _offers(count=3):
+    return [
+        OfferRecord(
+            'connector-1', 'Catalog', 'About',
+            offer_title=f'Offer {n}',
+            offer_keywords=['transport', f'k{n}'],
+            offer_publisher='https://provider.example',
+            offer_url=f'https://connector.example/api/offers/{n}',
+            offer_modified='2024-01-01T00:00:00Z',
+        )
+        for n in range(count)
+    ]
+
+
+class SnapshotTests(SimpleTestCase):
+
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.path = Path(scratch.name) / 'offer_snapshot.json'
+
+    def test_round_trip(self):
+        offers = _offers()
+
+        self.assertTrue(snapshot.save_offers(offers, self.path))
+        loaded, created_at = snapshot.load_offers(self.path)
+
+        self.assertEqual(loaded, offers)
+        self.assertIsNotNone(created_at)
+        self.assertIsNotNone(snapshot.modified_at(self.path))
+
+    def test_shared_strings_are_written_once(self):
+        snapshot.save_offers(_offers(), self.path)
+
+        document = json.loads(self.path.read_bytes())
+
+        self.assertEqual(document['strings'].count('Catalog'), 1)
+        self.assertEqual(document['strings'].count('transport'), 1)
+
+    def test_missing_file(self):
+        self.assertEqual(snapshot.load_offers(self.path), (None, None))
+        self.assertIsNone(snapshot.modified_at(self.path))
+
+    def test_truncated_file_is_ignored(self):
+        snapshot.save_offers(_offers(), self.path)
+        self.path.write_bytes(self.path.read_bytes()[:40])
+
+        with self.assertLogs('consume.snapshot', 'WARNING'):
+            self.assertEqual(snapshot.load_offers(self.path), (None, None))
+
+    def test_unknown_version_is_ignored(self):
+        self.path.write_text(json.dumps({'version': 99, 'offers': []}))
+
+        with self.assertLogs('consume.snapshot', 'WARNING'):
+            self.assertEqual(snapshot.load_offers(self.path), (None, None))
+
+    def test_dangling_string_index_is_ignored(self):
+        snapshot.save_offers(_offers(), self.path)
+        document = json.loads(self.path.read_bytes())
+        document['strings'] = []
+        self.path.write_text(json.dumps(document))
+
+        with self.assertLogs('consume.snapshot', 'WARNING'):
+            self.assertEqual(snapshot.load_offers(self.path), (None, None))
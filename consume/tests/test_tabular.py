@@ -0,0 +1,134 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from .. import tabular
+
+
+def _csv(rows, header='id,name,weight,fragile'):
+    return ('\n'.join([header] + rows) + '\n').encode()
+
+
+class ParseCellTests(SimpleTestCase):
+
+    def test_cells_are_typed(self):
+        self.assertEqual(tabular._parse_cell(' 42 '), ('integer', 42))
+        self.assertEqual(tabular._parse_cell('-1.5'), ('number', -1.5))
+        self.assertEqual(tabular._parse_cell('+'), ('string', '+'))
+        self.assertEqual(tabular._parse_cell('N/A'), ('null', None))
+        self.assertEqual(tabular._parse_cell('TRUE'), ('boolean', True))
+        self.assertEqual(tabular._parse_cell('Kokkola'), ('string', 'Kokkola'))
+
+
+class ColumnStatsTests(SimpleTestCase):
+
+    def add_all(self, *cells):
+        column = tabular.ColumnStats('c')
+        for cell in cells:
+            column.add(*tabular._parse_cell(cell))
+        return column
+
+    def test_integers_widen_to_number(self):
+        column = self.add_all('1', '2.5', '', '-3')
+
+        self.assertEqual(column.as_dict(), {'name': 'c', 'type': 'number', 'nulls': 1, 'min': -3, 'max': 2.5})
+
+    def test_mixed_column_keeps_numeric_range(self):
+        column = self.add_all('b', '7', 'a', '3')
+
+        self.assertEqual(column.type, 'mixed')
+        self.assertEqual((column.minimum, column.maximum), (3, 7))
+
+    def test_long_strings_are_clipped(self):
+        column = self.add_all('x' * 200)
+
+        self.assertEqual(len(column.maximum), tabular.CELL_CHARS)
+        self.assertTrue(column.maximum.endswith('…'))
+
+
+class DetectFormatTests(SimpleTestCase):
+
+    def test_formats(self):
+        self.assertEqual(tabular.detect_format(_csv(['1,a,2,true'])), 'csv')
+        self.assertEqual(tabular.detect_format(b'a;b\n1;2\n3;4\n'), 'csv')
+        self.assertEqual(tabular.detect_format(b'[{"a": 1}]'), 'json')
+        self.assertIsNone(tabular.detect_format(b'[1, 2]'))
+        self.assertIsNone(tabular.detect_format(b'{"a": 1}', 'application/json'))
+        self.assertIsNone(tabular.detect_format(b'just some text'))
+        self.assertIsNone(tabular.detect_format(b''))
+
+
+class TabularPreviewTests(SimpleTestCase):
+
+    def test_csv_summary(self):
+        table = tabular.tabular_preview(_csv(['1,box,2.5,true', '2,crate,,false', '3,pallet,10,TRUE']))
+
+        self.assertEqual(table['format'], 'csv')
+        self.assertEqual(table['rows'], 3)
+        self.assertTrue(table['complete'])
+        self.assertEqual(
+            [(c['name'], c['type'], c['nulls']) for c in table['columns']],
+            [('id', 'integer', 0), ('name', 'string', 0), ('weight', 'number', 1), ('fragile', 'boolean', 0)]
+        )
+        self.assertEqual(table['head'][1], [2, 'crate', None, False])
+
+    def test_json_keys_first_seen_late_count_earlier_rows_as_null(self):
+        content = json.dumps([{'a': 1}, {'a': 2}, {'a': 3, 'b': 'x'}]).encode()
+
+        table = tabular.tabular_preview(content)
+
+        self.assertEqual(table['columns'][1], {'name': 'b', 'type': 'string', 'nulls': 2, 'min': 'x', 'max': 'x'})
+        self.assertEqual(table['head'][0], [1, None])
+
+    def test_short_rows_are_padded(self):
+        table = tabular.tabular_preview(_csv(['1,box,2,true', '2,crate']), 'text/csv')
+
+        self.assertEqual(table['head'][1], [2, 'crate', None, None])
+        self.assertEqual(table['columns'][3]['nulls'], 1)
+
+    def test_array_of_scalars_is_not_tabular(self):
+        self.assertIsNone(tabular.tabular_preview(b'[{"a": 1}, 2]'))
+
+    @mock.patch.object(tabular, 'TABULAR_HEAD_ROWS', 5)
+    @mock.patch.object(tabular, 'TABULAR_SAMPLE_ROWS', 4)
+    def test_sample_is_drawn_from_the_rows_after_the_head(self):
+        table = tabular.tabular_preview(_csv([f'{n},x,1,true' for n in range(500)]))
+
+        self.assertEqual([row[0] for row in table['head']], [0, 1, 2, 3, 4])
+        sampled = [entry['row'] for entry in table['sample']]
+        self.assertEqual(len(sampled), 4)
+        self.assertEqual(sampled, sorted(sampled))
+        self.assertTrue(all(6 <= row <= 500 for row in sampled))
+        # Uniform over the tail, not just its first rows
+        self.assertGreater(max(sampled), 100)
+        for entry in table['sample']:
+            self.assertEqual(entry['cells'][0], entry['row'] - 1)
+
+    @mock.patch.object(tabular, 'TABULAR_HEAD_ROWS', 2)
+    @mock.patch.object(tabular, 'TABULAR_SAMPLE_ROWS', 1)
+    def test_sample_is_reproducible(self):
+        content = _csv([f'{n},x,1,true' for n in range(100)])
+
+        self.assertEqual(tabular.tabular_preview(content)['sample'], tabular.tabular_preview(content)['sample'])
+
+    @mock.patch.object(tabular, 'TABULAR_MAX_ROWS', 10)
+    def test_scan_stops_at_the_row_cap(self):
+        table = tabular.tabular_preview(_csv([f'{n},x,1,true' for n in range(50)]))
+
+        self.assertEqual(table['rows'], 10)
+        self.assertFalse(table['complete'])
+
+
+class CachedTabularPreviewTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_result_is_cached_per_key_including_none(self):
+        with mock.patch.object(tabular, 'tabular_preview', return_value=None) as preview:
+            self.assertIsNone(tabular.cached_tabular_preview('k', b'text'))
+            self.assertIsNone(tabular.cached_tabular_preview('k', b'text'))
+
+        preview.assert_called_once()
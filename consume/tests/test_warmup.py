@@ -0,0 +1,59 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from .. import catalog, warmup
+from .base import StubDataspaceTestCase
+
+
+class WarmCachesTests(StubDataspaceTestCase):
+
+    def test_refresh_skips_extras_by_default(self):
+        summary = warmup.warm_caches()
+
+        cfg = self.stub_config
+        self.assertTrue(summary['ok'])
+        self.assertEqual(summary['offers'], cfg.connectors * cfg.catalogs * cfg.offers)
+        self.assertEqual(summary['extras'], 0)
+        self.assertEqual(self.server.dataspace.requests['extras'], 0)
+
+    @mock.patch.object(warmup, 'CACHE_WARMUP_EXTRAS_LIMIT', 5)
+    def test_extras_are_capped(self):
+        summary = warmup.warm_caches(include_extras=True)
+
+        self.assertEqual(summary['extras'], 5)
+        self.assertEqual(self.server.dataspace.requests['extras'], 5)
+
+    @mock.patch.object(warmup, 'CACHE_WARMUP_EXTRAS_LIMIT', 0)
+    def test_zero_limit_refreshes_every_offer(self):
+        summary = warmup.warm_caches(include_extras=True)
+
+        self.assertEqual(summary['extras'], summary['offers'])
+
+
+class RefreshOnceTests(StubDataspaceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.lock_path = Path(scratch.name) / 'refresh.lock'
+
+    def test_refresh_then_skip_within_half_the_interval(self):
+        self.assertEqual(warmup.refresh_once(600, lock_path=self.lock_path), 'refreshed')
+        crawled = self.server.dataspace.requests['broker']
+
+        self.assertEqual(warmup.refresh_once(600, lock_path=self.lock_path), 'skipped')
+        self.assertEqual(self.server.dataspace.requests['broker'], crawled)
+
+    def test_busy_lock_reloads_the_snapshot_instead(self):
+        holder = warmup._RefreshLock(self.lock_path)
+        self.assertTrue(holder.acquire())
+        self.addCleanup(holder.release)
+
+        with mock.patch.object(catalog, 'reload_snapshot') as reload_snapshot:
+            outcome = warmup.refresh_once(600, lock_path=self.lock_path)
+
+        self.assertEqual(outcome, 'busy')
+        reload_snapshot.assert_called_once_with()
+        self.assertEqual(self.server.dataspace.requests['broker'], 0)
@@ -1,7 +1,16 @@
 # consume/urls.py
 
 from django.urls import path
-from .views import dataspace_connectors, selected_offer, consume_offer
+from .views import (
+    dataspace_connectors,
+    offers_api,
+    selected_offer,
+    consume_offer,
+    consume_stream,
+    route_geojson_view,
+    emissions_analytics_api,
+    artifact_preview_api,
+)
 
 app_name = 'consume'
 
@@ -13,6 +22,41 @@ urlpatterns = [
         name='connector_offers'
     ),
 
+    # GET /consume/api/offers/           → list all offers as JSON
+    path(
+        'api/offers/',
+        offers_api,
+        name='offers_api'
+    ),
+
+    # GET /consume/api/routes/<hash>/    → route map of a consumed artifact as GeoJSON
+    path(
+        'api/routes/<str:route_key>/',
+        route_geojson_view,
+        name='route_geojson'
+    ),
+
+    # GET /consume/api/artifacts/<hash>/preview/ → byte or line range of a consumed artifact
+    path(
+        'api/artifacts/<str:artifact_key>/preview/',
+        artifact_preview_api,
+        name='artifact_preview'
+    ),
+
+    # GET /consume/api/analytics/emissions/ → emissions stats across consumed shipments
+    path(
+        'api/analytics/emissions/',
+        emissions_analytics_api,
+        name='emissions_analytics'
+    ),
+
+    # GET /consume/api/offers/<id>/consume/ → run consumption, steps as Server-Sent Events
+    path(
+        'api/offers/<str:offer_id>/consume/',
+        consume_stream,
+        name='consume_stream'
+    ),
+
     # GET /consume/selected_offer/<id>/  → show one offer
     path(
         'selected_offer/<str:offer_id>/',
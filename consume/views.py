@@ -1,21 +1,38 @@
 # consume/views.py
 
-import json
 import logging
+import re
 import requests
-from urllib.parse import urljoin, unquote
+from urllib.parse import unquote
 from decouple import config
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db import DatabaseError
+from django.http import StreamingHttpResponse
 from django.shortcuts import render, redirect
 from django.urls import reverse
 from django.utils.dateparse import parse_datetime
+
+from core.deadline import upstream_timeout
+from core.tracing import client_span, current_parent, inject
+
 from .connector import runner, get_policy
-from .broker import get_all_connectors
+from .catalog import get_listing
+from .conditional import make_etag, not_modified, viewer, with_validators
+from .jsonlib import dumps, json_response, response_json
+from .extras import fetch_offer_extras
+from .routes import looks_like_route_document, route_geojson
+from .preview import byte_page, line_page, open_artifact
+from .analytics import ROUTE_SOURCE_TTL, cached_route_map, emissions_summary, route_cache_key
+from .health import liveness, readiness
+from .progress import astream, load_result, stream
 
 # Configuration from .env
 AUTHORIZATION = config('AUTHORIZATION')
 BASE_URL      = config('BASE_URL')
-PAGE_SIZE     = 30
 AUTH_HEADERS  = {'Authorization': AUTHORIZATION}
+MAX_ROUTE_ZOOM = 19
+ROUTE_KEY_RE = re.compile(r'^[0-9a-f]{64}$')
 
 logger = logging.getLogger(__name__)
 
@@ -28,516 +45,77 @@ WORKFLOW_SUMMARY_TEXT = {
     'Artifact retrieval': 'Fetched the preview of the shared data.'
 }
 
-CITY_COORDS = {
-    'Kokkola': (63.838, 23.130),
-    'Seinäjoki': (62.790, 22.840),
-    'Pori': (61.485, 21.797),
-    'Naantali': (60.467, 22.026),
-    'Kapellskär': (59.718, 19.060),
-    'Nykvarn': (59.180, 17.430),
-    'Kapelskär': (59.718, 19.060),  # common spelling variant
-}
 
-CITY_ALIASES = {
-    'Naantali Hub': 'Naantali',
-    'Kapellskär Port': 'Kapellskär',
-    'Port': 'Naantali',
-    'Ferry': 'Naantali',
-}
-
-
-def _derive_provider_ui_bases():
+def _listing_version(listing):
     """
-    Build a prioritized list of Provider UI base URLs. If PROVIDER_UI_BASE is
-    explicitly configured, prefer it. Otherwise try BASE_URL (which usually
-    includes /connector) and the host root as a fallback.
+    Version of the loaded listing for fragment cache keys and ETags: its
+    fetch time, or a digest of its content for a snapshot without one.
     """
-    configured = config('PROVIDER_UI_BASE', default='').strip()
-    bases = []
-
-    if configured:
-        bases.append(configured.rstrip('/'))
-    else:
-        trimmed = BASE_URL.rstrip('/') if BASE_URL else ''
-        if trimmed:
-            bases.append(trimmed.rstrip('/'))
-            suffix = '/connector'
-            if trimmed.endswith(suffix):
-                host_only = trimmed[:-len(suffix)]
-                if host_only:
-                    bases.append(host_only.rstrip('/'))
-
-    # Remove empties while preserving order
-    seen = set()
-    ordered = []
-    for base in bases:
-        if base and base not in seen:
-            ordered.append(base)
-            seen.add(base)
-    return ordered
-
-
-PROVIDER_UI_BASES = _derive_provider_ui_bases()
-
-PROVIDER_UI_AUTH = config('PROVIDER_UI_AUTHORIZATION', default='').strip()
-PROVIDER_UI_HEADERS = {}
-if PROVIDER_UI_AUTH:
-    PROVIDER_UI_HEADERS['Authorization'] = PROVIDER_UI_AUTH
-
-
-def _normalize_place_name(name):
-    if not name:
-        return None
-    cleaned = name.split(':')[-1].strip()
-    alias = CITY_ALIASES.get(cleaned)
-    if alias:
-        cleaned = alias
-    return cleaned
-
-
-def _split_leg_places(leg_name):
-    if not leg_name:
-        return (None, None)
-    cleaned = leg_name.split(':')[-1]
-    parts = cleaned.split(' to ')
-    if len(parts) == 2:
-        return parts[0].strip(), parts[1].strip()
-    return cleaned.strip(), None
-
-
-def _coords_for_place(name):
-    if not name:
-        return None
-    normalized = CITY_ALIASES.get(name, name).replace('Hub', '').strip()
-    return CITY_COORDS.get(normalized)
-
-
-def _match_leg_emission(leg_label, start, end, emissions_map):
-    if not emissions_map:
-        return None
-    candidates = []
-    if leg_label:
-        candidates.append(leg_label)
-    if start and end:
-        candidates.extend([
-            f"{start} to {end}",
-            f"{start} Hub to {end}",
-            f"{start} to {end} Hub",
-        ])
-    for candidate in candidates:
-        for key, value in emissions_map.items():
-            if key.lower() == candidate.lower():
-                return value
-    return None
-
-
-def _build_route_map(consumption):
-    body = ((consumption or {}).get('response_preview') or {}).get('body')
-    if not body:
-        return None
-    try:
-        payload = json.loads(body)
-    except (TypeError, ValueError):
-        return None
-
-    unified = payload.get('unified') or {}
-    chains = unified.get('transportChains') or {}
-    legs = []
-    last_known_name = None
-    last_known_coords = None
-
-    for chain in chains.values():
-        element = chain.get('transportChainElement') or {}
-        for leg in element.get('transportLegs') or []:
-            sequence = leg.get('sequence')
-            leg_name = leg.get('legName')
-            distance = leg.get('distance')
-            start, end = _split_leg_places(leg_name)
-            start = _normalize_place_name(start) or start
-            end = _normalize_place_name(end) or end
-            if not start and last_known_name:
-                start = last_known_name
-            if (leg_name or '').lower().startswith('ferry') and last_known_name:
-                start = start or last_known_name
-            start_coords = _coords_for_place(start)
-            if not start_coords and last_known_coords:
-                start_coords = last_known_coords
-                if not start:
-                    start = last_known_name
-
-            end_coords = _coords_for_place(end)
-            if not end_coords and end:
-                cleaned = end.replace('Hub', '').strip()
-                end_coords = _coords_for_place(cleaned)
-            if not end_coords:
-                alias = CITY_ALIASES.get(end)
-                if alias:
-                    end_coords = _coords_for_place(alias)
-                    if not end:
-                        end = alias
-
-            if not start_coords or not end_coords:
-                # can't map this leg; skip but continue tracking last known
-                if end_coords:
-                    last_known_coords = end_coords
-                    last_known_name = end or last_known_name
-                continue
+    fetched_at = listing['fetched_at']
+    if fetched_at:
+        return fetched_at.timestamp()
+    return make_etag(*(
+        tuple(getattr(offer, name) for name in offer.__slots__)
+        for offer in listing['offers']
+    ))
 
-            last_known_coords = end_coords
-            last_known_name = end or start or last_known_name
-
-            legs.append({
-                'sequence': sequence,
-                'start': start,
-                'end': end,
-                'start_coords': start_coords,
-                'end_coords': end_coords,
-                'distance': distance,
-                'leg_label': leg_name
-            })
-    if not legs:
-        return None
-
-    legs.sort(key=lambda item: item.get('sequence') or 0)
-    stops = []
-    seen = set()
-
-    for leg in legs:
-        if leg['start'] and leg['start'] not in seen:
-            lat, lng = leg['start_coords']
-            stops.append({
-                'name': leg['start'],
-                'lat': lat,
-                'lng': lng,
-                'sequence': leg.get('sequence')
-            })
-            seen.add(leg['start'])
-        if leg['end'] and leg['end'] not in seen:
-            lat, lng = leg['end_coords']
-            stops.append({
-                'name': leg['end'],
-                'lat': lat,
-                'lng': lng,
-                'sequence': (leg.get('sequence') or 0) + 0.1
-            })
-            seen.add(leg['end'])
-
-    segments = []
-    for leg in legs:
-        segments.append({
-            'from': leg['start'],
-            'to': leg['end'],
-            'distance': leg.get('distance'),
-            'coords': [
-                list(leg['start_coords']),
-                list(leg['end_coords'])
-            ]
-        })
-
-    lats = [stop['lat'] for stop in stops]
-    lngs = [stop['lng'] for stop in stops]
-    bounds = [
-        [min(lats), min(lngs)],
-        [max(lats), max(lngs)]
-    ]
-
-    shipment_fp = (unified.get('shipment') or {}).get('shipmentFootprint') or {}
-    metrics = {
-        'shipment_id': shipment_fp.get('shipmentId'),
-        'parcel_id': ((shipment_fp.get('scope') or {}).get('parcelId')),
-        'total_emissions': ((shipment_fp.get('totalEmissions') or {}).get('co2e')),
-        'emissions_unit': ((shipment_fp.get('totalEmissions') or {}).get('unit')),
-        'standard': shipment_fp.get('standardsUsed'),
-        'calculated_at': shipment_fp.get('calculationTimestamp')
-    }
-    calc_dt = parse_datetime(metrics['calculated_at']) if metrics['calculated_at'] else None
-    if calc_dt:
-        metrics['calculated_at_human'] = calc_dt.strftime('%Y-%m-%d %H:%M')
-    else:
-        metrics['calculated_at_human'] = metrics['calculated_at']
-    breakdown = shipment_fp.get('breakdown') or []
-    leg_emissions = {}
-    non_leg_hotspots = []
-    for entry in breakdown:
-        activity = entry.get('activity', '')
-        if not activity:
-            continue
-        label = activity.split(':', 1)[-1].strip() if ':' in activity else activity
-        co2e = entry.get('co2e')
-        leg_emissions[label] = co2e
-
-        is_transport_leg = 'transport leg' in activity.lower()
-        if not is_transport_leg:
-            non_leg_hotspots.append(entry)
-
-    leg_details = []
-    total_distance = 0
-    enriched_segments = []
-    for idx, leg in enumerate(legs):
-        segment = segments[idx]
-        leg_distance = leg.get('distance') or 0
-        total_distance += leg_distance or 0
-        emission_value = _match_leg_emission(
-            leg.get('leg_label'),
-            leg.get('start'),
-            leg.get('end'),
-            leg_emissions
-        )
-        leg_details.append({
-            'sequence': leg.get('sequence'),
-            'label': f"{leg.get('start')} → {leg.get('end')}",
-            'distance': leg.get('distance'),
-            'emissions': emission_value
-        })
-        segment_copy = segment.copy()
-        segment_copy['emissions'] = emission_value
-        enriched_segments.append(segment_copy)
-
-    metrics['total_distance'] = total_distance
-
-    return {
-        'stops': stops,
-        'segments': enriched_segments,
-        'bounds': bounds,
-        'metrics': metrics,
-        'breakdown': non_leg_hotspots[:4],
-        'leg_details': leg_details
-    }
-
-
-def _request_offer_extras(base_url, offer_id):
-    paths = [
-        f"{base_url.rstrip('/')}/api/offers/{offer_id}/extras/",
-        f"{base_url.rstrip('/')}/provide/api/offers/{offer_id}/extras/"
-    ]
-    errors = []
-
-    for extras_url in paths:
-        result = _perform_extras_request(extras_url, offer_id, base_url)
-        if result:
-            if result['status'] == 'error':
-                errors.append(result)
-                continue
-            return result
-
-    return errors[-1] if errors else {
-        'status': 'error',
-        'error': 'Provider extras request failed',
-    }
-
-
-def _perform_extras_request(extras_url, offer_id, base_url):
-    headers = PROVIDER_UI_HEADERS.copy()
-
-    try:
-        resp = requests.get(extras_url, headers=headers, verify=False, timeout=10)
-    except requests.RequestException as exc:
-        logger.warning("Offer extras request failed for %s (%s): %s", offer_id, extras_url, exc)
-        return {
-            'status': 'error',
-            'error': str(exc),
-            'url': extras_url,
-            'base_url': base_url
-        }
 
-    if resp.status_code == 404:
-        return {
-            'status': 'not_found',
-            'data_model': None,
-            'purpose_of_use': None,
-            'url': extras_url,
-            'base_url': base_url
-        }
-
-    if resp.status_code != 200:
-        logger.warning(
-            "Offer extras unexpected status for %s (%s): %s %s",
-            offer_id,
-            extras_url,
-            resp.status_code,
-            resp.text[:200]
-        )
-        return {
-            'status': 'error',
-            'error': f"Unexpected status {resp.status_code}",
-            'url': extras_url,
-            'base_url': base_url
-        }
-
-    body = (resp.text or '').strip()
-    if not body:
-        return {
-            'status': 'not_found',
-            'data_model': None,
-            'purpose_of_use': None,
-            'url': extras_url,
-            'base_url': base_url
-        }
-
-    try:
-        payload = resp.json()
-    except ValueError as exc:
-        logger.warning(
-            "Offer extras invalid JSON for %s (%s): %s body=%s",
-            offer_id,
-            extras_url,
-            exc,
-            body[:150]
-        )
-        return {
-            'status': 'error',
-            'error': 'Invalid JSON payload',
-            'url': extras_url,
-            'base_url': base_url
-        }
-
-    return {
-        'status': 'ok',
-        'data_model': payload.get('data_model'),
-        'purpose_of_use': payload.get('purpose_of_use'),
-        'raw': payload,
-        'url': extras_url,
-        'base_url': base_url
-    }
-
-
-def _fetch_offer_extras(offer_id):
-    """
-    Call the Provider UI extras API for a given offer ID to pull data model
-    and purpose of use fields when available. Try each derived base URL until
-    we either succeed or exhaust options.
-    """
-    if not PROVIDER_UI_BASES:
-        return {
-            'status': 'disabled',
-            'reason': 'PROVIDER_UI_BASE not configured'
-        }
-
-    last_error = None
-    for base in PROVIDER_UI_BASES:
-        result = _request_offer_extras(base, offer_id)
-        if result['status'] in ('ok', 'not_found'):
-            return result
-        last_error = result
-
-    return last_error or {
-        'status': 'error',
-        'error': 'Provider extras request failed'
-    }
-
-
-def _fetch_all_pages(base_url, embedded_key):
+def dataspace_connectors(request):
     """
-    Fetches every page of an IDS‐style paged endpoint,
-    accumulating all entries under `_embedded[embedded_key]`.
+    List all offers from all connectors. When the upstreams are unreachable
+    the last known good snapshot is shown with a staleness banner.
     """
-    items = []
-    page = 0
-
-    while True:
-        resp = requests.get(
-            f"{base_url.rstrip('/')}?page={page}&size={PAGE_SIZE}",
-            headers=AUTH_HEADERS,
-            verify=False
-        )
-        resp.raise_for_status()
-        payload = resp.json()
-
-        batch = payload.get('_embedded', {}).get(embedded_key, [])
-        items.extend(batch)
-
-        pg = payload.get('page', {})
-        # stop when we've reached the last page
-        if pg.get('number', 0) >= pg.get('totalPages', 1) - 1:
-            break
-
-        page += 1
+    listing = get_listing()
+    if listing['offers'] is None:
+        return render(request, 'consume/error.html', {
+            'error': listing['error']
+        })
 
-    return items
+    fetched_at = listing['fetched_at']
+    # Keys the cached offer grid
+    listing_version = _listing_version(listing)
+    etag = make_etag('listing', viewer(request), listing_version, listing['stale'], listing['error'])
+    cached = not_modified(request, etag, fetched_at)
+    if cached:
+        return cached
+
+    response = render(request, 'consume/connector_offers.html', {
+        'offers': listing['offers'],
+        'listing': listing,
+        'listing_version': listing_version,
+    })
+    return with_validators(response, etag, fetched_at)
 
 
-def dataspace_connectors(request):
+def offers_api(request):
     """
-    List all offers from all connectors:
-    - Normalize broker response into a list of connectors
-    - For each connector, iterate all catalogs
-    - For each catalog, iterate all offers
+    JSON variant of the offer listing.
     """
-    print("Fetching all connectors...")
-    raw = get_all_connectors()
-    if isinstance(raw, dict) and raw.get('error'):
-        return render(request, 'consume/error.html', {
-            'error': raw['error']
-        })
-
-    # Normalize into a list of connector dicts
-    if isinstance(raw, dict) and '@graph' in raw:
-        connectors = raw['@graph']
-    elif isinstance(raw, dict):
-        connectors = [raw]
-    elif isinstance(raw, list):
-        connectors = raw
-    else:
-        connectors = []
-
-    offers = []
-
-    for conn in connectors:
-        connector_id = conn.get('@id')
-
-        # Gather all sameAs endpoints (or fallback)
-        endpoints = conn.get('sameAs') or []
-        if isinstance(endpoints, str):
-            endpoints = [endpoints]
-        if not endpoints:
-            endpoints = [urljoin(connector_id, 'api/catalogs')]
-
-        for ep in endpoints:
-            ep = ep.rstrip('/')
-            catalogs_url = f"{ep}/api/catalogs"
-            catalogs = _fetch_all_pages(catalogs_url, 'catalogs')
-
-            for cat in catalogs:
-                title = cat.get('title')
-                desc  = cat.get('description')
-
-                # Build and possibly rewrite the offers URL
-                offers_href = (
-                    cat.get('_links', {})
-                       .get('offers', {})
-                       .get('href', '')
-                       .split('{')[0]
-                )
-                if '/connector/' not in offers_href and '/api/catalogs/' in offers_href:
-                    offers_href = offers_href.replace(
-                        '/api/catalogs/',
-                        '/connector/api/catalogs/'
-                    )
-
-                resources = _fetch_all_pages(offers_href, 'resources')
-                for off in resources:
-                    self_href = (
-                        off.get('_links', {})
-                           .get('self', {})
-                           .get('href', '')
-                    )
-                    offer_id = self_href.rstrip('/').split('/')[-1]
-
-                    offers.append({
-                        'connector_id':        connector_id,
-                        'catalog_title':       title,
-                        'catalog_description': desc,
-                        'offer_title':         off.get('title'),
-                        'offer_description':   off.get('description'),
-                        'offer_keywords':      off.get('keywords', []),
-                        'offer_publisher':     off.get('publisher'),
-                        'offer_url':           self_href,
-                        'offer_id':            offer_id,
-                    })
-
-    return render(request, 'consume/connector_offers.html', {
-        'offers': offers
+    listing = get_listing()
+    if listing['offers'] is None:
+        return json_response({'error': listing['error']}, status=502)
+
+    fetched_at = listing['fetched_at']
+    etag = make_etag(
+        'offers-api',
+        _listing_version(listing),
+        listing['source'],
+        listing['stale'],
+        listing['error'],
+    )
+    cached = not_modified(request, etag, fetched_at)
+    if cached:
+        return cached
+
+    response = json_response({
+        'count': len(listing['offers']),
+        'source': listing['source'],
+        'stale': listing['stale'],
+        'fetched_at': fetched_at.isoformat() if fetched_at else None,
+        'error': listing['error'],
+        'offers': [offer.as_dict() for offer in listing['offers']]
     })
+    return with_validators(response, etag, fetched_at)
 
 
 def selected_offer(request, offer_id):
@@ -547,17 +125,23 @@ def selected_offer(request, offer_id):
     raw_id = unquote(offer_id)
     try:
         url = f"{BASE_URL.rstrip('/')}/api/offers/{raw_id}"
-        resp = requests.get(url, headers=AUTH_HEADERS, verify=False)
+        with client_span('connector.offer', url) as traced:
+            resp = requests.get(url, headers=inject(AUTH_HEADERS), verify=False, timeout=upstream_timeout())
+            traced.set('http.status_code', resp.status_code)
         resp.raise_for_status()
-        offer = resp.json()
+        offer = response_json(resp)
         offer['offer_url'] = url
         offer['offer_id']  = offer_id
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         return render(request, 'consume/error.html', {
             'error': f"Failed to fetch offer {offer_id}: {e}"
         })
 
-    live_policy = get_policy(raw_id) or {}
+    try:
+        live_policy = get_policy(raw_id) or {}
+    except requests.exceptions.RequestException as exc:
+        logger.warning("Live policy lookup failed for %s: %s", raw_id, exc)
+        live_policy = {}
     policy_source = (
         live_policy
         or offer.get('policy')
@@ -567,7 +151,7 @@ def selected_offer(request, offer_id):
         or {}
     )
     if isinstance(policy_source, (dict, list)):
-        policy_raw = json.dumps(policy_source, indent=2)
+        policy_raw = dumps(policy_source, pretty=True)
     else:
         policy_raw = policy_source or "No policy provided."
     policy_summary = (
@@ -579,19 +163,35 @@ def selected_offer(request, offer_id):
 
     # Try to consume offer immediately so the page can surface IDS workflow info
     offer_url = f"{BASE_URL.rstrip('/')}/api/offers/{raw_id}"
-    should_consume = request.GET.get('consume') == '1'
-    consumption = None
+    # A result streamed by consume_stream is shown without running again
+    consumption = load_result(request.GET.get('result'), raw_id)
+    should_consume = request.GET.get('consume') == '1' or consumption is not None
     consumption_error = None
-    offer_extras = _fetch_offer_extras(raw_id)
-    route_map = None
+    offer_extras = fetch_offer_extras(raw_id)
+    route_sources = []
 
-    if should_consume:
+    # Without consumption the page is a function of the offer, its policy
+    # and the extras; skip rendering when the browser already has it
+    etag = modified = None
+    if not should_consume:
+        try:
+            modified = parse_datetime(offer.get('modificationDate') or '')
+        except ValueError:
+            modified = None
+        etag = make_etag('offer', viewer(request), resp.content, policy_raw, offer_extras)
+        cached = not_modified(request, etag, modified)
+        if cached:
+            return cached
+
+    if consumption is not None:
+        route_sources = _register_route_sources(consumption)
+    elif should_consume:
         try:
             consumption = runner(offer_url)
         except Exception as exc:
             consumption_error = str(exc)
         else:
-            route_map = _build_route_map(consumption)
+            route_sources = _register_route_sources(consumption)
 
     # stepper state flags
     step_state = {
@@ -602,7 +202,7 @@ def selected_offer(request, offer_id):
         'consume_error': consumption_error is not None,
     }
 
-    return render(request, 'consume/selected_offer.html', {
+    response = render(request, 'consume/selected_offer.html', {
         'offer':    offer,
         'offer_id': offer_id,
         'should_consume': should_consume,
@@ -620,12 +220,131 @@ def selected_offer(request, offer_id):
                 'message': WORKFLOW_SUMMARY_TEXT.get(
                     step.get('label'),
                     'Completed successfully.'
-                )
+                ),
+                'duration_ms': step.get('duration_ms'),
             }
             for step in (consumption or {}).get('steps', [])
         ] if consumption else None,
-        'route_map': route_map
+        'route_sources': route_sources
     })
+    if etag:
+        with_validators(response, etag, modified)
+    return response
+
+
+def _register_route_sources(consumption):
+    """
+    Offer each stored artifact (keyed by its SHA-256) to the route map so it
+    can be built by a separate, cacheable request instead of delaying the
+    offer page. Sets ``route`` on every artifact of the consumption to the
+    map source info, or None for artifacts that cannot contain a route, and
+    returns the mappable ones.
+    """
+    sources = []
+    for entry in (consumption or {}).get('artifacts') or []:
+        entry['route'] = None
+        with open_artifact(entry.get('key')) as artifact:
+            if not artifact or not looks_like_route_document(artifact['content']):
+                continue
+        entry['route'] = {
+            'key': entry['key'],
+            'url': reverse('consume:route_geojson', args=[entry['key']]),
+            'artifact_url': entry['artifact_url'],
+        }
+        sources.append(entry['route'])
+    return sources
+
+
+def route_geojson_view(request, route_key):
+    """
+    GeoJSON route map for a consumed artifact, keyed by the SHA-256 of its
+    body. ``?zoom=N`` simplifies long routes for that map zoom level.
+    """
+    if not ROUTE_KEY_RE.match(route_key):
+        return json_response({'detail': 'Unknown route.'}, status=404)
+
+    zoom = request.GET.get('zoom')
+    try:
+        zoom = min(max(int(zoom), 0), MAX_ROUTE_ZOOM) if zoom not in (None, '') else None
+    except ValueError:
+        return json_response({'detail': 'zoom must be an integer.'}, status=400)
+
+    result_key = route_cache_key('geojson', route_key, zoom)
+    geojson = cache.get(result_key)
+    if geojson is None:
+        # Usually already parsed when the consumption recorded the shipment
+        route_map = cached_route_map(route_key)
+        if route_map is None:
+            return json_response(
+                {'detail': 'Route source expired. Consume the offer again.'},
+                status=404
+            )
+        if not route_map:
+            return json_response({'detail': 'No mappable transport legs in this artifact.'}, status=404)
+        geojson = route_geojson(route_map, zoom=zoom)
+        cache.set(result_key, geojson, ROUTE_SOURCE_TTL)
+
+    return json_response(geojson, content_type='application/geo+json')
+
+
+def artifact_preview_api(request, artifact_key):
+    """
+    Page through a consumed artifact. ``?offset=&length=`` returns a byte
+    range (JSON re-indented for that slice unless ``pretty=0``); pass the
+    ``next_cursor`` of a page as ``?cursor=`` to fetch the one after it.
+    ``?line=&lines=`` returns a line range, also with a ``next_cursor``.
+    """
+    with open_artifact(artifact_key) as artifact:
+        if artifact is None:
+            return json_response(
+                {'detail': 'Artifact expired. Consume the offer again.'},
+                status=404
+            )
+
+        try:
+            if 'line' in request.GET or 'lines' in request.GET:
+                page = line_page(
+                    artifact,
+                    line=int(request.GET.get('line') or 0),
+                    lines=int(request.GET.get('lines') or 200),
+                    cursor=request.GET.get('cursor')
+                )
+            else:
+                page = byte_page(
+                    artifact,
+                    offset=int(request.GET.get('offset') or 0),
+                    length=int(request.GET.get('length') or 0) or None,
+                    pretty=request.GET.get('pretty') != '0',
+                    cursor=request.GET.get('cursor')
+                )
+        except ValueError:
+            return json_response(
+                {'detail': 'offset, length, line and lines must be integers and cursor as returned.'},
+                status=400
+            )
+    return json_response(page)
+
+
+def emissions_analytics_api(request):
+    """
+    Emissions statistics across every consumed shipment as JSON.
+    ``?rank=intensity|total`` orders the corridor/shipment rankings by CO2e
+    per km or total CO2e; ``?limit=N`` caps their length.
+    """
+    rank_by = request.GET.get('rank') or 'intensity'
+    if rank_by not in ('intensity', 'total'):
+        return json_response({'detail': 'rank must be "intensity" or "total".'}, status=400)
+    try:
+        limit = min(max(int(request.GET.get('limit') or 20), 1), 500)
+    except ValueError:
+        return json_response({'detail': 'limit must be an integer.'}, status=400)
+
+    try:
+        summary = emissions_summary(rank_by=rank_by, limit=limit)
+    except DatabaseError as exc:
+        logger.exception("Emissions analytics query failed")
+        return json_response({'detail': f"Analytics unavailable: {exc}"}, status=503)
+    return json_response(summary)
 
 
 def consume_offer(request, offer_id):
@@ -638,3 +357,39 @@ def consume_offer(request, offer_id):
     # Redirect to the unified selected_offer view with consume mode enabled
     target = f"{reverse('consume:selected_offer', args=[offer_id])}?consume=1"
     return redirect(target)
+
+
+def consume_stream(request, offer_id):
+    """
+    Consume an offer, streaming each pipeline step as a Server-Sent Event.
+    The final ``done`` event links to the offer page showing the result.
+    Served from the event loop under ASGI, from the request thread under WSGI.
+    """
+    raw_id = unquote(offer_id)
+    offer_url = f"{BASE_URL.rstrip('/')}/api/offers/{raw_id}"
+    result_url = reverse('consume:selected_offer', args=[offer_id])
+    relay = astream if isinstance(request, ASGIRequest) else stream
+    response = StreamingHttpResponse(
+        relay(offer_url, raw_id, result_url, parent=current_parent()),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Keep nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def health(request):
+    """
+    Liveness: the worker is up and serving. Never touches an upstream.
+    """
+    return json_response(liveness())
+
+
+def health_ready(request):
+    """
+    Readiness from the background probes' cached results (503 when a
+    required upstream is unreachable or its probe result is stale).
+    """
+    ready, report = readiness()
+    return json_response(report, status=200 if ready else 503)
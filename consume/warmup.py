@@ -0,0 +1,198 @@
+import fcntl
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from decouple import config
+
+from core.deadline import propagate
+
+from . import catalog
+from .extras import fetch_offer_extras
+
+# Prime the caches in a background thread when a serving process starts
+CACHE_WARMUP_ON_STARTUP = config('CACHE_WARMUP_ON_STARTUP', default=False, cast=bool)
+# Also fetch Provider UI extras for listed offers during a refresh
+CACHE_WARMUP_EXTRAS = config('CACHE_WARMUP_EXTRAS', default=False, cast=bool)
+# Offers (in listing order) whose extras a refresh fetches; 0 means all
+CACHE_WARMUP_EXTRAS_LIMIT = config('CACHE_WARMUP_EXTRAS_LIMIT', default=100, cast=int)
+# Extras lookups a refresh runs at a time
+CACHE_WARMUP_EXTRAS_PARALLEL = config('CACHE_WARMUP_EXTRAS_PARALLEL', default=4, cast=int)
+# Seconds between in-process refreshes; 0 disables the in-process scheduler
+CACHE_REFRESH_INTERVAL = config('CACHE_REFRESH_INTERVAL', default=0, cast=int)
+# Maximum random offset (seconds) added to or removed from each interval
+CACHE_REFRESH_JITTER = config('CACHE_REFRESH_JITTER', default=30, cast=int)
+CACHE_REFRESH_LOCK = Path(config(
+    'CACHE_REFRESH_LOCK',
+    default=str(Path(__file__).resolve().parent.parent / 'var' / 'cache_refresh.lock')
+))
+
+logger = logging.getLogger(__name__)
+
+_scheduler_started = False
+_scheduler_guard = threading.Lock()
+
+
+def warm_caches(include_extras=None):
+    """
+    Refresh the broker response, the offer listing (and its snapshot) and,
+    optionally, the Provider UI extras of the first CACHE_WARMUP_EXTRAS_LIMIT
+    listed offers.
+
+    Returns a summary dict for logging or command output.
+    """
+    if include_extras is None:
+        include_extras = CACHE_WARMUP_EXTRAS
+
+    started = time.monotonic()
+    ok = catalog.refresh_listing(refresh=True)
+    listing = catalog.get_listing() if ok else None
+    offers = (listing or {}).get('offers') or []
+
+    extras = 0
+    if ok and include_extras:
+        extras = _warm_extras(offers)
+
+    summary = {
+        'ok': ok,
+        'offers': len(offers),
+        'extras': extras,
+        'seconds': round(time.monotonic() - started, 3),
+    }
+    if ok:
+        logger.info("Cache warm-up finished %s", summary)
+    else:
+        logger.warning("Cache warm-up failed %s", summary)
+    return summary
+
+
+def _refresh_extras(offer_id):
+    return fetch_offer_extras(offer_id, refresh=True)
+
+
+def _warm_extras(offers):
+    offer_ids = list(dict.fromkeys(offer.offer_id for offer in offers))
+    if CACHE_WARMUP_EXTRAS_LIMIT > 0:
+        offer_ids = offer_ids[:CACHE_WARMUP_EXTRAS_LIMIT]
+    if not offer_ids:
+        return 0
+    workers = max(1, min(CACHE_WARMUP_EXTRAS_PARALLEL, len(offer_ids)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(propagate(_refresh_extras), offer_ids))
+    return sum(1 for result in results if result.get('status') in ('ok', 'not_found'))
+
+
+class _RefreshLock:
+    """
+    Non-blocking exclusive file lock shared by every worker on the host.
+
+    The lock file holds the epoch time of the last completed refresh, so a
+    worker that obtains the lock right after another one finished can skip
+    the crawl.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._handle = None
+
+    def acquire(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handle = open(self.path, 'a+')
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._handle = handle
+        return True
+
+    def seconds_since_refresh(self):
+        try:
+            return time.time() - float(self.path.read_text().strip())
+        except (OSError, ValueError):
+            return None
+
+    def mark_refreshed(self):
+        self.path.write_text(str(time.time()))
+
+    def release(self):
+        if self._handle is not None:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+            self._handle.close()
+            self._handle = None
+
+
+def refresh_once(interval, include_extras=None, lock_path=None):
+    """
+    Run one scheduled refresh if no other worker is refreshing and none has
+    refreshed within the last half interval. Workers that skip the crawl
+    pick up the snapshot written by the worker that ran it.
+
+    Returns 'refreshed', 'failed', 'skipped' or 'busy'.
+    """
+    lock = _RefreshLock(lock_path or CACHE_REFRESH_LOCK)
+    if not lock.acquire():
+        catalog.reload_snapshot()
+        return 'busy'
+    try:
+        since = lock.seconds_since_refresh()
+        if since is not None and since < interval / 2:
+            catalog.reload_snapshot()
+            return 'skipped'
+        summary = warm_caches(include_extras=include_extras)
+        if not summary['ok']:
+            return 'failed'
+        lock.mark_refreshed()
+        return 'refreshed'
+    finally:
+        lock.release()
+
+
+def next_delay(interval, jitter):
+    return max(1.0, interval + random.uniform(-jitter, jitter))
+
+
+def run_scheduler(interval, jitter=None, include_extras=None, stop_event=None):
+    """
+    Refresh the caches every ``interval`` seconds (± ``jitter``) until
+    ``stop_event`` is set.
+    """
+    jitter = CACHE_REFRESH_JITTER if jitter is None else jitter
+    stop_event = stop_event or threading.Event()
+    while not stop_event.wait(next_delay(interval, jitter)):
+        try:
+            outcome = refresh_once(interval, include_extras=include_extras)
+        except Exception:
+            logger.exception("Scheduled cache refresh crashed")
+            continue
+        logger.info("Scheduled cache refresh outcome=%s", outcome)
+
+
+def start_background_tasks():
+    """
+    Start the opt-in startup warm-up and in-process refresh scheduler.
+    Safe to call more than once per process.
+    """
+    global _scheduler_started
+    if not (CACHE_WARMUP_ON_STARTUP or CACHE_REFRESH_INTERVAL > 0):
+        return
+    with _scheduler_guard:
+        if _scheduler_started:
+            return
+        _scheduler_started = True
+
+    def _run():
+        if CACHE_WARMUP_ON_STARTUP:
+            try:
+                # Spread workers out so they do not all crawl at once on deploy
+                time.sleep(random.uniform(0, min(CACHE_REFRESH_JITTER, 5)))
+                refresh_once(CACHE_REFRESH_INTERVAL or 60)
+            except Exception:
+                logger.exception("Startup cache warm-up crashed")
+        if CACHE_REFRESH_INTERVAL > 0:
+            run_scheduler(CACHE_REFRESH_INTERVAL)
+
+    threading.Thread(target=_run, name='cache-refresh', daemon=True).start()
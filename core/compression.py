@@ -0,0 +1,73 @@
+import re
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only without it
+    brotli = None
+
+_CODING_RE = re.compile(r"^\s*([a-z*]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$", re.I)
+
+
+def accepted_codings(header):
+    """Content codings the client accepts (q > 0), lower-cased."""
+    accepted = set()
+    for part in (header or "").split(","):
+        match = _CODING_RE.match(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) is not None else 1.0
+        except ValueError:
+            continue
+        if quality > 0:
+            accepted.add(match.group(1).lower())
+    return accepted
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress responses of at least COMPRESSION_MIN_BYTES with brotli when
+    the client accepts it and the ``brotli`` package is installed, with
+    gzip otherwise. Streaming responses are gzipped chunk by chunk, as by
+    Django's GZipMiddleware.
+    """
+
+    def process_response(self, request, response):
+        # Events must reach the client as they are written
+        if response.get("Content-Type", "").startswith("text/event-stream"):
+            return response
+        if response.streaming:
+            return super().process_response(request, response)
+        if response.has_header("Content-Encoding"):
+            return response
+        if len(response.content) < getattr(settings, "COMPRESSION_MIN_BYTES", 1024):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        accepted = accepted_codings(request.META.get("HTTP_ACCEPT_ENCODING"))
+        if brotli is not None and "br" in accepted:
+            coding = "br"
+            compressed = brotli.compress(
+                response.content, quality=getattr(settings, "COMPRESSION_BROTLI_QUALITY", 5)
+            )
+        elif "gzip" in accepted:
+            coding = "gzip"
+            compressed = compress_string(response.content, max_random_bytes=self.max_random_bytes)
+        else:
+            return response
+
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        # The representation changed, so a strong validator becomes weak
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = coding
+        return response
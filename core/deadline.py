@@ -0,0 +1,84 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+import requests
+from django.conf import settings
+
+# Below this many seconds an upstream call is not worth starting
+MIN_UPSTREAM_TIMEOUT = 0.05
+
+_deadline = contextvars.ContextVar('request_deadline', default=None)
+_cancel = contextvars.ContextVar('request_cancel', default=None)
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """
+    The request's time budget is spent. Subclasses requests' Timeout so the
+    existing upstream error handling degrades the page the same way.
+    """
+
+
+class RequestCancelled(DeadlineExceeded):
+    """The client that the work was for has gone away."""
+
+
+@contextmanager
+def request_budget(seconds, cancel=None):
+    """
+    Give the code in the block ``seconds`` to finish its upstream calls.
+    A falsy or non-positive value means no budget. Setting the optional
+    ``cancel`` event (a threading.Event) ends the budget early.
+    """
+    deadline = time.monotonic() + seconds if seconds and seconds > 0 else None
+    token = _deadline.set(deadline)
+    cancel_token = _cancel.set(cancel)
+    try:
+        yield
+    finally:
+        _cancel.reset(cancel_token)
+        _deadline.reset(token)
+
+
+def remaining():
+    """Seconds left in the current budget, or None when there is none."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check():
+    cancel = _cancel.get()
+    if cancel is not None and cancel.is_set():
+        raise RequestCancelled("Request cancelled")
+    left = remaining()
+    if left is not None and left < MIN_UPSTREAM_TIMEOUT:
+        raise DeadlineExceeded("Request time budget exhausted")
+
+
+def upstream_timeout(limit=None):
+    """
+    Timeout for the next upstream call: ``limit`` (UPSTREAM_TIMEOUT by
+    default) shortened to what is left of the request budget. Raises
+    DeadlineExceeded when the budget is already spent.
+    """
+    if limit is None:
+        limit = getattr(settings, 'UPSTREAM_TIMEOUT', 10)
+    check()
+    left = remaining()
+    return limit if left is None else min(limit, left)
+
+
+def propagate(func):
+    """
+    Wrap ``func`` so calls made from worker threads (e.g. a
+    ThreadPoolExecutor) run against the caller's budget.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # A Context can only be entered by one thread at a time
+        return context.copy().run(func, *args, **kwargs)
+
+    return run
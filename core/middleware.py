@@ -5,6 +5,9 @@ import requests
 from django.conf import settings
 from django.http import JsonResponse, HttpResponseRedirect
 
+from .deadline import request_budget, upstream_timeout
+from .tracing import client_span, inject
+
 
 DEFAULT_ALLOWLIST = [
     "/health",
@@ -12,6 +15,28 @@ DEFAULT_ALLOWLIST = [
     "/api/auth/profile",
 ]
 
+# Paths answered with JSON, so a denied request gets a 401 rather than a
+# redirect to the login page
+API_PATH_PREFIXES = (
+    "/api/",
+    "/consume/api/",
+)
+
+
+class RequestDeadlineMiddleware:
+    """
+    Give every request REQUEST_DEADLINE_SECONDS for all of its upstream
+    calls (auth service, connector, broker, provider UI). Must run before
+    any middleware that calls upstream.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with request_budget(getattr(settings, "REQUEST_DEADLINE_SECONDS", 25)):
+            return self.get_response(request)
+
 
 class AuthServiceMiddleware:
     def __init__(self, get_response):
@@ -39,12 +64,15 @@ class AuthServiceMiddleware:
 
         profile_url = self._build_profile_url(base_url)
         try:
-            response = requests.get(
-                profile_url,
-                cookies=cookies,
-                timeout=getattr(settings, "AUTH_SERVICE_TIMEOUT", 3),
-                verify=getattr(settings, "AUTH_SERVICE_VERIFY_SSL", True),
-            )
+            with client_span("auth.profile", profile_url) as traced:
+                response = requests.get(
+                    profile_url,
+                    headers=inject({}),
+                    cookies=cookies,
+                    timeout=upstream_timeout(getattr(settings, "AUTH_SERVICE_TIMEOUT", 3)),
+                    verify=getattr(settings, "AUTH_SERVICE_VERIFY_SSL", True),
+                )
+                traced.set("http.status_code", response.status_code)
         except requests.RequestException as exc:
             self.logger.warning(
                 "Auth service request failed path=%s reason=%s",
@@ -138,7 +166,7 @@ class AuthServiceMiddleware:
             return True
         if request.headers.get("X-Requested-With") == "XMLHttpRequest":
             return True
-        if request.path.startswith("/api/"):
+        if request.path.startswith(API_PATH_PREFIXES):
             return True
         return False
 
@@ -0,0 +1,212 @@
+import cProfile
+import hmac
+import io
+import itertools
+import json
+import logging
+import pstats
+import re
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_NAME_RE = re.compile(r"^[0-9]{14}-[0-9]+-[a-z0-9-]*$")
+
+# Entry points whose cumulative time is reported as a summary category, as
+# (file path suffix, function name). None of them calls another of its own
+# category; categories can still overlap (e.g. JSON decoded while mapping).
+CATEGORIES = {
+    "upstream": (("requests/sessions.py", "request"),),
+    "json": (
+        ("consume/jsonlib.py", "loads"),
+        ("consume/jsonlib.py", "dumps_bytes"),
+    ),
+    "route_map": (
+        ("consume/routes.py", "build_route_map_from_stream"),
+        ("consume/routes.py", "route_geojson"),
+    ),
+    "templates": (("django/template/backends/django.py", "render"),),
+}
+
+logger = logging.getLogger(__name__)
+
+# cProfile instances cannot be nested, so one request is profiled at a time
+_profiling = threading.Lock()
+_sequence = itertools.count(1)
+
+
+def profile_dir():
+    return Path(getattr(settings, "PROFILING_DIR", "var/profiles"))
+
+
+def is_requested(request):
+    """
+    True when a signed-in staff user sends the PROFILING_TOKEN in the
+    X-Profile header. The token is never read from the query string, where
+    it would end up in access logs and Referer headers. Profiling is off
+    without a configured token.
+    """
+    token = getattr(settings, "PROFILING_TOKEN", "")
+    if not token:
+        return False
+    supplied = request.headers.get(PROFILE_HEADER) or ""
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        return False
+    # Same rule as the profile views; needs SessionMiddleware to run first
+    user = get_user(request)
+    if not (user.is_active and user.is_staff):
+        logger.warning("Profiling refused for non-staff request path=%s", request.path)
+        return False
+    return True
+
+
+def _slug(path):
+    return re.sub(r"[^a-z0-9]+", "-", path.lower()).strip("-")[:60]
+
+
+def _function_label(func):
+    filename, lineno, name = func
+    return f"{filename}:{lineno}({name})"
+
+
+def _category_times(stats):
+    totals = {}
+    for category, targets in CATEGORIES.items():
+        seconds = 0.0
+        calls = 0
+        for (filename, _, name), (_, ncalls, _, cumtime, _) in stats.stats.items():
+            normalized = filename.replace("\\", "/")
+            if any(normalized.endswith(suffix) and name == target for suffix, target in targets):
+                seconds += cumtime
+                calls += ncalls
+        totals[category] = {"ms": round(seconds * 1000, 3), "calls": calls}
+    return totals
+
+
+def summarize(profiler, top=None):
+    """
+    Top functions by cumulative and own time plus the category totals
+    (upstream wait, JSON, route mapping, template rendering).
+    """
+    top = top or getattr(settings, "PROFILING_TOP", 25)
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+
+    def ranked(index):
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][index], reverse=True)
+        return [
+            {
+                "function": _function_label(func),
+                "calls": ncalls,
+                "own_ms": round(tottime * 1000, 3),
+                "cumulative_ms": round(cumtime * 1000, 3),
+            }
+            for func, (_, ncalls, tottime, cumtime, _) in rows[:top]
+        ]
+
+    return {
+        "total_calls": stats.total_calls,
+        "categories": _category_times(stats),
+        "top_cumulative": ranked(3),
+        "top_own": ranked(2),
+    }
+
+
+def _prune(directory, keep):
+    dumps = sorted(directory.glob("*.prof"))
+    for old in dumps[:-keep] if keep > 0 else dumps:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".json").unlink(missing_ok=True)
+
+
+def save(profiler, request, response, wall_seconds):
+    """
+    Write the raw dump (.prof, readable by pstats/snakeviz) and its summary
+    (.json) and drop the oldest beyond PROFILING_KEEP. Returns the name.
+    """
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d%H%M%S')}-{next(_sequence):06d}-{_slug(request.path)}"
+    summary = {
+        "name": name,
+        "method": request.method,
+        "path": request.path,
+        "status": getattr(response, "status_code", None),
+        "wall_ms": round(wall_seconds * 1000, 3),
+        "created_at": time.time(),
+    }
+    summary.update(summarize(profiler))
+    profiler.dump_stats(directory / f"{name}.prof")
+    (directory / f"{name}.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    _prune(directory, getattr(settings, "PROFILING_KEEP", 20))
+    return name
+
+
+def list_profiles():
+    """Summaries of the stored profiles, newest first, without the function tables."""
+    profiles = []
+    for path in sorted(profile_dir().glob("*.json"), reverse=True):
+        try:
+            summary = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        for key in ("top_cumulative", "top_own"):
+            summary.pop(key, None)
+        profiles.append(summary)
+    return profiles
+
+
+def load_profile(name):
+    """(summary dict, dump path) of one stored profile, or (None, None)."""
+    if not PROFILE_NAME_RE.match(name):
+        return None, None
+    path = profile_dir() / f"{name}.json"
+    try:
+        summary = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None, None
+    return summary, path.with_suffix(".prof")
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests that carry the PROFILING_TOKEN (see is_requested) with
+    cProfile and keep the last PROFILING_KEEP dumps on disk. Other requests
+    pass straight through. Only the request thread is profiled; work handed
+    to thread pools shows up as the time spent waiting for it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_requested(request):
+            return self.get_response(request)
+        if not _profiling.acquire(blocking=False):
+            response = self.get_response(request)
+            response[PROFILE_HEADER] = "busy"
+            return response
+
+        try:
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            wall = time.perf_counter() - started
+            try:
+                name = save(profiler, request, response, wall)
+            except OSError as exc:
+                logger.warning("Could not store profile path=%s reason=%s", request.path, exc)
+                return response
+        finally:
+            _profiling.release()
+
+        logger.info("Profiled path=%s wall_ms=%.1f profile=%s", request.path, wall * 1000, name)
+        response[PROFILE_HEADER] = name
+        return response
@@ -42,7 +42,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.compression.CompressionMiddleware',
+    'core.tracing.TracingMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.profiling.ProfilingMiddleware',
+    'core.middleware.RequestDeadlineMiddleware',
     'core.middleware.AuthServiceMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -53,18 +58,29 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'core.urls'
 
+# Keep compiled templates in memory (disable only while editing templates
+# without the autoreloader)
+TEMPLATE_CACHE = config('TEMPLATE_CACHE', default=True, cast=bool)
+_TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages'
+                'django.contrib.messages.context_processors.messages',
+                'consume.context_processors.template_fragments',
             ],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', _TEMPLATE_LOADERS)
+            ] if TEMPLATE_CACHE else _TEMPLATE_LOADERS,
         },
     },
 ]
@@ -84,6 +100,35 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Use a shared backend (e.g. FileBasedCache or Redis) when running several
+# workers so per-consumption data such as route sources is visible to all.
+
+CACHES = {
+    'default': {
+        'BACKEND': config(
+            'DJANGO_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': config('DJANGO_CACHE_LOCATION', default='consume'),
+    }
+}
+
+# Rendered template fragments (offer cards, static page parts). Bump
+# TEMPLATE_FRAGMENT_VERSION on deploys that change those templates when the
+# cache is shared and outlives the workers.
+TEMPLATE_FRAGMENT_CACHE = config('TEMPLATE_FRAGMENT_CACHE', default=True, cast=bool)
+TEMPLATE_FRAGMENT_TTL = config('TEMPLATE_FRAGMENT_TTL', default=3600, cast=int)
+TEMPLATE_FRAGMENT_VERSION = config('TEMPLATE_FRAGMENT_VERSION', default=1, cast=int)
+CACHES['template_fragments'] = dict(
+    CACHES['default'],
+    KEY_PREFIX='fragments',
+    VERSION=TEMPLATE_FRAGMENT_VERSION,
+) if TEMPLATE_FRAGMENT_CACHE else {
+    'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -137,6 +182,30 @@ AUTH_SERVICE_TIMEOUT = config('AUTH_SERVICE_TIMEOUT', default=3, cast=int)
 AUTH_SERVICE_VERIFY_SSL = config('AUTH_SERVICE_VERIFY_SSL', default=True, cast=bool)
 AUTH_SERVICE_ENFORCE = config('AUTH_SERVICE_ENFORCE', default=True, cast=bool)
 
+# Time budget (seconds) shared by all upstream calls of one request; 0 disables it
+REQUEST_DEADLINE_SECONDS = config('REQUEST_DEADLINE_SECONDS', default=25, cast=float)
+# Longest single upstream call, also outside requests (background refreshes)
+UPSTREAM_TIMEOUT = config('UPSTREAM_TIMEOUT', default=10, cast=float)
+
+# On-demand profiling: staff requests sending this token in the X-Profile header
+# are profiled; empty disables profiling
+PROFILING_TOKEN = config('PROFILING_TOKEN', default='').strip()
+PROFILING_DIR = BASE_DIR / config('PROFILING_DIR', default='var/profiles')
+# Profile dumps kept on disk, oldest removed first
+PROFILING_KEEP = config('PROFILING_KEEP', default=20, cast=int)
+# Functions listed per table in a profile summary
+PROFILING_TOP = config('PROFILING_TOP', default=25, cast=int)
+
+# Tracing: 'stdout' or a file path receiving one OTLP/JSON line per trace;
+# empty disables tracing
+TRACING_EXPORT = config('TRACING_EXPORT', default='').strip()
+TRACING_SERVICE_NAME = config('TRACING_SERVICE_NAME', default='consume-ui')
+
+# Response compression: bodies below this size are sent as they are; brotli
+# (when installed) is used at this quality, gzip otherwise
+COMPRESSION_MIN_BYTES = config('COMPRESSION_MIN_BYTES', default=1024, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=5, cast=int)
+
 
 def _parse_csv(value):
     return [item.strip() for item in value.split(',') if item.strip()]
@@ -146,6 +215,44 @@ AUTH_SERVICE_ALLOWLIST = _parse_csv(
     config('AUTH_SERVICE_ALLOWLIST', default='')
 )
 
+# Logging
+# https://docs.djangoproject.com/en/5.1/topics/logging/
+# LOG_LEVEL=DEBUG also logs upstream payloads (capped by LOG_PAYLOAD_MAX_CHARS)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'trace_id': {
+            '()': 'core.tracing.TraceIdFilter',
+        },
+    },
+    'formatters': {
+        'simple': {
+            'format': '%(asctime)s %(levelname)s %(name)s [%(trace_id)s] %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+            'filters': ['trace_id'],
+        },
+    },
+    'loggers': {
+        'consume': {
+            'handlers': ['console'],
+            'level': config('LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+        'core': {
+            'handlers': ['console'],
+            'level': config('LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
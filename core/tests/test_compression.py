@@ -0,0 +1,78 @@
+import gzip
+import os
+import unittest
+from unittest import mock
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .. import compression
+
+BODY = b'{"offers": [' + b'{"title": "Shipment footprint"},' * 200 + b'{}]}'
+
+
+class AcceptedCodingsTests(SimpleTestCase):
+
+    def test_codings_with_positive_quality(self):
+        self.assertEqual(
+            compression.accepted_codings('gzip, deflate;q=0.5, BR;q=1.0, identity;q=0'),
+            {'gzip', 'deflate', 'br'}
+        )
+
+    def test_malformed_entries_are_skipped(self):
+        self.assertEqual(compression.accepted_codings('gzip;q=abc, br;level=3, ;, *'), {'*'})
+        self.assertEqual(compression.accepted_codings(None), set())
+
+
+@override_settings(COMPRESSION_MIN_BYTES=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+
+    def respond(self, response, accept='gzip, br'):
+        request = RequestFactory().get('/consume/', HTTP_ACCEPT_ENCODING=accept)
+        return compression.CompressionMiddleware(lambda request: response)(request)
+
+    @unittest.skipIf(compression.brotli is None, 'brotli is not installed')
+    def test_brotli_is_preferred(self):
+        response = self.respond(HttpResponse(BODY))
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(response.content), BODY)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_gzip_without_brotli_support(self):
+        with mock.patch.object(compression, 'brotli', None):
+            response = self.respond(HttpResponse(BODY))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+
+    def test_gzip_when_the_client_only_accepts_gzip(self):
+        self.assertEqual(self.respond(HttpResponse(BODY), accept='gzip')['Content-Encoding'], 'gzip')
+
+    def test_strong_etag_becomes_weak(self):
+        response = HttpResponse(BODY)
+        response['ETag'] = '"abc"'
+
+        self.assertEqual(self.respond(response)['ETag'], 'W/"abc"')
+
+    def test_skipped_responses_are_untouched(self):
+        cases = {
+            'small body': HttpResponse(b'x' * 100),
+            'no accepted coding': HttpResponse(BODY),
+            'already encoded': HttpResponse(BODY, headers={'Content-Encoding': 'identity'}),
+            'incompressible': HttpResponse(os.urandom(4096)),
+            'event stream': StreamingHttpResponse(iter([BODY]), content_type='text/event-stream'),
+        }
+        for name, response in cases.items():
+            accept = 'identity' if name == 'no accepted coding' else 'gzip'
+            with self.subTest(name), mock.patch.object(compression, 'brotli', None):
+                result = self.respond(response, accept=accept)
+                self.assertIs(result, response)
+                self.assertNotEqual(result.get('Content-Encoding'), 'gzip')
+
+    def test_other_streams_are_gzipped_chunk_by_chunk(self):
+        response = self.respond(StreamingHttpResponse(iter([BODY, BODY])), accept='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), BODY * 2)
@@ -0,0 +1,100 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase, override_settings
+
+from .. import deadline
+from ..deadline import DeadlineExceeded, RequestCancelled, propagate, request_budget, upstream_timeout
+
+
+@override_settings(UPSTREAM_TIMEOUT=10)
+class UpstreamTimeoutTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(deadline.time, 'monotonic', return_value=100.0)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_without_a_budget_the_limit_applies(self):
+        self.assertIsNone(deadline.remaining())
+        self.assertEqual(upstream_timeout(), 10)
+        self.assertEqual(upstream_timeout(3), 3)
+
+    def test_timeout_is_cut_to_the_remaining_budget(self):
+        with request_budget(25):
+            self.assertEqual(upstream_timeout(), 10)
+            self.clock.return_value = 120.0
+            self.assertEqual(upstream_timeout(), 5)
+
+    def test_spent_budget_raises_a_timeout(self):
+        with request_budget(5):
+            self.clock.return_value = 105.0 - deadline.MIN_UPSTREAM_TIMEOUT / 2
+            with self.assertRaises(DeadlineExceeded):
+                upstream_timeout()
+            # Caught by the existing upstream error handling
+            self.assertTrue(issubclass(DeadlineExceeded, requests.exceptions.Timeout))
+
+    def test_non_positive_budget_means_none(self):
+        for seconds in (0, None, -1):
+            with self.subTest(seconds=seconds), request_budget(seconds):
+                self.assertIsNone(deadline.remaining())
+
+    def test_budget_is_restored_after_the_block(self):
+        with request_budget(25):
+            with request_budget(2):
+                self.assertEqual(deadline.remaining(), 2)
+            self.assertEqual(deadline.remaining(), 25)
+        self.assertIsNone(deadline.remaining())
+
+
+class CancellationTests(SimpleTestCase):
+
+    def test_set_event_cancels_the_budget(self):
+        cancel = threading.Event()
+        with request_budget(None, cancel=cancel):
+            deadline.check()
+            cancel.set()
+            with self.assertRaises(RequestCancelled):
+                upstream_timeout()
+        self.assertTrue(issubclass(RequestCancelled, DeadlineExceeded))
+
+    def test_cancel_event_ends_with_the_block(self):
+        cancel = threading.Event()
+        cancel.set()
+        with request_budget(None, cancel=cancel):
+            pass
+
+        deadline.check()
+
+
+class PropagateTests(SimpleTestCase):
+
+    def test_worker_threads_run_against_the_callers_budget(self):
+        cancel = threading.Event()
+        with request_budget(30, cancel=cancel), ThreadPoolExecutor(max_workers=2) as pool:
+            left = [pool.submit(propagate(deadline.remaining)).result() for _ in range(3)]
+            cancel.set()
+            cancelled = pool.submit(propagate(deadline.check))
+
+        self.assertTrue(all(0 < value <= 30 for value in left))
+        with self.assertRaises(RequestCancelled):
+            cancelled.result()
+
+    def test_plain_threads_have_no_budget(self):
+        with request_budget(30), ThreadPoolExecutor(max_workers=1) as pool:
+            self.assertIsNone(pool.submit(deadline.remaining).result())
+
+    def test_wrapped_function_can_run_in_several_threads_at_once(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wait():
+            barrier.wait()
+            return deadline.remaining()
+
+        with request_budget(30), ThreadPoolExecutor(max_workers=2) as pool:
+            run = propagate(wait)
+            results = [future.result() for future in [pool.submit(run), pool.submit(run)]]
+
+        self.assertEqual(len(results), 2)
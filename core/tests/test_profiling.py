@@ -0,0 +1,103 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from .. import profiling
+
+TOKEN = 'profile-secret'
+
+
+@override_settings(PROFILING_TOKEN=TOKEN)
+class ProfilingGateTests(TestCase):
+
+    def setUp(self):
+        self.staff = get_user_model().objects.create_user('staff', is_staff=True)
+        self.member = get_user_model().objects.create_user('member')
+
+    def request(self, user=None, token=TOKEN, path='/consume/'):
+        headers = {profiling.PROFILE_HEADER: token} if token is not None else {}
+        if user is not None:
+            self.client.force_login(user)
+        request = RequestFactory().get(path, headers=headers)
+        request.session = self.client.session
+        return request
+
+    def test_staff_with_the_header_token_is_profiled(self):
+        self.assertTrue(profiling.is_requested(self.request(self.staff)))
+
+    def test_wrong_or_missing_token_is_not_profiled(self):
+        self.assertFalse(profiling.is_requested(self.request(self.staff, token='guess')))
+        self.assertFalse(profiling.is_requested(self.request(self.staff, token=None)))
+
+    def test_token_in_the_query_string_is_ignored(self):
+        request = self.request(self.staff, token=None, path=f'/consume/?_profile={TOKEN}')
+
+        self.assertFalse(profiling.is_requested(request))
+
+    def test_non_staff_and_anonymous_users_are_refused(self):
+        with self.assertLogs('core.profiling', 'WARNING'):
+            self.assertFalse(profiling.is_requested(self.request(self.member)))
+        with self.assertLogs('core.profiling', 'WARNING'):
+            self.assertFalse(profiling.is_requested(self.request()))
+
+    @override_settings(PROFILING_TOKEN='')
+    def test_profiling_is_off_without_a_token(self):
+        self.assertFalse(profiling.is_requested(self.request(self.staff, token='')))
+
+
+@override_settings(PROFILING_TOKEN=TOKEN, PROFILING_KEEP=2)
+class ProfilingMiddlewareTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        override = override_settings(PROFILING_DIR=self.directory)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client.force_login(get_user_model().objects.create_user('staff', is_staff=True))
+        self.middleware = profiling.ProfilingMiddleware(lambda request: HttpResponse('ok'))
+
+    def call(self, token=TOKEN):
+        request = RequestFactory().get('/consume/offers/', headers={profiling.PROFILE_HEADER: token})
+        request.session = self.client.session
+        return self.middleware(request)
+
+    def test_profiled_request_names_its_stored_profile(self):
+        response = self.call()
+
+        name = response[profiling.PROFILE_HEADER]
+        summary, dump = profiling.load_profile(name)
+        self.assertEqual(summary['path'], '/consume/offers/')
+        self.assertEqual(summary['status'], 200)
+        self.assertEqual(set(summary['categories']), set(profiling.CATEGORIES))
+        self.assertTrue(dump.exists())
+
+    def test_other_requests_pass_through_untouched(self):
+        response = self.call(token='guess')
+
+        self.assertNotIn(profiling.PROFILE_HEADER, response)
+        self.assertFalse(list(self.directory.iterdir()))
+
+    def test_only_the_newest_profiles_are_kept(self):
+        names = [self.call()[profiling.PROFILE_HEADER] for _ in range(3)]
+
+        self.assertEqual([p['name'] for p in profiling.list_profiles()], names[:0:-1])
+        self.assertEqual(len(list(self.directory.glob('*.prof'))), 2)
+        self.assertNotIn('top_own', profiling.list_profiles()[0])
+
+    def test_concurrent_request_is_not_profiled(self):
+        with profiling._profiling:
+            response = self.call()
+
+        self.assertEqual(response[profiling.PROFILE_HEADER], 'busy')
+
+    def test_unknown_or_malformed_names_are_not_loaded(self):
+        (self.directory / 'x.json').write_text(json.dumps({}))
+
+        self.assertEqual(profiling.load_profile('../x'), (None, None))
+        self.assertEqual(profiling.load_profile('20260101000000-1-missing'), (None, None))
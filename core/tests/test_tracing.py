@@ -0,0 +1,137 @@
+import json
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .. import tracing
+from ..deadline import propagate
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+PARENT_ID = '00f067aa0ba902b7'
+
+
+class ParseTraceparentTests(SimpleTestCase):
+
+    def test_valid_header(self):
+        value = f'00-{TRACE_ID}-{PARENT_ID}-01'
+
+        self.assertEqual(tracing.parse_traceparent(value), (TRACE_ID, PARENT_ID))
+        self.assertEqual(tracing.parse_traceparent(f' {value.upper()} '), (TRACE_ID, PARENT_ID))
+
+    def test_invalid_headers_are_ignored(self):
+        for value in (None, '', 'garbage', f'01-{TRACE_ID}-{PARENT_ID}-01',
+                      f'00-{TRACE_ID[:-1]}-{PARENT_ID}-01', f'00-{"0" * 32}-{PARENT_ID}-01',
+                      f'00-{TRACE_ID}-{"0" * 16}-01'):
+            with self.subTest(value=value):
+                self.assertIsNone(tracing.parse_traceparent(value))
+
+
+@override_settings(TRACING_EXPORT='')
+class DisabledTracingTests(SimpleTestCase):
+
+    def test_spans_are_a_shared_noop(self):
+        with tracing.span('work') as current:
+            self.assertIs(current, tracing.NOOP)
+            self.assertIsNone(tracing.current_parent())
+            headers = {'Accept': 'application/json'}
+            self.assertIs(tracing.inject(headers), headers)
+
+
+class TracingExportTestCase(SimpleTestCase):
+    """Exports traces to a scratch file; ``traces()`` reads them back."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.export = Path(directory.name) / 'traces.jsonl'
+        override = override_settings(TRACING_EXPORT=str(self.export))
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def traces(self):
+        if not self.export.exists():
+            return []
+        return [
+            json.loads(line)['resourceSpans'][0]['scopeSpans'][0]['spans']
+            for line in self.export.read_text().splitlines()
+        ]
+
+
+class SpanTests(TracingExportTestCase):
+
+    def test_nested_spans_are_exported_once_with_the_root(self):
+        with tracing.span('root') as root:
+            with tracing.client_span('upstream', 'http://connector/api') as child:
+                headers = tracing.inject({'Accept': 'application/json'})
+            self.assertEqual(self.traces(), [])
+
+        (spans,) = self.traces()
+        self.assertEqual([s['name'] for s in spans], ['root', 'upstream'])
+        self.assertNotIn('parentSpanId', spans[0])
+        self.assertEqual(spans[1]['parentSpanId'], root.span_id)
+        self.assertEqual(spans[1]['kind'], tracing.CLIENT)
+        self.assertEqual(headers, {
+            'Accept': 'application/json',
+            'traceparent': f'00-{root.trace_id}-{child.span_id}-01',
+        })
+
+    def test_incoming_parent_is_continued(self):
+        with tracing.span('root', parent=(TRACE_ID, PARENT_ID)):
+            pass
+
+        (spans,) = self.traces()
+        self.assertEqual(spans[0]['traceId'], TRACE_ID)
+        self.assertEqual(spans[0]['parentSpanId'], PARENT_ID)
+
+    def test_errors_are_recorded_and_raised(self):
+        with self.assertRaises(ValueError), tracing.span('root'):
+            raise ValueError('bad')
+
+        (spans,) = self.traces()
+        self.assertEqual(spans[0]['status'], {'code': tracing.STATUS_ERROR, 'message': 'ValueError: bad'})
+
+    def test_worker_threads_join_the_callers_trace(self):
+        def work():
+            with tracing.span('worker'):
+                return tracing.inject({})['traceparent']
+
+        with tracing.span('root') as root, ThreadPoolExecutor(max_workers=2) as pool:
+            headers = [pool.submit(propagate(work)).result() for _ in range(2)]
+
+        (spans,) = self.traces()
+        self.assertEqual([s['name'] for s in spans], ['root', 'worker', 'worker'])
+        self.assertTrue(all(s['parentSpanId'] == root.span_id for s in spans[1:]))
+        self.assertTrue(all(h.startswith(f'00-{root.trace_id}-') for h in headers))
+
+    def test_attributes_keep_their_types(self):
+        with tracing.span('root', flag=True, count=3, ratio=0.5, label='x', skipped=None):
+            pass
+
+        (spans,) = self.traces()
+        self.assertEqual(spans[0]['attributes'], [
+            {'key': 'flag', 'value': {'boolValue': True}},
+            {'key': 'count', 'value': {'intValue': '3'}},
+            {'key': 'ratio', 'value': {'doubleValue': 0.5}},
+            {'key': 'label', 'value': {'stringValue': 'x'}},
+        ])
+
+
+class TracingMiddlewareTests(TracingExportTestCase):
+
+    def test_request_continues_the_incoming_trace(self):
+        middleware = tracing.TracingMiddleware(lambda request: HttpResponse(status=204))
+        request = RequestFactory().get(
+            '/consume/?page=2', headers={'traceparent': f'00-{TRACE_ID}-{PARENT_ID}-01'}
+        )
+
+        response = middleware(request)
+
+        (spans,) = self.traces()
+        self.assertEqual(spans[0]['name'], 'GET /consume/')
+        self.assertEqual(spans[0]['traceId'], TRACE_ID)
+        self.assertEqual(spans[0]['parentSpanId'], PARENT_ID)
+        self.assertIn({'key': 'http.status_code', 'value': {'intValue': '204'}}, spans[0]['attributes'])
+        self.assertEqual(response['traceresponse'], f"00-{TRACE_ID}-{spans[0]['spanId']}-01")
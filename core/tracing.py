@@ -0,0 +1,263 @@
+"""
+Lightweight request tracing.
+
+Spans live in context variables (like the request deadline), so they follow
+a request through the views, the consume modules and worker threads started
+with ``core.deadline.propagate``. Outgoing upstream calls carry the W3C
+``traceparent`` header. Every finished trace is written as one line of
+OTLP/JSON (``resourceSpans``) to TRACING_EXPORT, which the OpenTelemetry
+Collector's ``otlpjsonfile`` receiver and most tracing backends can import.
+
+With TRACING_EXPORT unset, ``span()`` returns a shared no-op and ``inject()``
+returns the headers untouched.
+"""
+import contextvars
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+from django.conf import settings
+
+TRACEPARENT_HEADER = "traceparent"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# OTLP span kinds
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+STATUS_ERROR = 2
+
+_current = contextvars.ContextVar("trace_span", default=None)
+_export_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def enabled():
+    return bool(getattr(settings, "TRACING_EXPORT", ""))
+
+
+def _new_id(size):
+    return os.urandom(size).hex()
+
+
+class _Trace:
+    """Spans of one trace, exported together when the local root ends."""
+
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self, trace_id):
+        self.trace_id = trace_id
+        self.spans = []
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "attributes",
+                 "start_ns", "end_ns", "error", "_token")
+
+    def __init__(self, trace, parent_id, name, kind, attributes):
+        self.trace = trace
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = None
+        self.end_ns = None
+        self.error = None
+        self._token = None
+
+    @property
+    def trace_id(self):
+        return self.trace.trace_id
+
+    @property
+    def is_root(self):
+        # The first span recorded in this process for the trace
+        return self.trace.spans and self.trace.spans[0] is self
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self.trace.spans.append(self)
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current.reset(self._token)
+        if self.is_root:
+            export(self.trace)
+        return False
+
+    def as_otlp(self):
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [_attribute(k, v) for k, v in self.attributes.items() if v is not None],
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.error:
+            span["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return span
+
+
+class _NoopSpan:
+    """Returned by span() while tracing is off."""
+
+    __slots__ = ()
+    trace_id = None
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP = _NoopSpan()
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def span(name, kind=INTERNAL, parent=None, **attributes):
+    """
+    Context manager timing ``name`` as a child of the current span, or as
+    the root of a new trace. ``parent`` is an incoming (trace id, span id)
+    pair, e.g. from parse_traceparent().
+    """
+    if not enabled():
+        return NOOP
+    current = _current.get()
+    if current is not None:
+        return Span(current.trace, current.span_id, name, kind, attributes)
+    if parent:
+        return Span(_Trace(parent[0]), parent[1], name, kind, attributes)
+    return Span(_Trace(_new_id(16)), None, name, kind, attributes)
+
+
+def client_span(name, url, method="GET", **attributes):
+    """Span for an upstream HTTP call."""
+    return span(name, kind=CLIENT, **{"http.method": method, "http.url": url}, **attributes)
+
+
+def current_trace_id():
+    current = _current.get()
+    return current.trace_id if current is not None else None
+
+
+def current_parent():
+    """
+    (trace id, span id) of the current span, for continuing the trace in
+    work that outlives it (pass as ``span(parent=...)``), or None.
+    """
+    current = _current.get()
+    return (current.trace_id, current.span_id) if current is not None else None
+
+
+def parse_traceparent(value):
+    """(trace id, parent span id) from a W3C traceparent header, or None."""
+    match = _TRACEPARENT_RE.match((value or "").strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2)
+
+
+def inject(headers):
+    """
+    ``headers`` plus a traceparent for the current span. Returns the same
+    dict unchanged when no span is active.
+    """
+    current = _current.get()
+    if current is None:
+        return headers
+    traced = dict(headers or {})
+    traced[TRACEPARENT_HEADER] = f"00-{current.trace_id}-{current.span_id}-01"
+    return traced
+
+
+def export(trace):
+    """Write a finished trace as one OTLP/JSON line to TRACING_EXPORT."""
+    target = getattr(settings, "TRACING_EXPORT", "")
+    document = {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                _attribute("service.name", getattr(settings, "TRACING_SERVICE_NAME", "consume-ui")),
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "core.tracing"},
+                "spans": [s.as_otlp() for s in list(trace.spans)],
+            }],
+        }]
+    }
+    line = json.dumps(document, separators=(",", ":"), default=str) + "\n"
+    try:
+        with _export_lock:
+            if target == "stdout":
+                sys.stdout.write(line)
+                sys.stdout.flush()
+            else:
+                with open(target, "a", encoding="utf-8") as handle:
+                    handle.write(line)
+    except OSError as exc:
+        logger.warning("Could not export trace %s: %s", trace.trace_id, exc)
+
+
+class TraceIdFilter(logging.Filter):
+    """Adds ``trace_id`` to log records ('-' outside a trace) for correlation."""
+
+    def filter(self, record):
+        record.trace_id = current_trace_id() or "-"
+        return True
+
+
+class TracingMiddleware:
+    """
+    Open the root span of each request, continuing an incoming traceparent,
+    and return the trace id in a ``traceresponse`` header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not enabled():
+            return self.get_response(request)
+        parent = parse_traceparent(request.headers.get(TRACEPARENT_HEADER))
+        with span(
+            f"{request.method} {request.path}",
+            kind=SERVER,
+            parent=parent,
+            **{"http.method": request.method, "http.target": request.get_full_path()},
+        ) as root:
+            response = self.get_response(request)
+            root.set("http.status_code", response.status_code)
+            match = getattr(request, "resolver_match", None)
+            if match is not None:
+                root.set("http.route", match.route)
+            response["traceresponse"] = f"00-{root.trace_id}-{root.span_id}-01"
+            return response
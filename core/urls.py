@@ -1,11 +1,19 @@
 from django.contrib import admin
 from django.urls import path, include
 from core import views as core_views
+from consume import views as consume_views
 
 urlpatterns = [
+    # Request profiles recorded by ProfilingMiddleware (staff only)
+    path('admin/profiles/', core_views.profiles_index, name='profiles'),
+    path('admin/profiles/<str:name>/', core_views.profile_detail, name='profile_detail'),
     path('admin/', admin.site.urls),
     path('logout/', core_views.auth_logout, name='auth_logout'),
 
+    # Load balancer checks (allowlisted in AuthServiceMiddleware)
+    path('health', consume_views.health, name='health'),
+    path('health/ready', consume_views.health_ready, name='health_ready'),
+
     # Mount your consume app at “/consume/” with a namespace
     path(
         'consume/',
@@ -1,35 +1,38 @@
+import logging
 from urllib.parse import urlencode, urljoin
 
 from django.conf import settings
-from django.http import HttpResponseRedirect
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, HttpResponseRedirect, JsonResponse
+
+from . import profiling
+
+logger = logging.getLogger(__name__)
 
 
 def auth_logout(request):
     base_url = getattr(settings, "AUTH_SERVICE_BASE_URL", "").strip()
     logout_page = getattr(settings, "AUTH_SERVICE_LOGOUT_PAGE", "/api/auth/logout/")
-    print('RequestGET', request.GET)
     next_url =  getattr(settings, "AUTH_LOGOUT_REDIRECT_URL", "http://localhost:8002/consume/")
-    print('NEXT URL', next_url)
     #getattr(settings, "AUTH_LOGOUT_REDIRECT_URL", "http://localhost:8002/consume/")
     #request.build_absolute_uri("/")
-    print('Logout page:',logout_page )
-    print('BASE URL:',base_url)
 
     if logout_page.startswith("http://") or logout_page.startswith("https://"):
         logout_url = logout_page
-        print(logout_page, 'Logout page IF:')
     elif base_url:
 
         logout_url = urljoin(base_url.rstrip("/") + "/", logout_page.lstrip("/"))
-        print('Logout page ELIF:',logout_page )
     else:
         logout_url = logout_page
-        print(logout_page, 'Logout page ELSE:')
-    print('FINAL URL', logout_url)
-
 
     query = urlencode({"next": next_url})
-    print('EVERYTHINGINTHEBRACKETS', f"{logout_url}?{query}" )
+    logger.debug(
+        "Logout redirect base_url=%s logout_page=%s next=%s url=%s",
+        base_url,
+        logout_page,
+        next_url,
+        f"{logout_url}?{query}"
+    )
     response = HttpResponseRedirect(f"{logout_url}?{query}")
 
     cookie_names = [
@@ -45,3 +48,25 @@ def auth_logout(request):
         response.delete_cookie(name)
 
     return response
+
+
+@staff_member_required
+def profiles_index(request):
+    """Stored request profiles, newest first (admin only)."""
+    return JsonResponse({"profiles": profiling.list_profiles()})
+
+
+@staff_member_required
+def profile_detail(request, name):
+    """
+    Summary of one stored profile; ``?download=1`` returns the raw cProfile
+    dump for pstats or snakeviz.
+    """
+    summary, dump = profiling.load_profile(name)
+    if summary is None:
+        raise Http404("Unknown profile")
+    if request.GET.get("download") == "1":
+        if not dump.exists():
+            raise Http404("Profile dump missing")
+        return FileResponse(open(dump, "rb"), as_attachment=True, filename=dump.name)
+    return JsonResponse(summary)
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Background cache refresh and health probes belong to serving processes
+# only, not to management commands, tests or scripts that import Django
+from consume.health import start_prober  # noqa: E402
+from consume.warmup import start_background_tasks  # noqa: E402
+
+start_background_tasks()
+start_prober()